@@ -0,0 +1,263 @@
+"""
+Analitika formi. Raspodele i statistike se računaju iz tipiziranih kolona odgovora (vidi
+answer_types.py) običnim SQL agregatima: single choice po answers.option_id, multiple choice po
+answer_selections, brojevi kao COUNT/SUM/MIN/MAX(value_num); datumi po sačuvanoj vrednosti.
+Isti ključevi (id opcije, broj, datum) se čuvaju i u rollup-ovima (rollups.py).
+"""
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+
+from cache_utils import LRUCache
+from models import AnswerModel, AnswerSelectionModel, AnswerValueCountModel, FormModel, QuestionModel, QuestionStatsModel
+
+SINGLE_CHOICE_TYPES = ("radio", "single_choice")
+MULTI_CHOICE_TYPES = ("checkbox", "multiple_choice")
+NUMBER_TYPES = ("number", "numeric")
+DATE_TYPES = ("date", "time")
+
+# za ove tipove treba raspodela po vrednosti, za ostale je dovoljan broj odgovora
+VALUE_LEVEL_TYPES = SINGLE_CHOICE_TYPES + MULTI_CHOICE_TYPES + NUMBER_TYPES + DATE_TYPES
+
+analytics_cache = LRUCache("analytics", maxsize=int(os.getenv("ANALYTICS_CACHE_SIZE", "256")))
+
+# (ključ, broj ponavljanja): id opcije (None = nepoznata) za choice, broj za number, tekst za datume
+ValueCounts = Iterable[Tuple[Any, int]]
+# (broj, zbir, min, max) numeričkih odgovora
+NumericStats = Tuple[int, Optional[float], Optional[float], Optional[float]]
+
+
+def _as_float(val: str) -> Optional[float]:
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+def _percent(cnt: int, denom: int) -> float:
+    return round(cnt / denom * 100.0, 2) if denom else 0.0
+
+
+def _distribution(q: QuestionModel, counts: Dict[int, int], other: int, denom: int) -> List[dict]:
+    opt_by_id = {o.id: o for o in q.options}
+    items = [
+        {
+            "option_id": oid,
+            "option_text": opt_by_id[oid].text,
+            "count": cnt,
+            "percent": _percent(cnt, denom),
+        }
+        for oid, cnt in counts.items()
+    ]
+    if other:
+        items.append({"option_id": None, "option_text": "_other", "count": other, "percent": _percent(other, denom)})
+    return items
+
+
+def value_key(key) -> str:
+    """Ključ raspodele kako se čuva u answer_value_counts.value."""
+    return "" if key is None else str(key)
+
+
+def parse_value_key(qtype: str, stored: str):
+    """Obrnuto od value_key, prema tipu pitanja."""
+    if qtype in SINGLE_CHOICE_TYPES + MULTI_CHOICE_TYPES:
+        return int(stored) if stored else None
+    if qtype in NUMBER_TYPES:
+        return float(stored)
+    return stored
+
+
+def _number_label(x: float) -> str:
+    return str(int(x)) if x.is_integer() else repr(x)
+
+
+def average(num_sum: Optional[float], count: int) -> float:
+    """Prosek kakav vraća analitika; isti za rollup-ove i za upit nad answers."""
+    return round((num_sum or 0.0) / count, 4)
+
+
+def summarize_question(
+    q: QuestionModel,
+    total: int,
+    value_counts: ValueCounts,
+    numeric: Optional[NumericStats] = None,
+) -> dict:
+    """
+    Sažetak jednog pitanja na osnovu broja odgovora i parova (ključ, broj ponavljanja).
+    Oblik izlaza je isti bez obzira da li brojevi dolaze iz answers tabele ili iz rollup-a.
+    """
+    q_summary = {"question_id": q.id, "text": q.text, "type": q.type}
+
+    if q.type in SINGLE_CHOICE_TYPES + MULTI_CHOICE_TYPES:
+        counts = {o.id: 0 for o in q.options}
+        other = 0
+        for oid, n in value_counts:
+            if oid in counts:
+                counts[oid] += n
+            else:
+                other += n
+        if q.type in SINGLE_CHOICE_TYPES:
+            q_summary["distribution"] = _distribution(q, counts, other, total)
+            q_summary["total_answers"] = total
+        else:
+            total_selections = sum(counts.values()) + other
+            q_summary["distribution"] = _distribution(q, counts, other, total_selections or 1)
+            q_summary["total_answers"] = total
+            q_summary["total_selections"] = total_selections
+
+    elif q.type in NUMBER_TYPES:
+        count, num_sum, num_min, num_max = numeric or (0, None, None, None)
+        q_summary["count"] = count
+        if count:
+            q_summary["min"] = num_min
+            q_summary["avg"] = average(num_sum, count)
+            q_summary["max"] = num_max
+        q_summary["histogram"] = [{"value": _number_label(x), "count": n} for x, n in sorted(value_counts)]
+
+    elif q.type in DATE_TYPES:
+        freq = {}
+        for raw, n in value_counts:
+            v = (raw or "").strip()
+            if v:
+                freq[v] = freq.get(v, 0) + n
+        q_summary["count"] = total
+        q_summary["by_value"] = [{"value": k, "count": v} for k, v in sorted(freq.items())]
+
+    else:
+        q_summary["count"] = total
+
+    return q_summary
+
+
+def answer_totals(db: Session, question_ids: List[int]) -> Dict[int, int]:
+    if not question_ids:
+        return {}
+    rows = (
+        db.query(AnswerModel.question_id, func.count(AnswerModel.id))
+        .filter(AnswerModel.question_id.in_(question_ids))
+        .group_by(AnswerModel.question_id)
+        .all()
+    )
+    return {qid: cnt for qid, cnt in rows}
+
+
+def answer_value_counts(db: Session, types: Dict[int, str]) -> Dict[int, List[Tuple[Any, int]]]:
+    """
+    (ključ, broj) po pitanju za pitanja kojima treba raspodela ({question_id: tip}), jedan
+    GROUP BY po vrsti pitanja nad indeksiranim tipiziranim kolonama.
+    """
+    kinds: Dict[str, List[int]] = {}
+    for qid, qtype in types.items():
+        for kind in (SINGLE_CHOICE_TYPES, MULTI_CHOICE_TYPES, NUMBER_TYPES, DATE_TYPES):
+            if qtype in kind:
+                kinds.setdefault(kind[0], []).append(qid)
+
+    a, s = AnswerModel, AnswerSelectionModel
+    queries = {
+        "radio": lambda ids: db.query(a.question_id, a.option_id, func.count(a.id))
+        .filter(a.question_id.in_(ids)).group_by(a.question_id, a.option_id),
+        "checkbox": lambda ids: db.query(a.question_id, s.option_id, func.count(s.answer_id))
+        .join(s, s.answer_id == a.id).filter(a.question_id.in_(ids)).group_by(a.question_id, s.option_id),
+        "number": lambda ids: db.query(a.question_id, a.value_num, func.count(a.id))
+        .filter(a.question_id.in_(ids), a.value_num.isnot(None)).group_by(a.question_id, a.value_num),
+        "date": lambda ids: db.query(a.question_id, a.value, func.count(a.id))
+        .filter(a.question_id.in_(ids)).group_by(a.question_id, a.value),
+    }
+    out: Dict[int, List[Tuple[Any, int]]] = {}
+    for kind, ids in kinds.items():
+        for qid, key, cnt in queries[kind](ids).all():
+            out.setdefault(qid, []).append((key, cnt))
+    return out
+
+
+def numeric_stats(db: Session, question_ids: List[int]) -> Dict[int, NumericStats]:
+    if not question_ids:
+        return {}
+    v = AnswerModel.value_num
+    rows = (
+        db.query(AnswerModel.question_id, func.count(v), func.sum(v), func.min(v), func.max(v))
+        .filter(AnswerModel.question_id.in_(question_ids), v.isnot(None))
+        .group_by(AnswerModel.question_id)
+        .all()
+    )
+    return {qid: (cnt, total, lo, hi) for qid, cnt, total, lo, hi in rows}
+
+
+def _from_rollups(db: Session, questions: List[QuestionModel]) -> Optional[List[dict]]:
+    """Čita question_stats / answer_value_counts; None ako neko pitanje još nema rollup."""
+    qids = [q.id for q in questions]
+    stats = {
+        s.question_id: s
+        for s in db.query(
+            QuestionStatsModel.question_id,
+            QuestionStatsModel.answer_count,
+            QuestionStatsModel.num_count,
+            QuestionStatsModel.num_sum,
+            QuestionStatsModel.num_min,
+            QuestionStatsModel.num_max,
+        ).filter(QuestionStatsModel.question_id.in_(qids)).all()
+    }
+    if len(stats) < len(qids):
+        return None
+
+    values: Dict[int, List[Tuple[str, int]]] = {}
+    value_qids = [q.id for q in questions if q.type in VALUE_LEVEL_TYPES]
+    if value_qids:
+        rows = (
+            db.query(AnswerValueCountModel.question_id, AnswerValueCountModel.value, AnswerValueCountModel.total)
+            .filter(AnswerValueCountModel.question_id.in_(value_qids), AnswerValueCountModel.total > 0)
+            .all()
+        )
+        types = {q.id: q.type for q in questions}
+        for qid, value, cnt in rows:
+            values.setdefault(qid, []).append((parse_value_key(types[qid], value), cnt))
+
+    out = []
+    for q in questions:
+        s = stats[q.id]
+        numeric = (s.num_count, s.num_sum or 0.0, s.num_min, s.num_max) if q.type in NUMBER_TYPES else None
+        out.append(summarize_question(q, s.answer_count, values.get(q.id, []), numeric))
+    return out
+
+
+def build_live_analytics(db: Session, questions: List[QuestionModel]) -> List[dict]:
+    """
+    Analitika direktno iz answers tabele u nekoliko GROUP BY upita (umesto jednog upita po
+    pitanju): broj odgovora po pitanju, raspodela po vrsti pitanja i numerička statistika.
+    """
+    totals = answer_totals(db, [q.id for q in questions])
+    values = answer_value_counts(db, {q.id: q.type for q in questions if q.type in VALUE_LEVEL_TYPES})
+    numbers = numeric_stats(db, [q.id for q in questions if q.type in NUMBER_TYPES])
+    return [
+        summarize_question(q, totals.get(q.id, 0), values.get(q.id, []), numbers.get(q.id))
+        for q in questions
+    ]
+
+
+def build_form_analytics(db: Session, form: FormModel) -> List[dict]:
+    questions = (
+        db.query(QuestionModel)
+        .options(selectinload(QuestionModel.options))
+        .filter(QuestionModel.form_id == form.id)
+        .order_by(QuestionModel.id)
+        .all()
+    )
+    if not questions:
+        return []
+    rolled = _from_rollups(db, questions)
+    if rolled is not None:
+        return rolled
+    return build_live_analytics(db, questions)
+
+
+def cached_form_analytics(db: Session, form: FormModel) -> List[dict]:
+    """Keš po formi; unos sa starijom answers_version se računa kao promašaj."""
+    version = form.answers_version or 0
+    data = analytics_cache.get(form.id, version=version)
+    if data is None:
+        data = build_form_analytics(db, form)
+        analytics_cache.set(form.id, data, version=version)
+    return data
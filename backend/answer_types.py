@@ -0,0 +1,185 @@
+"""
+Tipizirane kolone odgovora. answers.value ostaje tekstualni zapis (izvozi, postojeći API), a uz
+njega se čuvaju option_id (single i numeric choice), value_num (brojevi i vrednost numeric_choice
+opcije), value_date (date/datetime, u UTC) i redovi answer_selections za multiple choice.
+Brojanje i proseci po opciji su tako običan indeksiran SQL agregat, bez parsiranja CSV-a.
+"""
+from datetime import date, datetime, timezone
+from math import isfinite
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from analytics import NUMBER_TYPES, _as_float
+from models import AnswerModel, AnswerSelectionModel, OptionModel
+
+TYPE_ALIASES = {"radio": "single_choice", "checkbox": "multiple_choice"}
+
+RETYPE_BATCH_SIZE = 5000
+
+
+class AnswerRow(NamedTuple):
+    """Proveren odgovor spreman za upis; u spool-u se čuva kao JSON lista istim redom."""
+    question_id: int
+    type: str
+    value: str
+    option_id: Optional[int] = None
+    value_num: Optional[float] = None
+    selections: Tuple[int, ...] = ()
+
+
+def _finite(x: Optional[float]) -> Optional[float]:
+    return x if x is not None and isfinite(x) else None
+
+
+def _parse_id(x) -> Optional[int]:
+    try:
+        return int(str(x).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def typed_fields(
+    qtype: str,
+    value: str,
+    option_ids: FrozenSet[int],
+    number_by_id: Dict[int, float],
+    id_by_text: Optional[Dict[str, int]] = None,
+) -> Tuple[Optional[int], Optional[float], Tuple[int, ...]]:
+    """
+    (option_id, value_num, selections) za sačuvanu vrednost; nepoznate opcije se preskaču.
+    Sa id_by_text se prepoznaju i stariji odgovori sačuvani kao tekst opcije (bez obzira na
+    velika slova); nove predaje validacija ionako prevodi u id-jeve.
+    """
+    kind = TYPE_ALIASES.get(qtype, qtype)
+
+    def _option(token) -> Optional[int]:
+        if not str(token).strip():
+            return None
+        oid = _parse_id(token)
+        if oid in option_ids:
+            return oid
+        return (id_by_text or {}).get(str(token).strip().lower())
+
+    if kind in ("single_choice", "numeric_choice"):
+        oid = _option(value)
+        if oid is None:
+            return None, None, ()
+        return oid, number_by_id.get(oid) if kind == "numeric_choice" else None, ()
+    if kind == "multiple_choice":
+        seen: List[int] = []
+        for part in str(value).split(","):
+            oid = _option(part)
+            if oid is not None and oid not in seen:
+                seen.append(oid)
+        return None, None, tuple(seen)
+    if kind in NUMBER_TYPES:
+        return None, _finite(_as_float(value)), ()
+    return None, None, ()
+
+
+def option_texts(options: Iterable) -> Dict[str, int]:
+    """tekst opcije (mala slova) -> id, za odgovore sačuvane kao tekst."""
+    return {(o.text or "").strip().lower(): o.id for o in options}
+
+
+def date_value(qtype: str, value: str) -> Optional[datetime]:
+    """value_date za date/datetime pitanja; datum je ponoć UTC, vreme bez zone se tumači kao UTC."""
+    try:
+        if qtype == "date":
+            d = date.fromisoformat(value)
+            return datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+        if qtype == "datetime":
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError, AttributeError):
+        pass
+    return None
+
+
+def option_numbers(options: Iterable) -> Dict[int, float]:
+    """id opcije -> broj iz teksta opcije (za numeric_choice skale)."""
+    out = {}
+    for o in options:
+        x = _finite(_as_float(o.text))
+        if x is not None:
+            out[o.id] = x
+    return out
+
+
+def insert_answers(db: Session, rows: List[dict], selections: List[Tuple[int, ...]]):
+    """
+    Upisuje odgovore jednim executemany; ako neki ima izbore, id-jevi se vraćaju RETURNING-om
+    (istim redom kao rows) i izbori se upisuju drugim executemany.
+    """
+    if not rows:
+        return
+    if not any(selections):
+        db.execute(insert(AnswerModel), rows)
+        return
+    table = AnswerModel.__table__
+    ids = db.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    db.execute(
+        insert(AnswerSelectionModel),
+        [{"answer_id": aid, "option_id": oid} for aid, sel in zip(ids, selections) for oid in sel],
+    )
+
+
+_RETYPE = (
+    update(AnswerModel.__table__)
+    .where(AnswerModel.__table__.c.id == bindparam("b_id"))
+    .values(
+        option_id=bindparam("b_option_id"),
+        value_num=bindparam("b_value_num"),
+        value_date=bindparam("b_value_date"),
+    )
+)
+
+
+def retype_question(db: Session, question_id: int, qtype: str, batch_size: int = RETYPE_BATCH_SIZE) -> int:
+    """
+    Ponovo računa tipizirane kolone i izbore svih odgovora pitanja iz answers.value
+    (promena tipa pitanja, popunjavanje postojećih podataka). Radi u paketima po id-ju;
+    vraća broj obrađenih odgovora. Koristi samo eksplicitne kolone, pa radi i iz migracije.
+    """
+    opts = db.execute(
+        select(OptionModel.id, OptionModel.text).where(OptionModel.question_id == question_id)
+    ).all()
+    option_ids = frozenset(o.id for o in opts)
+    numbers = option_numbers(opts)
+    by_text = option_texts(opts)
+
+    db.execute(
+        text("DELETE FROM answer_selections WHERE answer_id IN (SELECT id FROM answers WHERE question_id = :qid)"),
+        {"qid": question_id},
+    )
+
+    answers = AnswerModel.__table__
+    last_id, done = 0, 0
+    while True:
+        batch = db.execute(
+            select(answers.c.id, answers.c.value)
+            .where(answers.c.question_id == question_id, answers.c.id > last_id)
+            .order_by(answers.c.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return done
+        params, selections = [], []
+        for aid, value in batch:
+            option_id, value_num, sel = typed_fields(qtype, value, option_ids, numbers, by_text)
+            params.append({
+                "b_id": aid,
+                "b_option_id": option_id,
+                "b_value_num": value_num,
+                "b_value_date": date_value(qtype, value),
+            })
+            selections.extend({"answer_id": aid, "option_id": oid} for oid in sel)
+        db.execute(_RETYPE, params)
+        if selections:
+            db.execute(insert(AnswerSelectionModel), selections)
+        last_id = batch[-1].id
+        done += len(batch)
@@ -1,22 +1,31 @@
-from fastapi import FastAPI, HTTPException, Depends, APIRouter
+from fastapi import FastAPI, HTTPException, Depends, APIRouter, Query, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from sqlalchemy import Column, Integer, String, create_engine, or_
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from form import FormModel, FormCreate
 from database import Base, engine, SessionLocal
 from jose import JWTError, jwt
-from models import UserModel, CollaboratorModel, FormModel, AnswerModel
+from models import UserModel, CollaboratorModel, FormModel, AnswerModel, SubmissionModel
 from typing import List, Optional
 from schemas import *
 from fastapi.staticfiles import StaticFiles
+from cache_utils import all_stats
+from ingest import ingest_queue, queue_mode
+from pagination import NEXT_CURSOR_HEADER, PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT, decode_cursor, set_next_cursor, split_page
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+import passwords
+import user_search
+from passwords import hash_password, verify_password
 import os
 from dotenv import load_dotenv
 from form import *
+from form_db_circl_fix import get_db
+from form_cur_user_circl_fix import get_current_user, invalidate_user
 
 load_dotenv()
 
@@ -25,8 +34,18 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "2880"))
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if queue_mode():
+        # nepotvrđena popunjavanja iz spool-a se upisuju odmah po pokretanju
+        ingest_queue.start(engine)
+    yield
+    ingest_queue.drain()
+    passwords.shutdown()
+
+
 # App Init
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,25 +53,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # frontend čita kursor sledeće strane i ukupan broj iz zaglavlja
+    expose_headers=[NEXT_CURSOR_HEADER, "X-Total-Count"],
 )
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
-# Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-# Auth
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token", auto_error=False)
-
-
+# Auth: jedina implementacija get_current_user je u form_cur_user_circl_fix (sa kešom tokena)
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
@@ -62,49 +71,19 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 def get_user(db: Session, username: str):
     return db.query(UserModel).filter(UserModel.username == username).first()
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user(db: Session, username: str, password: str):
+    user = await run_in_threadpool(get_user, db, username)
+    if not user or not await verify_password(password, user.hashed_password):
         return False
     return user
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = get_user(db, username)
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Token error")
-
-def _is_self_or_superadmin(current_user: UserModel, target_user_id: int) -> bool:
-    return bool(current_user.is_superadmin) or current_user.id == target_user_id
-
-def _ensure_superadmin(current_user: UserModel):
-    if not current_user.is_superadmin:
-        raise HTTPException(status_code=403, detail="Samo super admin ima pristup ovoj akciji.")
-
-# Routes
-@app.post("/api/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user(db, user.username)
-    if db_user:
+def _check_new_user(db: Session, user: UserCreate):
+    if get_user(db, user.username):
         raise HTTPException(status_code=400, detail="Username already exists")
-    email_check = db.query(UserModel).filter(UserModel.email == user.email).first()
-    if email_check:
+    if db.query(UserModel).filter(UserModel.email == user.email).first():
         raise HTTPException(status_code=400, detail="Email already in use")
-    hashed_password = get_password_hash(user.password)
+
+def _add_user(db: Session, user: UserCreate, hashed_password: str) -> UserModel:
     new_user = UserModel(
         username=user.username,
         email=user.email,
@@ -113,12 +92,33 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    return new_user
+
+def _login_user(db: Session, identifier: str) -> Optional[UserModel]:
+    if "@" in identifier:
+        return db.query(UserModel).filter(UserModel.email == identifier).first()
+    return db.query(UserModel).filter(UserModel.username == identifier).first()
+
+def _is_self_or_superadmin(current_user: UserModel, target_user_id: int) -> bool:
+    return bool(current_user.is_superadmin) or current_user.id == target_user_id
+
+def _ensure_superadmin(current_user: UserModel):
+    if not current_user.is_superadmin:
+        raise HTTPException(status_code=403, detail="Samo super admin ima pristup ovoj akciji.")
+
+# Routes
+# login/register su async: upiti idu u thread pool, bcrypt u pool procesa, a event loop ostaje slobodan
+@app.post("/api/register")
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    await run_in_threadpool(_check_new_user, db, user)
+    hashed_password = await hash_password(user.password)
+    new_user = await run_in_threadpool(_add_user, db, user, hashed_password)
     access_token = create_access_token(data={"sub": new_user.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     access_token = create_access_token(data={"sub": user.username},
@@ -137,13 +137,10 @@ def read_users_me(current_user: UserModel = Depends(get_current_user)):
 
 
 @app.post("/api/login")
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    if "@" in data.identifier:
-        user = db.query(UserModel).filter(UserModel.email == data.identifier).first()
-    else:
-        user = db.query(UserModel).filter(UserModel.username == data.identifier).first()
+async def login(data: LoginRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_login_user, db, data.identifier)
 
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user or not await verify_password(data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     access_token = create_access_token(data={"sub": user.username})
@@ -164,57 +161,30 @@ from form import router as form_router
 app.include_router(form_router)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(status_code=401, detail="Invalid token")
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(UserModel).filter(UserModel.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
-
 @app.get("/api/users/search")
 def search_users(
     q: str,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=50),
     exclude_form_id: Optional[int] = None,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user)
 ):
-    q = (q or "").strip()
-    if len(q) < 2:
-        raise HTTPException(status_code=400, detail="Parametar q mora imati najmanje 2 karaktera.")
-
-    base_query = db.query(UserModel).filter(
-        or_(UserModel.username.ilike(f"%{q}%"), UserModel.email.ilike(f"%{q}%"))
-    )
-
-    if exclude_form_id is not None:
-        from models import FormModel  
-        form = db.query(FormModel).filter(FormModel.id == exclude_form_id).first()
-        if not form:
-            raise HTTPException(status_code=404, detail="Forma ne postoji.")
-
-        collab_user_ids = db.query(CollaboratorModel.user_id).filter(
-            CollaboratorModel.form_id == exclude_form_id
-        )
-
-        base_query = base_query.filter(UserModel.id != form.owner_id)
-        base_query = base_query.filter(~UserModel.id.in_(collab_user_ids))
-
-    users = base_query.limit(limit).all()
-
-    return [{"id": u.id, "username": u.username, "email": u.email} for u in users]
+    return user_search.search(db, q, limit, exclude_form_id)
 
 @app.get("/api/users")
-def get_users(db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
-    users = db.query(UserModel).all()
+def get_users(
+    response: Response,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    after = decode_cursor(cursor, int)
+    q = db.query(UserModel)
+    if after:
+        q = q.filter(UserModel.id > after[0])
+    users, next_cursor = split_page(q.order_by(UserModel.id).limit(limit + 1).all(), limit, lambda u: (u.id,))
+    set_next_cursor(response, next_cursor)
     return [
         {
             "id": u.id,
@@ -224,19 +194,23 @@ def get_users(db: Session = Depends(get_db), current_user: UserModel = Depends(g
         }
         for u in users
     ]
-@app.put("/api/users/{user_id}")
-def update_user(
-    user_id: int,
-    data: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
-):
-    if not is_superadmin(current_user) and current_user.id != user_id:
-         HTTPException(status_code=403, detail="Možete izmeniti samo svoj nalog.")
 
-    if not _is_self_or_superadmin(current_user, user_id):
-        raise HTTPException(status_code=403, detail="Samo super admin ili vlasnik naloga može da izmeni korisnika.")
+@app.get("/api/admin/cache-stats")
+def cache_stats(current_user: UserModel = Depends(get_current_user)):
+    _ensure_superadmin(current_user)
+    return all_stats()
+
+@app.get("/api/admin/password-stats")
+def password_stats(current_user: UserModel = Depends(get_current_user)):
+    _ensure_superadmin(current_user)
+    return passwords.stats()
 
+@app.get("/api/admin/ingest-stats")
+def ingest_stats(current_user: UserModel = Depends(get_current_user)):
+    _ensure_superadmin(current_user)
+    return {"mode": "queue" if queue_mode() else "direct", **ingest_queue.stats()}
+
+def _check_user_update(db: Session, user_id: int, data: UserUpdate, current_user: UserModel) -> UserModel:
     user = db.query(UserModel).filter(UserModel.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Korisnik nije pronađen")
@@ -244,25 +218,45 @@ def update_user(
     if data.username and data.username != user.username:
         if db.query(UserModel).filter(UserModel.username == data.username).first():
             raise HTTPException(status_code=400, detail="Korisničko ime je zauzeto.")
-        user.username = data.username
 
     if data.email and data.email != user.email:
         if db.query(UserModel).filter(UserModel.email == data.email).first():
             raise HTTPException(status_code=400, detail="Email je zauzet.")
-        user.email = data.email
 
-    if data.password:
-        user.hashed_password = get_password_hash(data.password)
+    if data.is_superadmin is not None and not current_user.is_superadmin:
+        raise HTTPException(status_code=403, detail="Samo super admin može menjati is_superadmin polje.")
+    return user
 
+def _apply_user_update(db: Session, user: UserModel, data: UserUpdate, hashed_password: Optional[str]) -> dict:
+    if data.username and data.username != user.username:
+        user.username = data.username
+    if data.email and data.email != user.email:
+        user.email = data.email
+    if hashed_password:
+        user.hashed_password = hashed_password
     if data.is_superadmin is not None:
-        if not current_user.is_superadmin:
-            raise HTTPException(status_code=403, detail="Samo super admin može menjati is_superadmin polje.")
         user.is_superadmin = data.is_superadmin
 
     db.commit()
+    invalidate_user(user.id)
     db.refresh(user)
     return {"id": user.id, "username": user.username, "email": user.email, "is_superadmin": user.is_superadmin}
 
+# async kao register: provere i upis idu u thread pool, a nova lozinka se hešira u pool-u procesa
+@app.put("/api/users/{user_id}")
+async def update_user(
+    user_id: int,
+    data: UserUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    if not _is_self_or_superadmin(current_user, user_id):
+        raise HTTPException(status_code=403, detail="Samo super admin ili vlasnik naloga može da izmeni korisnika.")
+
+    user = await run_in_threadpool(_check_user_update, db, user_id, data, current_user)
+    hashed_password = await hash_password(data.password) if data.password else None
+    return await run_in_threadpool(_apply_user_update, db, user, data, hashed_password)
+
 
 @app.delete("/api/users/{user_id}", status_code=204)
 def delete_user(
@@ -288,6 +282,10 @@ def delete_user(
     db.query(AnswerModel).filter(AnswerModel.user_id == user_id).update(
         {AnswerModel.user_id: None}, synchronize_session=False
     )
+    db.query(SubmissionModel).filter(SubmissionModel.user_id == user_id).update(
+        {SubmissionModel.user_id: None}, synchronize_session=False
+    )
 
     db.delete(user)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    invalidate_user(user_id)
\ No newline at end of file
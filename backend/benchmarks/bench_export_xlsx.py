@@ -0,0 +1,90 @@
+"""
+Benchmark za GET /api/forms/{id}/export.xlsx: vreme do zaglavlja, vreme do prvog bajta tela,
+ukupno vreme i vršni RSS procesa (server i klijent rade u istom procesu).
+
+    python benchmarks/bench_export_xlsx.py --answers 200000 [--db-url postgresql+psycopg2://...]
+
+Baza se puni u posebnom procesu da punjenje ne bi ulazilo u izmereni vršni RSS.
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+from common import ensure_user, make_token, peak_rss_mb, serve, setup_env
+
+QUESTIONS = 10
+
+
+def seed(n_answers: int):
+    from sqlalchemy import insert
+    from database import Base, SessionLocal, engine
+    from models import AnswerModel, FormModel, QuestionModel
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = ensure_user(db, "bench")
+    form = FormModel(name="Bench", description=None, is_public=False, is_locked=False, owner_id=user.id)
+    db.add(form); db.flush()
+    qids = []
+    for i in range(QUESTIONS):
+        q = QuestionModel(form_id=form.id, text=f"Pitanje {i}", type="short_text", is_required=False, order=i)
+        db.add(q); db.flush()
+        qids.append(q.id)
+    batch = []
+    for i in range(n_answers):
+        batch.append({"question_id": qids[i % QUESTIONS], "user_id": user.id, "value": f"odgovor {i}"})
+        if len(batch) == 10000:
+            db.execute(insert(AnswerModel), batch); batch.clear()
+    if batch:
+        db.execute(insert(AnswerModel), batch)
+    db.commit()
+    print(f"seeded form {form.id} with {n_answers} answers")
+
+
+def run():
+    import httpx
+    from auth_api import app
+    from database import SessionLocal
+    from models import FormModel
+
+    db = SessionLocal()
+    form_id = db.query(FormModel.id).filter(FormModel.name == "Bench").scalar()
+    db.close()
+
+    headers = {"Authorization": f"Bearer {make_token('bench')}"}
+    with serve(app) as base_url:
+        rss_before = peak_rss_mb()
+        t0 = time.perf_counter()
+        first_byte = None
+        total = 0
+        with httpx.stream("GET", f"{base_url}/api/forms/{form_id}/export.xlsx", headers=headers, timeout=None) as r:
+            t_headers = time.perf_counter() - t0
+            r.raise_for_status()
+            for chunk in r.iter_raw():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - t0
+                total += len(chunk)
+        elapsed = time.perf_counter() - t0
+
+    print(f"headers after      {t_headers * 1000:9.1f} ms")
+    print(f"first body byte    {first_byte * 1000:9.1f} ms")
+    print(f"total              {elapsed * 1000:9.1f} ms  ({total / 1e6:.1f} MB)")
+    print(f"peak RSS           {peak_rss_mb():9.1f} MB  (before export {rss_before:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=200000)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--seed-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    db_url = setup_env(args.db_url)
+    if args.seed_only:
+        seed(args.answers)
+    else:
+        subprocess.run([sys.executable, __file__, "--seed-only", "--answers", str(args.answers), "--db-url", db_url],
+                       check=True)
+        run()
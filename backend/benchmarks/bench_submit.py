@@ -0,0 +1,74 @@
+"""
+Benchmark za POST /api/forms/{id}/answers: popunjavanja u sekundi za formu sa --questions pitanja
+(mešavina short_text, number i single_choice). Zahtevi idu kroz TestClient, bez mreže.
+Sa ANSWER_INGEST_MODE=queue meri se write-behind režim, uključujući pražnjenje reda na kraju.
+
+    python benchmarks/bench_submit.py --questions 60 --submissions 500 [--db-url postgresql+psycopg2://...]
+"""
+import argparse
+import time
+
+from common import ensure_user, setup_env
+
+
+def seed(questions: int) -> list:
+    from database import Base, SessionLocal, engine
+    from models import FormModel, OptionModel, QuestionModel
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = ensure_user(db, "bench")
+    form = FormModel(name="Bench", description=None, is_public=True, is_locked=False, owner_id=user.id)
+    db.add(form); db.flush()
+    answers = []
+    for i in range(questions):
+        kind = ("short_text", "number", "single_choice")[i % 3]
+        q = QuestionModel(form_id=form.id, text=f"Pitanje {i}", type=kind, is_required=False, order=i)
+        db.add(q); db.flush()
+        if kind == "single_choice":
+            db.add_all([OptionModel(question_id=q.id, text=t) for t in ("Da", "Ne", "Možda")])
+            answers.append({"question_id": q.id, "answer": "Ne"})
+        elif kind == "number":
+            answers.append({"question_id": q.id, "answer": str(i)})
+        else:
+            answers.append({"question_id": q.id, "answer": f"odgovor {i}"})
+    db.commit()
+    form_id = form.id
+    db.close()
+    return form_id, answers
+
+
+def run(form_id: int, answers: list, submissions: int, warmup: int = 20):
+    from fastapi.testclient import TestClient
+    from auth_api import app
+    from ingest import ingest_queue
+
+    client = TestClient(app)
+    payload = {"answers": answers}
+    for _ in range(warmup):
+        assert client.post(f"/api/forms/{form_id}/answers", json=payload).status_code in (200, 202)
+
+    t0 = time.perf_counter()
+    for _ in range(submissions):
+        r = client.post(f"/api/forms/{form_id}/answers", json=payload)
+        assert r.status_code in (200, 202), r.text
+    acked = time.perf_counter() - t0
+    ingest_queue.drain()
+    elapsed = time.perf_counter() - t0
+
+    print(f"acknowledged after {acked:.2f} s")
+    print(f"{submissions} submissions x {len(answers)} answers in {elapsed:.2f} s")
+    print(f"{submissions / elapsed:9.1f} submissions/s   {submissions * len(answers) / elapsed:9.0f} answers/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=60)
+    parser.add_argument("--submissions", type=int, default=500)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    setup_env(args.db_url)
+    form_id, answers = seed(args.questions)
+    run(form_id, answers, args.submissions)
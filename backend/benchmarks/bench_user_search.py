@@ -0,0 +1,97 @@
+"""
+Benchmark za pretragu korisnika (GET /api/users/search): stari ILIKE '%q%' pun prolaz naspram
+user_search.search (pg_trgm na Postgres-u, FTS5 trigram na SQLite-u), nad sintetičkom tabelom
+od --users korisnika. Za svaki upit ispisuje medijanu i p95 u milisekundama.
+
+    python benchmarks/bench_user_search.py --users 2000000 [--db-url postgresql+psycopg2://...]
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from common import setup_env
+
+QUERIES = ["ma", "mar", "marko", "petrov", "@exa", "zz9q", "ana.m"]
+FIRST = ["marko", "ana", "jovan", "milica", "stefan", "jelena", "nikola", "ivana", "luka", "sara"]
+LAST = ["petrovic", "jovanovic", "nikolic", "markovic", "djordjevic", "ilic", "stojanovic", "pavlovic"]
+
+
+def seed(users: int, batch: int = 20000) -> int:
+    from sqlalchemy import insert
+    from database import Base, SessionLocal, engine
+    from models import CollaboratorModel, FormModel, UserModel
+    import user_search  # noqa: F401  (after_create pravi indeks pretrage)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rnd = random.Random(42)
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        for start in range(0, users, batch):
+            rows = []
+            for i in range(start, min(start + batch, users)):
+                first, last = rnd.choice(FIRST), rnd.choice(LAST)
+                tail = "".join(rnd.choices(string.ascii_lowercase + string.digits, k=4))
+                rows.append({"username": f"{first}{last}{i}", "email": f"{first}.{last}.{tail}{i}@example.com",
+                             "hashed_password": "x", "is_superadmin": False})
+            conn.execute(insert(UserModel.__table__), rows)
+    print(f"seeded {users} users in {time.perf_counter() - t0:.1f} s")
+
+    db = SessionLocal()
+    form = FormModel(name="Bench", description=None, is_public=False, is_locked=False, owner_id=1)
+    db.add(form); db.flush()
+    db.add_all([CollaboratorModel(form_id=form.id, user_id=uid, role="viewer") for uid in range(2, 2000, 7)])
+    db.commit()
+    form_id = form.id
+    db.close()
+    return form_id
+
+
+def legacy(db, q: str, limit: int, exclude_form_id: int):
+    from sqlalchemy import or_
+    from models import CollaboratorModel, FormModel, UserModel
+
+    query = db.query(UserModel).filter(or_(UserModel.username.ilike(f"%{q}%"), UserModel.email.ilike(f"%{q}%")))
+    form = db.query(FormModel).filter(FormModel.id == exclude_form_id).first()
+    collab_user_ids = db.query(CollaboratorModel.user_id).filter(CollaboratorModel.form_id == exclude_form_id)
+    query = query.filter(UserModel.id != form.owner_id, ~UserModel.id.in_(collab_user_ids))
+    return query.limit(limit).all()
+
+
+def timed(fn, repeat: int) -> list:
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def run(form_id: int, repeat: int, limit: int):
+    from database import SessionLocal
+    import user_search
+
+    db = SessionLocal()
+    print(f"{'query':>8} {'legacy p50':>11} {'p95':>8} {'indexed p50':>12} {'p95':>8}")
+    for q in QUERIES:
+        old = timed(lambda: legacy(db, q, limit, form_id), repeat)
+        new = timed(lambda: user_search.search(db, q, limit, form_id), repeat)
+        p95 = lambda xs: sorted(xs)[int(len(xs) * 0.95) - 1] if len(xs) > 1 else xs[0]
+        print(f"{q:>8} {statistics.median(old):9.2f}ms {p95(old):6.2f}ms "
+              f"{statistics.median(new):10.2f}ms {p95(new):6.2f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    setup_env(args.db_url)
+    form_id = seed(args.users)
+    run(form_id, args.repeat, args.limit)
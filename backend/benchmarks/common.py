@@ -0,0 +1,64 @@
+import contextlib
+import os
+import pathlib
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+
+def setup_env(db_url: str = None) -> str:
+    """Mora se pozvati pre importa modula aplikacije (database.py čita DATABASE_URL pri importu)."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    if db_url is None:
+        db_url = "sqlite:///" + os.path.join(tempfile.gettempdir(), "forms_bench.sqlite3")
+    os.environ["DATABASE_URL"] = db_url
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    return db_url
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss je u KB na Linuxu, u bajtovima na macOS-u
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def make_token(username: str) -> str:
+    from jose import jwt
+    return jwt.encode({"sub": username}, os.environ["SECRET_KEY"], algorithm=os.environ["ALGORITHM"])
+
+
+def ensure_user(db, username: str, is_superadmin: bool = True):
+    from models import UserModel
+    user = db.query(UserModel).filter(UserModel.username == username).first()
+    if user is None:
+        user = UserModel(username=username, email=f"{username}@example.com", hashed_password="x",
+                         is_superadmin=is_superadmin)
+        db.add(user)
+        db.commit()
+    return user
+
+
+@contextlib.contextmanager
+def serve(app):
+    """Pravi uvicorn server u pozadinskoj niti (TestClient bi baferovao ceo odgovor)."""
+    import uvicorn
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
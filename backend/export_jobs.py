@@ -0,0 +1,185 @@
+"""
+Pozadinski izvoz: poslove izvršava pool niti, a gotovi fajlovi se čuvaju u lokalnom skladištu
+pod ključem (forma, format, answers_version). Dok se odgovori forme ne promene, ponovljen izvoz
+odmah vraća postojeći fajl. Poslovi žive u memoriji procesa; fajlovi preživljavaju restart.
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from exports import EXPORT_FORMATS
+from models import FormModel
+
+EXPORT_STORE_DIR = os.getenv("EXPORT_STORE_DIR", os.path.join(tempfile.gettempdir(), "form_exports"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_STORE_MAX_BYTES = int(os.getenv("EXPORT_STORE_MAX_BYTES", str(2 * 1024 ** 3)))
+EXPORT_STORE_MAX_AGE = int(os.getenv("EXPORT_STORE_MAX_AGE", str(24 * 3600)))
+
+
+@dataclass
+class ExportJob:
+    id: str
+    form_id: int
+    format: str
+    status: str = "queued"
+    answers_version: Optional[int] = None
+    path: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def size(self) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path) if self.status == "done" else None
+        except OSError:
+            return None
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.format][1]
+
+    @property
+    def filename(self) -> str:
+        return f"form_{self.form_id}_export.{EXPORT_FORMATS[self.format][2]}"
+
+
+_jobs: Dict[str, ExportJob] = {}
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export-job")
+    return _executor
+
+
+def artifact_path(form_id: int, fmt: str, version: int) -> str:
+    return os.path.join(EXPORT_STORE_DIR, f"form_{form_id}_v{version}.{EXPORT_FORMATS[fmt][2]}")
+
+
+def _artifact_prefix(form_id: int) -> str:
+    return f"form_{form_id}_v"
+
+
+def submit(db: Session, form: FormModel, fmt: str) -> ExportJob:
+    """
+    Vraća posao za izvoz forme. Ako fajl za trenutnu verziju odgovora već postoji, posao je odmah
+    gotov; ako se isti izvoz već pravi, vraća se taj posao umesto novog.
+    """
+    version = form.answers_version
+    path = artifact_path(form.id, fmt, version)
+    with _lock:
+        _forget_old_jobs()
+        for job in _jobs.values():
+            if (job.form_id, job.format, job.answers_version) == (form.id, fmt, version) \
+                    and job.status in ("queued", "running"):
+                return job
+        job = ExportJob(id=uuid.uuid4().hex, form_id=form.id, format=fmt, answers_version=version)
+        _jobs[job.id] = job
+        if os.path.exists(path):
+            os.utime(path)
+            job.status, job.path = "done", path
+            return job
+    _pool().submit(_run, job, db.get_bind())
+    return job
+
+
+def get(job_id: str) -> Optional[ExportJob]:
+    job = _jobs.get(job_id)
+    if job is not None and job.status == "done" and not os.path.exists(job.path):
+        job.status = "expired"
+    return job
+
+
+def _run(job: ExportJob, bind):
+    build = EXPORT_FORMATS[job.format][0]
+    job.status = "running"
+    db = Session(bind=bind)
+    tmp_path = None
+    try:
+        # verzija se čita pre izvoza: ako u međuvremenu stignu novi odgovori, fajl će nositi
+        # stariju verziju i sledeći zahtev će napraviti novi
+        version = db.query(FormModel.answers_version).filter(FormModel.id == job.form_id).scalar()
+        if version is None:
+            raise LookupError("Forma ne postoji.")
+        path = artifact_path(job.form_id, job.format, version)
+        os.makedirs(EXPORT_STORE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=EXPORT_STORE_DIR, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            build(db, job.form_id, f)
+        os.replace(tmp_path, path)
+        tmp_path = None
+        job.answers_version, job.path, job.status = version, path, "done"
+        _drop_stale_versions(job.form_id, job.format, version)
+        evict()
+    except Exception as exc:
+        job.status, job.error = "failed", str(exc)
+    finally:
+        db.close()
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _drop_stale_versions(form_id: int, fmt: str, version: int):
+    # fajlovi starijih verzija iste forme i formata se više nikad ne koriste
+    ext = "." + EXPORT_FORMATS[fmt][2]
+    prefix = _artifact_prefix(form_id)
+    keep = os.path.basename(artifact_path(form_id, fmt, version))
+    for name in os.listdir(EXPORT_STORE_DIR):
+        if name.startswith(prefix) and name.endswith(ext) and name != keep:
+            _remove(os.path.join(EXPORT_STORE_DIR, name))
+
+
+def drop_form(form_id: int):
+    if not os.path.isdir(EXPORT_STORE_DIR):
+        return
+    prefix = _artifact_prefix(form_id)
+    for name in os.listdir(EXPORT_STORE_DIR):
+        if name.startswith(prefix):
+            _remove(os.path.join(EXPORT_STORE_DIR, name))
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def evict(max_bytes: int = None, max_age: int = None):
+    """Briše fajlove starije od max_age sekundi, pa najdavnije korišćene dok zbir ne padne ispod max_bytes."""
+    max_bytes = EXPORT_STORE_MAX_BYTES if max_bytes is None else max_bytes
+    max_age = EXPORT_STORE_MAX_AGE if max_age is None else max_age
+    if not os.path.isdir(EXPORT_STORE_DIR):
+        return
+    now = time.time()
+    files = []
+    for entry in os.scandir(EXPORT_STORE_DIR):
+        if not entry.is_file() or entry.name.endswith(".part"):
+            continue
+        st = entry.stat()
+        if now - st.st_mtime > max_age:
+            _remove(entry.path)
+        else:
+            files.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+
+def _forget_old_jobs():
+    cutoff = time.time() - EXPORT_STORE_MAX_AGE
+    for job_id in [j.id for j in _jobs.values() if j.created_at < cutoff and j.status not in ("queued", "running")]:
+        del _jobs[job_id]
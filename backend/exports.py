@@ -0,0 +1,311 @@
+import csv
+import gzip
+import io
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import BinaryIO, Iterator
+
+from openpyxl import Workbook
+from sqlalchemy import DateTime, Float, Integer, String, column, text
+from sqlalchemy.orm import Session, selectinload
+
+from analytics import cached_form_analytics
+from models import FormModel, QuestionModel
+from partitions import pruning_clause
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+GZIP_MEDIA_TYPE = "application/gzip"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# broj redova koji se odjednom povlači sa server-side kursora
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+# Parquet pravi jednu row group po paketu, pa su paketi veći (memorija je ograničena ovom veličinom)
+PARQUET_BATCH_SIZE = int(os.getenv("PARQUET_BATCH_SIZE", "50000"))
+# koliko delova (chunk-ova) sme da čeka između generatora fajla i klijenta
+EXPORT_QUEUE_CHUNKS = 16
+EXPORT_CHUNK_SIZE = 64 * 1024
+# nivo 6 je dobar kompromis brzine i veličine; 1 ako je procesor usko grlo
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+ANSWER_COLUMNS = ["submission_id", "question_id", "question", "answer", "user_email", "submitted_at"]
+
+_ANSWER_ROWS = """
+    SELECT a.submission_id, q.id AS qid, q.text AS qtext, q.type AS qtype, a.value AS answer_value,
+           a.value_num AS answer_number, u.email AS user_email, a.submitted_at
+    FROM answers a
+    JOIN questions q ON q.id = a.question_id
+    LEFT JOIN users u ON u.id = a.user_id
+    WHERE q.form_id = :fid{prune}
+    ORDER BY a.submitted_at ASC, a.id ASC
+"""
+_ANSWER_ROW_COLUMNS = (
+    column("submission_id", Integer),
+    column("qid", Integer),
+    column("qtext", String),
+    column("qtype", String),
+    column("answer_value", String),
+    column("answer_number", Float),
+    column("user_email", String),
+    column("submitted_at", DateTime(timezone=True)),
+)
+
+
+def answer_rows_sql(prune: str = ""):
+    """Upit za redove odgovora; prune je uslov iz partitions.pruning_clause (prazan van Postgres particija)."""
+    return text(_ANSWER_ROWS.format(prune=prune)).columns(*_ANSWER_ROW_COLUMNS)
+
+
+ANSWER_ROWS_SQL = answer_rows_sql()
+
+
+def iter_answer_batches(db: Session, form_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+    """Paketi redova odgovora preko server-side kursora (stream_results), po batch_size redova."""
+    prune, params = pruning_clause(db, form_id)
+    stmt = answer_rows_sql(prune) if prune else ANSWER_ROWS_SQL
+    result = db.execute(
+        stmt.execution_options(stream_results=True, yield_per=batch_size),
+        {"fid": form_id, **params},
+    )
+    yield from result.partitions()
+
+
+def iter_answer_rows(db: Session, form_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+    for partition in iter_answer_batches(db, form_id, batch_size):
+        yield from partition
+
+
+def _isoformat(dt):
+    if isinstance(dt, datetime):
+        return dt.isoformat()
+    return dt
+
+
+def _naive(dt):
+    # Excel ne podržava datume sa vremenskom zonom
+    if isinstance(dt, datetime):
+        return dt.replace(tzinfo=None)
+    return dt
+
+
+def _analytics_rows(analytics: list):
+    for item in analytics:
+        qt, qid, qtype = item["text"], item["question_id"], item["type"]
+
+        if "distribution" in item:
+            for d in item["distribution"]:
+                yield [qid, qt, qtype, "option",
+                       f'{d.get("option_text")}', f'count={d["count"]}, percent={d["percent"]}%']
+            yield [qid, qt, qtype, "total_answers", item.get("total_answers", 0), ""]
+            if "total_selections" in item:
+                yield [qid, qt, qtype, "total_selections", item["total_selections"], ""]
+        elif qtype in ("number", "numeric"):
+            yield [qid, qt, qtype, "count", item.get("count", 0), ""]
+            if "min" in item:
+                yield [qid, qt, qtype, "min", item["min"], ""]
+                yield [qid, qt, qtype, "avg", item["avg"], ""]
+                yield [qid, qt, qtype, "max", item["max"], ""]
+            for h in item.get("histogram", []):
+                yield [qid, qt, qtype, "hist", f'value={h["value"]}', f'count={h["count"]}']
+        elif qtype in ("date", "time"):
+            yield [qid, qt, qtype, "count", item.get("count", 0), ""]
+            for v in item.get("by_value", []):
+                yield [qid, qt, qtype, "value", v["value"], f'count={v["count"]}']
+        else:
+            yield [qid, qt, qtype, "count", item.get("count", 0), ""]
+
+
+def write_xlsx(db: Session, form_id: int, fileobj: BinaryIO):
+    """
+    Izvoz u write-only radnu svesku: redovi idu direktno u privremene fajlove openpyxl-a,
+    pa memorija ne raste sa brojem odgovora. Fajl može biti i tok bez seek-a.
+    """
+    form = db.query(FormModel).filter(FormModel.id == form_id).first()
+    questions = (
+        db.query(QuestionModel)
+        .options(selectinload(QuestionModel.options))
+        .filter(QuestionModel.form_id == form_id)
+        .order_by(QuestionModel.id)
+        .all()
+    )
+
+    wb = Workbook(write_only=True)
+    ws_q = wb.create_sheet("Questions")
+    ws_q.append(["Question ID", "Text", "Type", "Required", "Order", "Max choices", "Options"])
+    for q in questions:
+        opts = " | ".join([o.text for o in q.options]) if q.options else ""
+        ws_q.append([q.id, q.text, q.type, bool(q.is_required), q.order, q.max_choices, opts])
+
+    ws_a = wb.create_sheet("Answers")
+    ws_a.append(["Question ID", "Question", "Answer", "User email", "Submitted at", "Submission ID"])
+    for r in iter_answer_rows(db, form_id):
+        ws_a.append([r.qid, r.qtext, r.answer_value, (r.user_email or "anonimo"), _naive(r.submitted_at),
+                     r.submission_id])
+
+    ws_an = wb.create_sheet("Analytics")
+    ws_an.append(["Question ID", "Text", "Type", "Metric", "Value", "Extra"])
+    for row in _analytics_rows(cached_form_analytics(db, form)):
+        ws_an.append(row)
+
+    wb.save(fileobj)
+
+
+def write_csv(db: Session, form_id: int, fileobj: BinaryIO):
+    """Odgovori kao CSV (UTF-8, zaglavlje u prvom redu); svaki paket se kodira i upisuje odjednom."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(ANSWER_COLUMNS)
+    for batch in iter_answer_batches(db, form_id):
+        writer.writerows(
+            (r.submission_id, r.qid, r.qtext, r.answer_value, r.user_email, _isoformat(r.submitted_at))
+            for r in batch
+        )
+        fileobj.write(buf.getvalue().encode("utf-8"))
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        fileobj.write(buf.getvalue().encode("utf-8"))
+
+
+def write_ndjson(db: Session, form_id: int, fileobj: BinaryIO):
+    """Odgovori kao NDJSON: jedan JSON objekat po redu, sa istim ključevima kao CSV kolone."""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for batch in iter_answer_batches(db, form_id):
+        lines = [
+            dumps(dict(zip(ANSWER_COLUMNS, (r.submission_id, r.qid, r.qtext, r.answer_value, r.user_email,
+                                           _isoformat(r.submitted_at)))))
+            for r in batch
+        ]
+        lines.append("")
+        fileobj.write("\n".join(lines).encode("utf-8"))
+
+
+def write_parquet(db: Session, form_id: int, fileobj: BinaryIO):
+    """
+    Odgovori kao Parquet sa tipiziranim kolonama; svaki paket sa kursora postaje jedna row group.
+    answer_number je answers.value_num: broj za numerička pitanja i vrednost izabrane numeric_choice opcije.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("submission_id", pa.int64()),
+        ("question_id", pa.int64()),
+        ("question", pa.string()),
+        ("question_type", pa.string()),
+        ("answer", pa.string()),
+        ("answer_number", pa.float64()),
+        ("user_email", pa.string()),
+        ("submitted_at", pa.timestamp("us", tz="UTC")),
+    ])
+    with pq.ParquetWriter(fileobj, schema, compression="snappy") as writer:
+        for batch in iter_answer_batches(db, form_id, PARQUET_BATCH_SIZE):
+            writer.write_batch(pa.RecordBatch.from_arrays([
+                pa.array([r.submission_id for r in batch], pa.int64()),
+                pa.array([r.qid for r in batch], pa.int64()),
+                pa.array([r.qtext for r in batch], pa.string()),
+                pa.array([r.qtype for r in batch], pa.string()),
+                pa.array([r.answer_value for r in batch], pa.string()),
+                pa.array([r.answer_number for r in batch], pa.float64()),
+                pa.array([r.user_email for r in batch], pa.string()),
+                pa.array([r.submitted_at for r in batch], pa.timestamp("us", tz="UTC")),
+            ], schema=schema))
+
+
+def gzipped(build):
+    """Omotava build funkciju tako da se izlaz kompresuje u letu (gzip format, nivo EXPORT_GZIP_LEVEL)."""
+    def _build(db: Session, form_id: int, fileobj: BinaryIO):
+        with gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=EXPORT_GZIP_LEVEL) as gz:
+            build(db, form_id, gz)
+    return _build
+
+
+# format -> (build funkcija, media type, ekstenzija fajla)
+EXPORT_FORMATS = {
+    "xlsx": (write_xlsx, XLSX_MEDIA_TYPE, "xlsx"),
+    "csv": (write_csv, CSV_MEDIA_TYPE, "csv"),
+    "ndjson": (write_ndjson, NDJSON_MEDIA_TYPE, "ndjson"),
+    "parquet": (write_parquet, PARQUET_MEDIA_TYPE, "parquet"),
+}
+
+
+class _QueueWriter:
+    """Fajl samo za pisanje koji prosleđuje bajtove generatoru odgovora kroz ograničen red."""
+
+    def __init__(self, q: "queue.Queue", cancelled: threading.Event):
+        self._q = q
+        self._cancelled = cancelled
+        self._buf = bytearray()
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        if self._cancelled.is_set():
+            raise IOError("export cancelled by client")
+        self._buf += data
+        self._pos += len(data)
+        if len(self._buf) >= EXPORT_CHUNK_SIZE:
+            self._q.put(bytes(self._buf))
+            self._buf.clear()
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._buf:
+            self._q.put(bytes(self._buf))
+            self._buf.clear()
+
+
+_DONE = object()
+
+
+def stream_file(bind, build, form_id: int) -> Iterator[bytes]:
+    """
+    Pokreće build(db, form_id, fileobj) u posebnoj niti sa sopstvenom sesijom i vraća bajtove
+    čim ih build zapiše. Ako klijent prekine vezu, build se prekida pri sledećem upisu.
+    """
+    chunks: "queue.Queue" = queue.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+    cancelled = threading.Event()
+    errors = []
+
+    def _produce():
+        db = Session(bind=bind)
+        try:
+            writer = _QueueWriter(chunks, cancelled)
+            build(db, form_id, writer)
+            writer.close()
+        except BaseException as exc:
+            errors.append(exc)
+        finally:
+            db.close()
+            chunks.put(_DONE)
+
+    worker = threading.Thread(target=_produce, name=f"export-form-{form_id}", daemon=True)
+    worker.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is _DONE:
+                break
+            yield chunk
+        if errors and not cancelled.is_set():
+            raise errors[0]
+    finally:
+        cancelled.set()
+        while worker.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
@@ -1,24 +1,39 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, text, or_
-from sqlalchemy.orm import relationship, Session, joinedload
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Boolean, text, or_, and_, case, literal, insert, select, union, tuple_, bindparam
+from sqlalchemy.orm import relationship, Session, joinedload, aliased
 from database import Base
 from pydantic import BaseModel
 from fastapi import FastAPI, HTTPException, Depends, APIRouter, UploadFile, File, Form, Request, Query, Header
-from fastapi.responses import JSONResponse, StreamingResponse, Response
+from fastapi.responses import JSONResponse, StreamingResponse, Response, FileResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.datastructures import UploadFile
-from io import BytesIO
-from statistics import mean
-from openpyxl import Workbook
 from form_db_circl_fix import get_db
 from form_cur_user_circl_fix import get_current_user, get_current_user_optional
 from schemas import QuestionCreate, QuestionCreateMultipart, OptionWithImage
-from models import QuestionModel, OptionModel, UserModel,AnswerModel, FormModel, CollaboratorModel
-from schemas import FormOut, FormCreate, AnswerSubmission, FormUpdate, QuestionUpdate, CollaboratorIn, CollaboratorOut, FormWithMeta, CollaboratorUpdate, CollaboratorRemove
+from models import QuestionModel, OptionModel, UserModel,AnswerModel, AnswerSelectionModel, FormModel, CollaboratorModel, SubmissionModel
+from schemas import FormOut, FormCreate, AnswerSubmission, AnswerBatch, FormUpdate, QuestionUpdate, CollaboratorIn, CollaboratorOut, FormWithMeta, CollaboratorUpdate, CollaboratorRemove, PublicFormOut
+from schemas import ExportJobCreate, ExportJobOut
 from typing import Optional, List, Tuple
 import json, os, uuid, shutil
 from uuid import uuid4
 import mimetypes
 from cloudinary_utils import upload_to_cloudinary
+from analytics import analytics_cache, cached_form_analytics
+from cache_utils import etag_matches
+from exports import (
+    CSV_MEDIA_TYPE, GZIP_MEDIA_TYPE, NDJSON_MEDIA_TYPE, PARQUET_MEDIA_TYPE, XLSX_MEDIA_TYPE,
+    gzipped, stream_file, write_csv, write_ndjson, write_parquet, write_xlsx,
+)
+import answer_types
+import form_definitions
+import fulltext
+import permissions
+import rollups
+import export_jobs
+from validation import form_validator
+from idempotency import IdempotentRequest
+from pagination import NEXT_CURSOR_HEADER, PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT, decode_cursor, set_next_cursor, split_page
+from partitions import pruning_clause, range_pruning_clause
+from ingest import QueueClosed, QueueFull, bump_answers_version, ingest_queue, persist_submissions, queue_mode
 
 router = APIRouter()
 
@@ -41,16 +56,12 @@ def _actor_role_for_form(
     
     actor = current_user
     role = "viewer"
-    if actor:
-        if actor.id == form.owner_id:
+    access = permissions.resolve(db, form.id, actor) if actor else None
+    if access:
+        if access.is_owner:
             role = "owner"
-        else:
-            collab = db.query(CollaboratorModel).filter(
-                CollaboratorModel.form_id == form.id,
-                CollaboratorModel.user_id == actor.id,
-            ).first()
-            if collab:
-                role = "editor" if (collab.role or "").lower() == "editor" else "viewer"
+        elif access.is_editor:
+            role = "editor"
 
     return actor, role, False
 
@@ -101,24 +112,16 @@ def resolve_actor_for_impersonation(
 
     return target, True
 
-def _collab_role(db: Session, form_id: int, user_id: int) -> Optional[str]:
-    row = db.query(CollaboratorModel.role).filter(
-        CollaboratorModel.form_id == form_id,
-        CollaboratorModel.user_id == user_id
-    ).first()
-    return row[0] if row else None
-
 def _role_and_caps(db: Session, form: FormModel, user: Optional[UserModel]):
     role = None
     can_edit = False
     if user:
+        access = permissions.resolve(db, form.id, user)
         if form.owner_id == user.id:
             role, can_edit = "owner", True
-        else:
-            r = _collab_role(db, form.id, user.id)
-            if r:
-                role = r                     
-                can_edit = (r == "editor")
+        elif access and access.collab_role:
+            role = access.collab_role
+            can_edit = (access.collab_role == "editor")
     return role, {"can_edit": can_edit}
 
 def _can_edit(form: FormModel, user: Optional[UserModel], db: Session) -> bool:
@@ -126,37 +129,19 @@ def _can_edit(form: FormModel, user: Optional[UserModel], db: Session) -> bool:
         return False
     if form.owner_id == user.id:
         return True
-    return _collab_role(db, form.id, user.id) == "editor"
+    access = permissions.resolve(db, form.id, user)
+    return bool(access and access.collab_role == "editor")
 
 def _can_view_form(db: Session, form: FormModel, user: Optional[UserModel]) -> bool:
-    if form.is_public:
-        return True
-    if is_superadmin(user):
+    if form.is_public or is_superadmin(user):
         return True
     if not user:
         return False
-    if user.id == form.owner_id:
-        return True
-    collab = db.query(CollaboratorModel).filter(
-        CollaboratorModel.form_id == form.id,
-        CollaboratorModel.user_id == user.id,
-    ).first()
-    return collab is not None
+    access = permissions.resolve(db, form.id, user)
+    return bool(access and access.can_view)
 
 def _can_view_results(form: FormModel, user: Optional[UserModel], db: Session) -> bool:
-    if is_superadmin(user):
-        return True
-    if form.is_public:
-        return True
-    if not user:
-        return False
-    if user.id == form.owner_id:
-        return True
-    collab = db.query(CollaboratorModel).filter(
-        CollaboratorModel.form_id == form.id,
-        CollaboratorModel.user_id == user.id,
-    ).first()
-    return collab is not None
+    return _can_view_form(db, form, user)
 
 
 def _can_view_collaborators(db: Session, form: FormModel, user: Optional[UserModel]) -> bool:
@@ -166,11 +151,8 @@ def _can_view_collaborators(db: Session, form: FormModel, user: Optional[UserMod
         return False
     if user.id == form.owner_id:
         return True
-    collab = db.query(CollaboratorModel).filter(
-        CollaboratorModel.form_id == form.id,
-        CollaboratorModel.user_id == user.id
-    ).first()
-    return bool(collab and (collab.role or "").lower() == "editor")
+    access = permissions.resolve(db, form.id, user)
+    return bool(access and access.is_editor)
 
 def _ensure_can_manage_collaborators(db: Session, form: FormModel, user: Optional[UserModel]):
     if is_superadmin(user):
@@ -228,126 +210,33 @@ def _normalize_numeric_choice_options(payload: "QuestionCreate") -> list[dict]:
 
     raise HTTPException(400, "numeric_choice requires options OR numeric_values OR numeric_scale")
 
+def _bump_schema_version(db: Session, form_id: int):
+    # menja se uz svaku izmenu forme, pitanja ili opcija; ključ keša validatora i definicije forme
+    db.query(FormModel).filter(FormModel.id == form_id).update(
+        {FormModel.schema_version: FormModel.schema_version + 1}, synchronize_session=False
+    )
+
+def _analytics_etag(form: FormModel) -> str:
+    return f'"analytics-{form.id}-{form.answers_version or 0}"'
+
 def _build_analytics_for_form(db: Session, form: FormModel):
-    result = []
-    for q in form.questions:
-        q_summary = {"question_id": q.id, "text": q.text, "type": q.type}
-        answers = db.query(AnswerModel).filter(AnswerModel.question_id == q.id).all()
-        total = len(answers)
-
-        opt_by_id = {o.id: o for o in q.options}
-        opt_by_text = { (o.text or "").strip().lower(): o for o in q.options }
-
-        if q.type in ("radio","single_choice"):
-            counts = {o.id: 0 for o in q.options}
-            other = 0
-            for a in answers:
-                val = (a.value or "").strip()
-                hit = False
-                try:
-                    oid = int(val)
-                    if oid in counts:
-                        counts[oid] += 1
-                        hit = True
-                except:
-                    pass
-                if not hit and val:
-                    o = opt_by_text.get(val.lower())
-                    if o:
-                        counts[o.id] += 1
-                        hit = True
-                if not hit:
-                    other += 1
-            items = []
-            for oid, cnt in counts.items():
-                pct = (cnt/total*100.0) if total else 0.0
-                items.append({
-                    "option_id": oid,
-                    "option_text": opt_by_id[oid].text,
-                    "count": cnt,
-                    "percent": round(pct, 2)
-                })
-            if other:
-                items.append({"option_id": None, "option_text": "_other", "count": other, "percent": round(other/total*100.0, 2)})
-            q_summary["distribution"] = items
-            q_summary["total_answers"] = total
-
-        elif q.type in ("checkbox","multiple_choice"):
-            counts = {o.id: 0 for o in q.options}
-            other = 0
-            total_selections = 0
-            for a in answers:
-                tokens = [t.strip() for t in (a.value or "").split(",") if t.strip()]
-                for tok in tokens:
-                    total_selections += 1
-                    hit = False
-                    try:
-                        oid = int(tok)
-                        if oid in counts:
-                            counts[oid] += 1
-                            hit = True
-                    except:
-                        pass
-                    if not hit:
-                        o = opt_by_text.get(tok.lower())
-                        if o:
-                            counts[o.id] += 1
-                            hit = True
-                    if not hit:
-                        other += 1
-            items = []
-            denom = total_selections if total_selections else 1
-            for oid, cnt in counts.items():
-                pct = (cnt/denom*100.0)
-                items.append({
-                    "option_id": oid,
-                    "option_text": opt_by_id[oid].text,
-                    "count": cnt,
-                    "percent": round(pct, 2)
-                })
-            if other:
-                items.append({"option_id": None, "option_text": "_other", "count": other, "percent": round(other/denom*100.0, 2)})
-            q_summary["distribution"] = items
-            q_summary["total_answers"] = total
-            q_summary["total_selections"] = total_selections
-
-        elif q.type in ("number","numeric"):
-            nums = []
-            freq = {}
-            for a in answers:
-                try:
-                    x = float(a.value)
-                    nums.append(x)
-                    freq[a.value] = freq.get(a.value, 0) + 1
-                except:
-                    pass
-            q_summary["count"] = len(nums)
-            if nums:
-                q_summary["min"] = min(nums)
-                q_summary["avg"] = round(mean(nums), 4)
-                q_summary["max"] = max(nums)
-            q_summary["histogram"] = [{"value": k, "count": v} for k, v in sorted(freq.items(), key=lambda kv: float(kv[0]))]
-
-        elif q.type in ("date","time"):
-            freq = {}
-            for a in answers:
-                v = (a.value or "").strip()
-                if v:
-                    freq[v] = freq.get(v, 0) + 1
-            q_summary["count"] = total
-            q_summary["by_value"] = [{"value": k, "count": v} for k, v in sorted(freq.items())]
-
-        else:
-            q_summary["count"] = total
-
-        result.append(q_summary)
-    return result
+    return cached_form_analytics(db, form)
 
 
 
 
 @router.post("/api/forms")
-def create_form(data: FormCreate, db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
+def create_form(
+    data: FormCreate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    idem = IdempotentRequest(db, idempotency_key, f"create_form:{current_user.id}", data.model_dump())
+    replay = idem.replay()
+    if replay:
+        return replay
+
     new_form = FormModel(
         name=data.name,
         description=data.description,
@@ -357,88 +246,122 @@ def create_form(data: FormCreate, db: Session = Depends(get_db), current_user: U
 
     )
     db.add(new_form)
-    db.commit()
-    db.refresh(new_form)
-    return {"id": new_form.id, "message": "Form created successfully"}
+    db.flush()
+    result = idem.commit({"id": new_form.id, "message": "Form created successfully"})
+    if data.is_public:
+        form_definitions.public_cache.clear()
+    return result
+
+
+def _listing_rows(db: Session, user_id: int, owned_only: bool, after_id: Optional[int] = None, limit: Optional[int] = None):
+    """
+    Forme korisnika sa ulogom i can_edit izračunatim u SQL-u (ista pravila kao _role_and_caps):
+    jedan upit forms LEFT JOIN collaborators, bez obzira na broj formi. Sa limit se čita jedna
+    strana posle after_id; id-jevi kandidata se uzimaju iz indeksa (owner_id, id) i
+    (user_id, form_id), pa strana ne zavisi od veličine tabele forms.
+    """
+    collab = aliased(CollaboratorModel)
+    is_owner = FormModel.owner_id == user_id
+    my_role = case((is_owner, literal("owner")), else_=collab.role)
+    can_edit = case((is_owner, True), (collab.role == "editor", True), else_=False)
+    q = (
+        db.query(FormModel.id, FormModel.name, FormModel.description, FormModel.is_public,
+                 my_role.label("my_role"), can_edit.label("can_edit"))
+        .outerjoin(collab, and_(collab.form_id == FormModel.id, collab.user_id == user_id))
+    )
+    after_id = after_id or 0
+    if owned_only:
+        q = q.filter(is_owner, FormModel.id > after_id)
+    else:
+        owned_ids = select(FormModel.id).where(is_owner, FormModel.id > after_id).order_by(FormModel.id)
+        shared_ids = (
+            select(CollaboratorModel.form_id)
+            .where(CollaboratorModel.user_id == user_id, CollaboratorModel.form_id > after_id)
+            .order_by(CollaboratorModel.form_id)
+        )
+        if limit is not None:
+            owned_ids, shared_ids = owned_ids.limit(limit), shared_ids.limit(limit)
+        q = q.filter(FormModel.id.in_(union(
+            select(owned_ids.subquery().c[0]), select(shared_ids.subquery().c[0])
+        )))
+    q = q.order_by(FormModel.id)
+    if limit is not None:
+        q = q.limit(limit)
+    return q.all()
+
+
+def _listing_item(row) -> dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "description": row.description,
+        "is_public": row.is_public,
+        "questions": None,
+        "my_role": row.my_role,
+        "capabilities": {"can_edit": bool(row.can_edit)},
+    }
+
+
+def _forms_page(db: Session, user_id: int, owned_only: bool, cursor: Optional[str], limit: int, response: Response):
+    after = decode_cursor(cursor, int)
+    rows = _listing_rows(db, user_id, owned_only, after_id=after[0] if after else None, limit=limit + 1)
+    rows, next_cursor = split_page(rows, limit, lambda r: (r.id,))
+    set_next_cursor(response, next_cursor)
+    return rows
 
 
 @router.get("/api/forms/owned", response_model=List[FormWithMeta])
 def get_owned_forms(
+    response: Response,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user)
 ):
-    forms = db.query(FormModel).filter(FormModel.owner_id == current_user.id).all()
-    out = []
-    for f in forms:
-        role, caps = _role_and_caps(db, f, current_user) 
-        out.append({
-            "id": f.id,
-            "name": f.name,
-            "description": f.description,
-            "is_public": f.is_public,
-            "questions": None,
-            "my_role": role,
-            "capabilities": caps
-        })
-    return out
+    return [_listing_item(r) for r in _forms_page(db, current_user.id, True, cursor, limit, response)]
 
 
-@router.get("/api/forms/public", response_model=List[FormOut])
-def get_public_forms(db: Session = Depends(get_db)):
-    forms = db.query(FormModel).filter(FormModel.is_public == True).all()
-    return forms
+@router.get("/api/forms/public", response_model=List[PublicFormOut])
+def get_public_forms(
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    include: Optional[str] = Query(None, pattern="^questions$"),
+    db: Session = Depends(get_db),
+):
+    after = decode_cursor(cursor, int)
+    body, next_cursor = form_definitions.public_listing(
+        db, after[0] if after else None, limit, include_questions=include == "questions"
+    )
+    response = Response(content=body, media_type="application/json")
+    set_next_cursor(response, next_cursor)
+    return response
 
 
 
 @router.get("/api/forms/mine", response_model=List[FormWithMeta])
 def get_my_forms(
+    response: Response,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user)
 ):
-    owner_q = db.query(FormModel).filter(FormModel.owner_id == current_user.id)
-
-    collab_form_ids = db.query(CollaboratorModel.form_id).filter(
-        CollaboratorModel.user_id == current_user.id
-    )
-    collab_q = db.query(FormModel).filter(FormModel.id.in_(collab_form_ids))
-
-    forms = owner_q.union_all(collab_q).all()
-
-    out: List[dict] = []
-    for f in forms:
-        role, caps = _role_and_caps(db, f, current_user)
-        out.append({
-            "id": f.id,
-            "name": f.name,
-            "description": f.description,
-            "is_public": f.is_public,
-            "questions": None,      
-            "my_role": role,
-            "capabilities": caps
-        })
-    return out
+    return [_listing_item(r) for r in _forms_page(db, current_user.id, False, cursor, limit, response)]
 
 @router.get("/api/users/{user_id}/forms")
 def list_user_forms(
     user_id: int,
+    response: Response,
     include_collab: bool = Query(False),
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
 ):
     if not (current_user.is_superadmin or current_user.id == user_id):
         raise HTTPException(status_code=403, detail="Nemaš dozvolu za pristup formama ovog korisnika.")
 
-    forms = db.query(FormModel).filter(FormModel.owner_id == user_id).all()
-
-    if include_collab:
-        collab_ids = db.query(CollaboratorModel.form_id).filter(CollaboratorModel.user_id == user_id)
-        collab_forms = db.query(FormModel).filter(FormModel.id.in_(collab_ids)).all()
-        
-        by_id = {f.id: f for f in forms}
-        for f in collab_forms:
-            by_id.setdefault(f.id, f)
-        forms = list(by_id.values())
-
+    forms = _forms_page(db, user_id, not include_collab, cursor, limit, response)
     return [
         {
             "id": f.id,
@@ -449,6 +372,28 @@ def list_user_forms(
         for f in forms
     ]
 
+
+@router.get("/api/search")
+def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str = Query("forms", pattern="^(forms|questions|answers)$"),
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Optional[UserModel] = Depends(get_current_user_optional),
+):
+    """Pretraga formi, pitanja ili tekstualnih odgovora (kind), najnoviji prvi; vidi fulltext.py."""
+    if kind == "answers" and current_user is None:
+        # kao i GET /api/forms/{id}/answers: odgovori samo za prijavljene
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    after = decode_cursor(cursor, int)
+    hits = fulltext.search(db, q, kind, current_user, after[0] if after else None, limit)
+    hits, next_cursor = split_page(hits, limit, lambda h: (h["id"],))
+    set_next_cursor(response, next_cursor)
+    return hits
+
+
 @router.post("/api/forms/{form_id}/questions")
 def add_question(
     form_id: int,
@@ -464,6 +409,7 @@ def add_question(
     option_images: List[UploadFile] = File([]),
     as_user: Optional[int] = Query(None),
     x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user)
 ):
@@ -475,6 +421,16 @@ def add_question(
     actor, _ = resolve_actor_for_impersonation(db, current_user, as_user, x_impersonate_user)
     _ensure_can_edit_form(db, form, current_user, as_user, x_impersonate_user, owner_only=False)
 
+    # ponovljen zahtev ne sme ponovo da šalje slike na Cloudinary niti da pravi pitanje
+    idem = IdempotentRequest(db, idempotency_key, f"add_question:{form_id}:{current_user.id}", {
+        "text": text, "type": type, "is_required": is_required, "order": order, "max_choices": max_choices,
+        "options": options, "numeric_scale": numeric_scale, "as_user": as_user or x_impersonate_user,
+        "image": image.filename if image else None, "option_images": [f.filename for f in option_images],
+    })
+    replay = idem.replay()
+    if replay:
+        return replay
+
     
     type_alias = {"radio": "single_choice", "checkbox": "multiple_choice"}
     qtype = type_alias.get(type, type)
@@ -513,8 +469,8 @@ def add_question(
         image_url=image_url
     )
     db.add(new_question)
-    db.commit()
-    db.refresh(new_question)
+    db.flush()
+    rollups.create_empty(db, new_question.id)
 
     
     def _gen_numeric_series(start: float, end: float, step: float) -> list[float]:
@@ -594,85 +550,57 @@ def add_question(
                     question_id=new_question.id,
                     image_url=opt_image_url
                 ))
-            db.commit()
 
-    return {"id": new_question.id, "message": "Question created"}
+    _bump_schema_version(db, form_id)
+    bump_answers_version(db, form_id)
+    return idem.commit({"id": new_question.id, "message": "Question created"})
 
 
 
 
-@router.get("/api/forms/{form_id}", response_model=FormOut)
+def _form_role(access: permissions.FormAccess) -> str:
+    # ista pravila kao _actor_role_for_form, bez dodatnog upita
+    if access.is_superadmin:
+        return "superadmin"
+    if access.is_owner:
+        return "owner"
+    if access.is_editor:
+        return "editor"
+    return "viewer"
+
+
+@router.get("/api/forms/{form_id}", response_model=FormWithMeta)
 def get_form_by_id(
     form_id: int,
     db: Session = Depends(get_db),
     current_user: Optional[UserModel] = Depends(get_current_user_optional),
     as_user: Optional[int] = Query(None),
     x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
 ):
-    form = (
-        db.query(FormModel)
-        .options(joinedload(FormModel.questions).joinedload(QuestionModel.options))
-        .filter(FormModel.id == form_id)
-        .first()
-    )
-    if not form:
+    # jedan upit: vlasnik, javnost, uloga saradnika i verzija definicije
+    access = permissions.resolve(db, form_id, current_user)
+    if access is None:
         raise HTTPException(status_code=404, detail="Form not found")
-
-    if not _can_view_form(db, form, current_user):
+    if not access.can_view:
         raise HTTPException(status_code=403, detail="Access denied to private form")
 
-    if is_superadmin(current_user):
-        role = "superadmin"
-        can_edit = True
-    else:
-        if current_user and current_user.id == form.owner_id:
-            role = "owner"
-            can_edit = True
-        else:
-            collab = (
-                db.query(CollaboratorModel)
-                .filter(
-                    CollaboratorModel.form_id == form_id,
-                    CollaboratorModel.user_id == (current_user.id if current_user else -1),
-                )
-                .first()
-            )
-            if collab:
-                role = "editor" if (collab.role or "").lower() == "editor" else "viewer"
-                can_edit = (role == "editor")
-            else:
-                role = "viewer"
-                can_edit = False
-
-    converted_questions = []
-    for q in form.questions:
-        converted_options = [
-            {"id": opt.id, "text": opt.text, "image_url": opt.image_url or None}
-            for opt in q.options
-        ]
-        converted_questions.append(
-            {
-                "id": q.id,
-                "text": q.text,
-                "type": q.type,
-                "is_required": q.is_required,
-                "order": q.order,
-                "max_choices": q.max_choices,
-                "image_url": q.image_url or None,
-                "options": converted_options,
-            }
-        )
-
-    return {
-        "id": form.id,
-        "name": form.name,
-        "description": form.description,
-        "is_public": form.is_public,
-        "is_locked": form.is_locked,
-        "questions": converted_questions,
-        "my_role": role,
-        "capabilities": {"can_edit": can_edit},
+    role = _form_role(access)
+    headers = {
+        "ETag": form_definitions.etag(form_id, access.schema_version, role),
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
     }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    cached = form_definitions.definition(db, form_id, access.schema_version)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Form not found")
+    body, version = cached
+    headers["ETag"] = form_definitions.etag(form_id, version, role)
+    meta = {"my_role": role, "capabilities": {"can_edit": role in ("superadmin", "owner", "editor")}}
+    return Response(content=form_definitions.with_meta(body, meta), media_type="application/json", headers=headers)
 
 @router.delete("/api/forms/{form_id}", status_code=200)
 def delete_form(
@@ -691,22 +619,33 @@ def delete_form(
 
     db.query(CollaboratorModel).filter(CollaboratorModel.form_id == form_id).delete(synchronize_session=False)
 
+    rollups.drop_form(db, form_id)
+    prune, prune_params = pruning_clause(db, form_id, alias="answers")
+    form_answers = "SELECT id FROM answers WHERE question_id IN (SELECT id FROM questions WHERE form_id=:fid)" + prune
+    # eksplicitno: SQLite bez PRAGMA foreign_keys ne izvršava ON DELETE CASCADE
     db.execute(
-        text("DELETE FROM answers WHERE question_id IN (SELECT id FROM questions WHERE form_id=:fid)"),
-        {"fid": form_id},
+        text(f"DELETE FROM answer_selections WHERE answer_id IN ({form_answers})"),
+        {"fid": form_id, **prune_params},
     )
+    db.execute(
+        text("DELETE FROM answers WHERE question_id IN (SELECT id FROM questions WHERE form_id=:fid)" + prune),
+        {"fid": form_id, **prune_params},
+    )
+    db.query(SubmissionModel).filter(SubmissionModel.form_id == form_id).delete(synchronize_session=False)
 
+    was_public = form.is_public
     db.delete(form)
     db.commit()
+    if was_public:
+        form_definitions.public_cache.clear()
+    analytics_cache.invalidate(form_id)
+    form_definitions.definition_cache.invalidate(form_id)
+    export_jobs.drop_form(form_id)
     return {"ok": True}
-@router.post("/api/forms/{form_id}/answers")
-def submit_answers(
-    form_id: int,
-    submission: AnswerSubmission,
-    db: Session = Depends(get_db),
-    current_user: Optional[UserModel] = Depends(get_current_user_optional)
-):
-    
+ANSWER_BATCH_MAX = int(os.getenv("ANSWER_BATCH_MAX", "1000"))
+
+
+def _form_for_submission(db: Session, form_id: int, current_user: Optional[UserModel]) -> FormModel:
     form = db.query(FormModel).filter(FormModel.id == form_id).first()
     if not form:
         raise HTTPException(status_code=404, detail="Forma ne postoji.")
@@ -714,185 +653,120 @@ def submit_answers(
         raise HTTPException(status_code=403, detail="Forma je zaključana za odgovore.")
     if not form.is_public and current_user is None:
         raise HTTPException(status_code=403, detail="Morate biti prijavljeni da biste popunili ovu formu.")
+    return form
 
-    
-    qrows = (
-        db.query(QuestionModel)
-        .filter(QuestionModel.form_id == form_id)
-        .order_by(QuestionModel.order)
-        .all()
-    )
-    questions_by_id = {q.id: q for q in qrows}
-
-    
-    opts_by_qid: dict[int, list[OptionModel]] = {}
-    if qrows:
-        qids = [q.id for q in qrows]
-        all_opts = db.query(OptionModel).filter(OptionModel.question_id.in_(qids)).all()
-        for o in all_opts:
-            opts_by_qid.setdefault(o.question_id, []).append(o)
-
-    
-    sub_by_qid = {a.question_id: a for a in submission.answers}
 
-    
-    for q in qrows:
-        if q.is_required:
-            a = sub_by_qid.get(q.id)
-            if a is None:
-                raise HTTPException(status_code=400, detail=f"Pitanje '{q.text}' je obavezno.")
-            if a.answer is None or (isinstance(a.answer, str) and a.answer.strip() == ""):
-                
-                if not (q.type in ("multiple_choice", "checkbox") and isinstance(a.answer, list) and len(a.answer) > 0):
-                    raise HTTPException(status_code=400, detail=f"Pitanje '{q.text}' je obavezno.")
+@router.post("/api/forms/{form_id}/answers")
+def submit_answers(
+    form_id: int,
+    submission: AnswerSubmission,
+    db: Session = Depends(get_db),
+    current_user: Optional[UserModel] = Depends(get_current_user_optional),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    form = _form_for_submission(db, form_id, current_user)
+    user_id = current_user.id if current_user else None
 
-    def _norm_type(t: str) -> str:
-        alias = {"radio": "single_choice", "checkbox": "multiple_choice"}
-        return alias.get(t, t)
+    idem = IdempotentRequest(db, idempotency_key, f"submit_answers:{form_id}:{user_id or 'anon'}", submission.model_dump())
+    replay = idem.replay()
+    if replay:
+        return replay
 
-    def _stringy(x) -> str:
-        return "" if x is None else str(x)
+    # pitanja i opcije su prevedeni u skupove/rečnike i keširani dok se schema_version ne promeni
+    validated = form_validator(db, form).validate(submission.answers)
 
-    
-    def _parse_id_like(x) -> Optional[int]:
+    if queue_mode():
+        # write-behind: odgovor je na disku i u redu, u bazu ga upisuje pozadinski grupni commit
+        ingest_queue.start(db.get_bind())
         try:
-            return int(str(x).strip())
+            ingest_queue.reserve()
+        except QueueFull:
+            raise HTTPException(status_code=429, detail="Previše zahteva, pokušajte ponovo.", headers={"Retry-After": "1"})
+        except QueueClosed:
+            raise HTTPException(status_code=503, detail="Server se gasi, pokušajte ponovo.", headers={"Retry-After": "5"})
+        # prvo Idempotency-Key, pa red: paralelni zahtev sa istim ključem koji izgubi trku
+        # dobija odgovor pobednika i ne ubacuje ništa u red
+        ingest_id = uuid4().hex
+        try:
+            response = idem.commit({"message": "Odgovori su primljeni.", "ingest_id": ingest_id}, status_code=202)
         except Exception:
-            return None
+            ingest_queue.release()
+            raise
+        if idem.replayed:
+            ingest_queue.release()
+            return response
+        try:
+            ingest_queue.submit(form_id, user_id, validated, item_id=ingest_id, reserved=True)
+        except QueueClosed:
+            idem.forget()
+            raise HTTPException(status_code=503, detail="Server se gasi, pokušajte ponovo.", headers={"Retry-After": "5"})
+        return response
 
-    def _validate_single(q: QuestionModel, raw) -> str:
-        """Prihvata option id ili option text; vraća string koji snimamo (ID kao string)."""
-        options = opts_by_qid.get(q.id, [])
-        if not options:
-            raise HTTPException(status_code=400, detail=f"Pitanje '{q.text}' nema opcije.")
-        
-        oid = _parse_id_like(raw)
-        if oid is not None and any(o.id == oid for o in options):
-            return str(oid)
-        
-        sval = str(raw)
-        match = next((o for o in options if o.text == sval), None)
-        if match:
-            return str(match.id)
-        raise HTTPException(status_code=400, detail=f"Nevažeća opcija za pitanje '{q.text}'.")
-
-    def _validate_multi(q: QuestionModel, raw) -> str:
-        """Prihvata listu ID-jeva ili tekstova; vraća CSV string sa ID-jevima."""
-        options = opts_by_qid.get(q.id, [])
-        if not options:
-            raise HTTPException(status_code=400, detail=f"Pitanje '{q.text}' nema opcije.")
-        
-        if isinstance(raw, str):
-            cand = [p.strip() for p in raw.split(",") if p.strip()]
-        elif isinstance(raw, list):
-            cand = raw
-        else:
-            raise HTTPException(status_code=400, detail=f"Multiple choice za '{q.text}' očekuje listu ili CSV string.")
-
-        ids: list[int] = []
-        for it in cand:
-            oid = _parse_id_like(it)
-            if oid is not None and any(o.id == oid for o in options):
-                ids.append(oid)
-                continue
-        
-            sval = str(it)
-            match = next((o for o in options if o.text == sval), None)
-            if not match:
-                raise HTTPException(status_code=400, detail=f"Nevažeća opcija '{sval}' za '{q.text}'.")
-            ids.append(match.id)
+    submission_ids = persist_submissions(db, form_id, [(user_id, validated, None)])
+    return idem.commit({"message": "Odgovori su uspešno sačuvani.", "submission_id": submission_ids[0]})
 
-        
-        if q.max_choices is not None and len(ids) > int(q.max_choices):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Dozvoljeno je najviše {q.max_choices} izbora za '{q.text}'."
-            )
-        
-        return ",".join(str(i) for i in ids)
 
-    def _validate_numeric_choice(q: QuestionModel, raw) -> str:
-        """Prihvata ID opcije ili numeričku vrednost koja postoji među opcijama (po tekstu)."""
-        options = opts_by_qid.get(q.id, [])
-        if not options:
-            raise HTTPException(status_code=400, detail=f"Pitanje '{q.text}' nema opcije.")
-        
-        oid = _parse_id_like(raw)
-        if oid is not None and any(o.id == oid for o in options):
-            return str(oid)
-        
-        try:
-            f = float(str(raw).strip())
-        except Exception:
-            raise HTTPException(status_code=400, detail=f"Odgovor za '{q.text}' mora biti broj.")
-        
-        for o in options:
-            try:
-                if float(o.text) == f:
-                    return str(o.id)
-            except Exception:
-                continue
-        raise HTTPException(status_code=400, detail=f"Odgovor nije u dozvoljenom opsegu za '{q.text}'.")
+@router.post("/api/forms/{form_id}/answers/batch")
+def submit_answers_batch(
+    form_id: int,
+    batch: AnswerBatch,
+    db: Session = Depends(get_db),
+    current_user: Optional[UserModel] = Depends(get_current_user_optional)
+):
+    """
+    Više popunjavanja u jednom zahtevu (npr. uređaji koji skupljaju odgovore offline).
+    Neispravna popunjavanja se prijavljuju po indeksu, a ispravna se upisuju u jednoj transakciji.
+    """
+    if len(batch.submissions) > ANSWER_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Najviše {ANSWER_BATCH_MAX} popunjavanja po zahtevu.")
 
-    def _validate_date(raw) -> str:
-        from datetime import date
-        try:
-            return date.fromisoformat(str(raw)).isoformat()
-        except Exception:
-            raise HTTPException(status_code=400, detail="Neispravan datum (očekivan ISO format YYYY-MM-DD).")
+    form = _form_for_submission(db, form_id, current_user)
+    validator = form_validator(db, form)
 
-    def _validate_datetime(raw) -> str:
-        from datetime import datetime
-        s = str(raw).replace("Z", "+00:00")
+    results = []
+    valid = []
+    for index, submission in enumerate(batch.submissions):
         try:
-            
-            dt = datetime.fromisoformat(s)
-            return dt.replace(microsecond=0).isoformat()
-        except Exception:
-            raise HTTPException(status_code=400, detail="Neispravan datum/vreme (ISO 8601).")
+            valid.append((index, validator.validate(submission.answers)))
+        except HTTPException as exc:
+            results.append({"index": index, "status": "error", "detail": exc.detail})
+
+    if valid:
+        user_id = current_user.id if current_user else None
+        submission_ids = persist_submissions(db, form_id, [(user_id, v, None) for _, v in valid])
+        db.commit()
+        results.extend(
+            {"index": index, "status": "ok", "submission_id": sid}
+            for (index, _), sid in zip(valid, submission_ids)
+        )
 
-    
-    for item in submission.answers:
-        q = questions_by_id.get(item.question_id)
-        if not q:
-            raise HTTPException(status_code=400, detail=f"Nevažeće pitanje ID: {item.question_id}")
-
-        qtype = _norm_type(q.type)
-
-        if qtype == "single_choice":
-            stored_val = _validate_single(q, item.answer)
-        elif qtype == "multiple_choice":
-            stored_val = _validate_multi(q, item.answer)
-        elif qtype == "numeric_choice":
-            stored_val = _validate_numeric_choice(q, item.answer)
-        elif qtype in ("short_text", "long_text"):
-            stored_val = _stringy(item.answer)
-        elif qtype == "date":
-            stored_val = _validate_date(item.answer)
-        elif qtype == "datetime":
-            stored_val = _validate_datetime(item.answer)
-        else:
-            
-            stored_val = _stringy(item.answer)
+    results.sort(key=lambda r: r["index"])
+    return {"accepted": len(valid), "rejected": len(results) - len(valid), "results": results}
 
-        db.add(AnswerModel(
-            question_id=item.question_id,
-            user_id=(current_user.id if current_user else None),
-            value=stored_val,
-        ))
+def _submission_anchor(submission_id: int):
+    """
+    (submitted_at, id) popunjavanja iz kursora, pročitano iz baze: kursor nosi samo id, pa se
+    vreme poredi sa vrednošću iz iste kolone, bez konverzije formata (SQLite čuva tekst).
+    """
+    anchor = aliased(SubmissionModel)
+    return select(anchor.submitted_at, anchor.id).where(anchor.id == submission_id).scalar_subquery()
 
-    db.commit()
-    return {"message": "Odgovori su uspešno sačuvani."}
 
 @router.get("/api/forms/{form_id}/answers")
 def get_answers_for_form(
     form_id: int,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
     as_user: Optional[int] = Query(None),
     x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    
+    """
+    Odgovori forme, strana po strana. Strana je limit popunjavanja (najstarija prva) sa svim
+    njihovim odgovorima, pa se jedno popunjavanje nikad ne deli između strana. Popunjavanja se
+    čitaju iz indeksa (form_id, submitted_at, id), a odgovori preko answers.submission_id.
+    """
     form = db.query(FormModel).filter(FormModel.id == form_id).first()
     if not form:
         raise HTTPException(status_code=404, detail="Forma ne postoji.")
@@ -901,18 +775,33 @@ def get_answers_for_form(
     if not _can_view_results(form, actor, db):
         raise HTTPException(403, "Nemate pravo da vidite rezultate.")
 
-    answers = db.execute(
-        text("""
-            SELECT q.text AS question_text,
-                   a.value AS answer_value,
-                   u.email AS user_email
-            FROM answers a
-            JOIN questions q ON q.id = a.question_id
-            LEFT JOIN users u ON u.id = a.user_id
-            WHERE q.form_id = :fid
-        """),
-        {"fid": form_id}
-    ).fetchall()
+    after = decode_cursor(cursor, int)
+    q = db.query(SubmissionModel.id, SubmissionModel.submitted_at).filter(SubmissionModel.form_id == form_id)
+    if after:
+        q = q.filter(tuple_(SubmissionModel.submitted_at, SubmissionModel.id) > _submission_anchor(after[0]))
+    page = q.order_by(SubmissionModel.submitted_at, SubmissionModel.id).limit(limit + 1).all()
+    page, next_cursor = split_page(page, limit, lambda s: (s.id,))
+
+    answers = []
+    if page:
+        prune, prune_params = range_pruning_clause(db, page[0].submitted_at, page[-1].submitted_at)
+        answers = db.execute(
+            text("""
+                SELECT a.submission_id,
+                       q.text AS question_text,
+                       a.value AS answer_value,
+                       u.email AS user_email
+                FROM answers a
+                JOIN questions q ON q.id = a.question_id
+                LEFT JOIN users u ON u.id = a.user_id
+                WHERE a.submission_id IN :sids
+            """ + prune + """
+                ORDER BY q."order", a.id
+            """).bindparams(bindparam("sids", expanding=True)),
+            {"sids": [p.id for p in page], **prune_params}
+        ).fetchall()
+        position = {p.id: i for i, p in enumerate(page)}
+        answers.sort(key=lambda row: position[row.submission_id])
 
     results = []
     for row in answers:
@@ -922,7 +811,105 @@ def get_answers_for_form(
             "korisnik": row.user_email if row.user_email else "anonymo"
         })
 
-    return JSONResponse(content=results)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return JSONResponse(content=results, headers=headers)
+
+
+SUBMISSIONS_MAX_LIMIT = 1000
+
+
+def _submission_out(row) -> dict:
+    return {
+        "id": row.id,
+        "user_email": row.user_email,
+        "submitted_at": row.submitted_at.isoformat() if row.submitted_at else None,
+    }
+
+
+@router.get("/api/forms/{form_id}/submissions")
+def list_submissions(
+    form_id: int,
+    limit: int = Query(100, ge=1, le=SUBMISSIONS_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    as_user: Optional[int] = Query(None),
+    x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    Popunjavanja forme (najnovija prva); ukupan broj je u zaglavlju X-Total-Count, a kursor
+    sledeće strane u X-Next-Cursor (cursor umesto offset ne preskače redove redom).
+    """
+    form = db.query(FormModel).filter(FormModel.id == form_id).first()
+    if not form:
+        raise HTTPException(status_code=404, detail="Forma ne postoji.")
+
+    actor, _ = resolve_actor_for_impersonation(db, current_user, as_user, x_impersonate_user)
+    if not _can_view_results(form, actor, db):
+        raise HTTPException(403, "Nemate pravo da vidite rezultate.")
+
+    total = db.query(func.count(SubmissionModel.id)).filter(SubmissionModel.form_id == form_id).scalar()
+    q = (
+        db.query(SubmissionModel.id, SubmissionModel.submitted_at, UserModel.email.label("user_email"))
+        .outerjoin(UserModel, UserModel.id == SubmissionModel.user_id)
+        .filter(SubmissionModel.form_id == form_id)
+    )
+    after = decode_cursor(cursor, int)
+    if after:
+        q = q.filter(tuple_(SubmissionModel.submitted_at, SubmissionModel.id) < _submission_anchor(after[0]))
+    rows = (
+        q.order_by(SubmissionModel.submitted_at.desc(), SubmissionModel.id.desc())
+        .offset(0 if after else offset)
+        .limit(limit + 1)
+        .all()
+    )
+    rows, next_cursor = split_page(rows, limit, lambda r: (r.id,))
+    headers = {"X-Total-Count": str(total)}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return JSONResponse(content=[_submission_out(r) for r in rows], headers=headers)
+
+
+@router.get("/api/forms/{form_id}/submissions/{submission_id}")
+def get_submission(
+    form_id: int,
+    submission_id: int,
+    as_user: Optional[int] = Query(None),
+    x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    form = db.query(FormModel).filter(FormModel.id == form_id).first()
+    if not form:
+        raise HTTPException(status_code=404, detail="Forma ne postoji.")
+
+    actor, _ = resolve_actor_for_impersonation(db, current_user, as_user, x_impersonate_user)
+    if not _can_view_results(form, actor, db):
+        raise HTTPException(403, "Nemate pravo da vidite rezultate.")
+
+    row = (
+        db.query(SubmissionModel.id, SubmissionModel.submitted_at, UserModel.email.label("user_email"))
+        .outerjoin(UserModel, UserModel.id == SubmissionModel.user_id)
+        .filter(SubmissionModel.id == submission_id, SubmissionModel.form_id == form_id)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Odgovor ne postoji.")
+
+    answers = (
+        db.query(AnswerModel.question_id, QuestionModel.text, QuestionModel.type, AnswerModel.value)
+        .join(QuestionModel, QuestionModel.id == AnswerModel.question_id)
+        .filter(AnswerModel.submission_id == submission_id)
+        .order_by(QuestionModel.order, AnswerModel.id)
+        .all()
+    )
+    out = _submission_out(row)
+    out["answers"] = [
+        {"question_id": a.question_id, "question_text": a.text, "type": a.type, "value": a.value}
+        for a in answers
+    ]
+    return JSONResponse(content=out)
 
 
 @router.put("/api/forms/{form_id}")
@@ -944,12 +931,19 @@ def update_form(
         form.name = data.name
     if data.description is not None:
         form.description = data.description
+    # javna lista prikazuje naziv i opis, pa se prazni i kad se menja javna forma
+    public_changed = form.is_public or bool(data.is_public)
     if data.is_public is not None:
         form.is_public = data.is_public
     if data.is_locked is not None:                 
         form.is_locked = data.is_locked
+    # naziv, opis, javnost i zaključavanje su deo keširane definicije forme
+    _bump_schema_version(db, form_id)
 
     db.commit()
+    permissions.forget(db, form_id)
+    if public_changed:
+        form_definitions.public_cache.clear()
     db.refresh(form)
     return {
         "id": form.id,
@@ -987,7 +981,7 @@ def update_question(
     
     _ensure_can_edit_form(db, form, current_user, as_user, x_impersonate_user, owner_only=False)
 
-    
+    old_type = question.type
     alias = {"radio": "single_choice", "checkbox": "multiple_choice"}
     if updated_data.type is not None:
         qtype = alias.get(updated_data.type, updated_data.type)
@@ -1059,6 +1053,14 @@ def update_question(
         for t in new_texts:
             db.add(OptionModel(text=t, question_id=question_id))
 
+    if question.type != old_type:
+        # drugi tip pitanja znači druge tipizirane kolone, a rollup se gradi iz njih
+        db.flush()
+        answer_types.retype_question(db, question_id, question.type)
+        rollups.rebuild_question(db, question_id, question.type)
+
+    _bump_schema_version(db, form_id)
+    bump_answers_version(db, form_id)
     db.commit()
     db.refresh(question)
 
@@ -1094,10 +1096,16 @@ def delete_question(
 
     _ensure_can_edit_form(db, form, current_user, as_user, x_impersonate_user, owner_only=False)
 
+    db.query(AnswerSelectionModel).filter(
+        AnswerSelectionModel.answer_id.in_(select(AnswerModel.id).where(AnswerModel.question_id == question_id))
+    ).delete(synchronize_session=False)
     db.query(AnswerModel).filter(AnswerModel.question_id == question_id).delete(synchronize_session=False)
     db.query(OptionModel).filter(OptionModel.question_id == question_id).delete(synchronize_session=False)
+    rollups.drop_question(db, question_id)
 
     db.delete(question)
+    _bump_schema_version(db, form_id)
+    bump_answers_version(db, form_id)
     db.commit()
    
 
@@ -1154,6 +1162,7 @@ def update_collaborator_role(
 
     coll.role = data.role
     db.commit()
+    permissions.forget(db, form_id)
     db.refresh(coll)
 
     user = db.query(UserModel).filter(UserModel.id == coll.user_id).first()
@@ -1202,6 +1211,7 @@ def add_or_update_collaborator(
         db.add(CollaboratorModel(form_id=form_id, user_id=payload.user_id, role=payload.role))
 
     db.commit()
+    permissions.forget(db, form_id)
     return {"message": "Kolaborator je sačuvan."}
 
 
@@ -1232,6 +1242,7 @@ def remove_collaborator(
 
     db.delete(coll)
     db.commit()
+    permissions.forget(db, form_id)
     return
 
 @router.delete("/api/forms/{form_id}/collaborators/{user_id}", status_code=204)
@@ -1251,6 +1262,7 @@ def remove_collaborator(
         CollaboratorModel.user_id == user_id
     ).delete()
     db.commit()
+    permissions.forget(db, form_id)
     if deleted == 0:
         raise HTTPException(404, "Kolaborator nije pronađen.")
     
@@ -1260,12 +1272,11 @@ def analytics_for_form(
     form_id: int,
     as_user: Optional[int] = Query(None),
     x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"), 
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user)
 ):
-    form = db.query(FormModel).options(
-        joinedload(FormModel.questions).joinedload(QuestionModel.options)
-    ).filter(FormModel.id == form_id).first()
+    form = db.query(FormModel).filter(FormModel.id == form_id).first()
     if not form:
         raise HTTPException(404, "Forma ne postoji.")
 
@@ -1274,8 +1285,13 @@ def analytics_for_form(
     if not _can_view_results(form, actor, db):
         raise HTTPException(403, "Nemate pravo pregleda rezultata.")
 
+    # verzija odgovora je na samoj formi, pa 304 ne dira answers tabelu
+    headers = {"ETag": _analytics_etag(form), "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
     data = _build_analytics_for_form(db, form)
-    return {"form_id": form.id, "analytics": data}
+    return JSONResponse(content={"form_id": form.id, "analytics": data}, headers=headers)
 
 
 @router.options("/api/forms/{form_id}/export.xlsx")
@@ -1290,6 +1306,35 @@ def export_xlsx_options():
         }
     )
 
+EXPORT_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Allow-Credentials": "true"
+}
+
+
+def _form_for_export(db: Session, form_id: int, current_user: UserModel,
+                     as_user: Optional[int], x_impersonate_user: Optional[int]) -> FormModel:
+    form = db.query(FormModel).filter(FormModel.id == form_id).first()
+    if not form:
+        raise HTTPException(404, "Forma ne postoji.")
+
+    actor, _ = resolve_actor_for_impersonation(db, current_user, as_user, x_impersonate_user)
+
+    if not _can_view_results(form, actor, db):
+        raise HTTPException(403, "Nemate pravo izvoza rezultata.")
+    return form
+
+
+def _export_response(db: Session, form_id: int, build, filename: str, media_type: str,
+                     compress: bool = False) -> StreamingResponse:
+    if compress:
+        build, filename, media_type = gzipped(build), filename + ".gz", GZIP_MEDIA_TYPE
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', **EXPORT_CORS_HEADERS}
+    return StreamingResponse(stream_file(db.get_bind(), build, form_id), media_type=media_type, headers=headers)
+
+
 @router.get("/api/forms/{form_id}/export.xlsx")
 def export_xlsx(
     form_id: int,
@@ -1299,91 +1344,107 @@ def export_xlsx(
     current_user: UserModel = Depends(get_current_user)
 ):
     print(f"🔍 Export request: form_id={form_id}, as_user={as_user}, current_user={current_user.username if current_user else 'None'}")
-    form = db.query(FormModel).options(
-        joinedload(FormModel.questions).joinedload(QuestionModel.options)
-    ).filter(FormModel.id == form_id).first()
-    if not form:
-        raise HTTPException(404, "Forma ne postoji.")
+    _form_for_export(db, form_id, current_user, as_user, x_impersonate_user)
+    return _export_response(db, form_id, write_xlsx, f"form_{form_id}_export.xlsx", XLSX_MEDIA_TYPE)
 
-    actor, _ = resolve_actor_for_impersonation(db, current_user, as_user, x_impersonate_user)
 
-    if not _can_view_results(form, actor, db):
-        raise HTTPException(403, "Nemate pravo izvoza rezultata.")
+@router.get("/api/forms/{form_id}/export.csv")
+def export_csv(
+    form_id: int,
+    gzip: bool = Query(False),
+    as_user: Optional[int] = Query(None),
+    x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    _form_for_export(db, form_id, current_user, as_user, x_impersonate_user)
+    return _export_response(db, form_id, write_csv, f"form_{form_id}_answers.csv", CSV_MEDIA_TYPE, gzip)
 
-    wb = Workbook()
-    ws_q = wb.active
-    ws_q.title = "Questions"
-    ws_q.append(["Question ID", "Text", "Type", "Required", "Order", "Max choices", "Options"])
-
-    for q in form.questions:
-        opts = " | ".join([o.text for o in q.options]) if q.options else ""
-        ws_q.append([q.id, q.text, q.type, bool(q.is_required), q.order, q.max_choices, opts])
-
-    ws_a = wb.create_sheet("Answers")
-    ws_a.append(["Question ID", "Question", "Answer", "User email", "Submitted at"])
-
-    rows = db.execute(
-        text("""
-            SELECT q.id AS qid, q.text AS qtext, a.value AS answer_value,
-                   u.email AS user_email, a.submitted_at
-            FROM answers a
-            JOIN questions q ON q.id = a.question_id
-            LEFT JOIN users u ON u.id = a.user_id
-            WHERE q.form_id = :fid
-            ORDER BY a.submitted_at ASC
-        """),
-        {"fid": form_id}
-    ).fetchall()
-
-    for r in rows:
-        # Remove timezone info from datetime for Excel compatibility
-        submitted_at = r.submitted_at
-        if submitted_at and hasattr(submitted_at, 'replace'):
-            submitted_at = submitted_at.replace(tzinfo=None)
-        ws_a.append([r.qid, r.qtext, r.answer_value, (r.user_email or "anonimo"), submitted_at])
-
-    ws_an = wb.create_sheet("Analytics")
-    ws_an.append(["Question ID", "Text", "Type", "Metric", "Value", "Extra"])
-
-    analytics = _build_analytics_for_form(db, form)
-    for item in analytics:
-        qt, qid, qtype = item["text"], item["question_id"], item["type"]
-
-        if "distribution" in item:
-            for d in item["distribution"]:
-                ws_an.append([qid, qt, qtype, "option",
-                              f'{d.get("option_text")}', f'count={d["count"]}, percent={d["percent"]}%'])
-            ws_an.append([qid, qt, qtype, "total_answers", item.get("total_answers", 0), ""])
-            if "total_selections" in item:
-                ws_an.append([qid, qt, qtype, "total_selections", item["total_selections"], ""])
-        elif qtype in ("number","numeric"):
-            ws_an.append([qid, qt, qtype, "count", item.get("count", 0), ""])
-            if "min" in item:
-                ws_an.append([qid, qt, qtype, "min", item["min"], ""])
-                ws_an.append([qid, qt, qtype, "avg", item["avg"], ""])
-                ws_an.append([qid, qt, qtype, "max", item["max"], ""])
-            for h in item.get("histogram", []):
-                ws_an.append([qid, qt, qtype, "hist", f'value={h["value"]}', f'count={h["count"]}'])
-        elif qtype in ("date","time"):
-            ws_an.append([qid, qt, qtype, "count", item.get("count", 0), ""])
-            for v in item.get("by_value", []):
-                ws_an.append([qid, qt, qtype, "value", v["value"], f'count={v["count"]}'])
-        else:
-            ws_an.append([qid, qt, qtype, "count", item.get("count", 0), ""])
-
-    bio = BytesIO()
-    wb.save(bio)
-    bio.seek(0)
-    filename = f"form_{form_id}_export.xlsx"
-    headers = {
-        "Content-Disposition": f'attachment; filename="{filename}"',
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-        "Access-Control-Allow-Headers": "*",
-        "Access-Control-Allow-Credentials": "true"
-    }
-    return StreamingResponse(
-        bio,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers
-    )
\ No newline at end of file
+
+@router.get("/api/forms/{form_id}/export.ndjson")
+def export_ndjson(
+    form_id: int,
+    gzip: bool = Query(False),
+    as_user: Optional[int] = Query(None),
+    x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    _form_for_export(db, form_id, current_user, as_user, x_impersonate_user)
+    return _export_response(db, form_id, write_ndjson, f"form_{form_id}_answers.ndjson", NDJSON_MEDIA_TYPE, gzip)
+
+
+@router.get("/api/forms/{form_id}/export.parquet")
+def export_parquet(
+    form_id: int,
+    as_user: Optional[int] = Query(None),
+    x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    _form_for_export(db, form_id, current_user, as_user, x_impersonate_user)
+    return _export_response(db, form_id, write_parquet, f"form_{form_id}_answers.parquet", PARQUET_MEDIA_TYPE)
+
+
+def _export_job_out(job: export_jobs.ExportJob) -> ExportJobOut:
+    return ExportJobOut(
+        job_id=job.id,
+        form_id=job.form_id,
+        format=job.format,
+        status=job.status,
+        answers_version=job.answers_version,
+        size=job.size,
+        error=job.error,
+        download_url=f"/api/forms/{job.form_id}/exports/{job.id}/download" if job.status == "done" else None,
+    )
+
+
+def _export_job_for_form(form_id: int, job_id: str) -> export_jobs.ExportJob:
+    job = export_jobs.get(job_id)
+    if job is None or job.form_id != form_id:
+        raise HTTPException(404, "Izvoz ne postoji.")
+    return job
+
+
+@router.post("/api/forms/{form_id}/exports", response_model=ExportJobOut, status_code=202)
+def create_export_job(
+    form_id: int,
+    payload: ExportJobCreate,
+    as_user: Optional[int] = Query(None),
+    x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    form = _form_for_export(db, form_id, current_user, as_user, x_impersonate_user)
+    return _export_job_out(export_jobs.submit(db, form, payload.format))
+
+
+@router.get("/api/forms/{form_id}/exports/{job_id}", response_model=ExportJobOut)
+def get_export_job(
+    form_id: int,
+    job_id: str,
+    as_user: Optional[int] = Query(None),
+    x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    _form_for_export(db, form_id, current_user, as_user, x_impersonate_user)
+    return _export_job_out(_export_job_for_form(form_id, job_id))
+
+
+@router.get("/api/forms/{form_id}/exports/{job_id}/download")
+def download_export_job(
+    form_id: int,
+    job_id: str,
+    as_user: Optional[int] = Query(None),
+    x_impersonate_user: Optional[int] = Header(None, alias="X-Impersonate-User"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user)
+):
+    _form_for_export(db, form_id, current_user, as_user, x_impersonate_user)
+    job = _export_job_for_form(form_id, job_id)
+    if job.status == "expired":
+        raise HTTPException(410, "Fajl izvoza je istekao, pokrenite izvoz ponovo.")
+    if job.status != "done":
+        raise HTTPException(409, "Izvoz još nije završen.")
+    return FileResponse(job.path, media_type=job.media_type, filename=job.filename, headers=EXPORT_CORS_HEADERS)
\ No newline at end of file
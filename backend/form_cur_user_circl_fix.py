@@ -1,52 +1,104 @@
+"""
+Jedinstvena auth zavisnost za sve rute (auth_api i form). Proveren token se kešira zajedno sa
+snimkom korisnika (UserSnapshot), pa autentifikovani zahtevi u uobičajenom slučaju nemaju ni
+dekodiranje JWT-a ni upit nad users. Unos važi do AUTH_CACHE_TTL sekundi (i ne duže od exp
+tokena); update_user/delete_user ga odmah poništavaju pozivom invalidate_user. Izmene korisnika
+mimo API-ja (ili u drugom procesu) vide se najkasnije posle AUTH_CACHE_TTL.
+"""
+from dataclasses import dataclass
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status, Request
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import UserModel 
-from typing import Optional
+from cache_utils import LRUCache
+from form_db_circl_fix import get_db
+from models import UserModel
+from typing import Dict, Optional
 import os
+import threading
+import time
 from dotenv import load_dotenv
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token", auto_error=False)
 
-def get_db():
-    db = SessionLocal()
+token_cache = LRUCache("auth_tokens", maxsize=int(os.getenv("AUTH_CACHE_SIZE", "10000")), ttl=AUTH_CACHE_TTL)
+
+# user_id -> generacija; invalidate_user je povećava, pa svi keširani tokeni tog korisnika zastare
+_generations: Dict[int, int] = {}
+_generations_lock = threading.Lock()
+_invalidations = 0
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Kolone korisnika potrebne rutama; nije vezan za sesiju, pa se bezbedno deli između zahteva."""
+    id: int
+    username: str
+    email: str
+    is_superadmin: bool
+
+
+def invalidate_user(user_id: int):
+    global _invalidations
+    with _generations_lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        _invalidations += 1
+
+
+def _resolve(token: Optional[str], db: Session) -> Optional[UserSnapshot]:
+    if not token:
+        return None
+    entry = token_cache.get(token)
+    if entry is not None:
+        snapshot, generation, exp = entry
+        if _generations.get(snapshot.id, 0) == generation and (exp is None or exp > time.time()):
+            return snapshot
+        token_cache.invalidate(token)
+
     try:
-        yield db
-    finally:
-        db.close()
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if username is None:
+        return None
+
+    invalidations_before = _invalidations
+    row = (
+        db.query(UserModel.id, UserModel.username, UserModel.email, UserModel.is_superadmin)
+        .filter(UserModel.username == username)
+        .first()
+    )
+    if row is None:
+        return None
+    snapshot = UserSnapshot(row.id, row.username, row.email, bool(row.is_superadmin))
+    # izmena nekog korisnika tokom upita: snimak se vraća, ali ne kešira
+    if _invalidations == invalidations_before:
+        token_cache.set(token, (snapshot, _generations.get(snapshot.id, 0), payload.get("exp")))
+    return snapshot
+
 
 def get_current_user(
     request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-):
-    
+) -> Optional[UserSnapshot]:
+
     if request.method == "OPTIONS":
         return None
 
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid token",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(UserModel).filter(UserModel.username == username).first()
+    user = _resolve(token, db)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
@@ -54,21 +106,9 @@ def get_current_user_optional(
     request: Request,
     token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> Optional[UserModel]:
-    
-    if request.method == "OPTIONS":
-        return None
+) -> Optional[UserSnapshot]:
 
-    if not token:
-        return None
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-    except JWTError:
+    if request.method == "OPTIONS":
         return None
 
-    user = db.query(UserModel).filter(UserModel.username == username).first()
-    return user
+    return _resolve(token, db)
@@ -0,0 +1,138 @@
+"""
+Definicija forme (forma, pitanja, opcije) za GET /api/forms/{id}, keširana kao gotov JSON.
+Ključ je id forme, a verzija forms.schema_version, koju menjaju izmene forme, pitanja i opcija;
+pošto se verzija čita iz baze pri svakom zahtevu, keš je ispravan i sa više procesa. Po
+zahtevu se računa samo deo koji zavisi od korisnika (my_role, capabilities), i dopisuje se na
+keširane bajtove bez ponovne serijalizacije.
+
+Isti modul daje i listu javnih formi (GET /api/forms/public): id, naziv, opis i broj pitanja
+iz jednog upita, a pitanja samo na zahtev (include=questions, selectin). Strane liste se
+keširaju kao gotov JSON sa kratkim TTL-om (PUBLIC_FORMS_CACHE_TTL); keš se prazni kad se
+forma doda u javne ili ukloni iz njih, a izmene pitanja postaju vidljive posle isteka TTL-a.
+"""
+import json
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from cache_utils import LRUCache
+from models import FormModel, QuestionModel
+from pagination import split_page
+
+definition_cache = LRUCache("form_definitions", maxsize=int(os.getenv("FORM_CACHE_SIZE", "1024")))
+public_cache = LRUCache(
+    "public_forms", maxsize=256, ttl=float(os.getenv("PUBLIC_FORMS_CACHE_TTL", "30"))
+)
+
+
+def _dumps(obj) -> bytes:
+    # isto kao starlette JSONResponse
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _questions(form: FormModel) -> List[dict]:
+    # pitanja i opcije po id-ju: ista verzija mora dati iste bajtove (jak ETag)
+    questions = []
+    for q in sorted(form.questions, key=lambda q: q.id):
+        questions.append({
+            "id": q.id,
+            "text": q.text,
+            "type": q.type,
+            "is_required": q.is_required,
+            "order": q.order,
+            "max_choices": q.max_choices,
+            "image_url": q.image_url or None,
+            "options": [
+                {"id": opt.id, "text": opt.text, "image_url": opt.image_url or None}
+                for opt in sorted(q.options, key=lambda o: o.id)
+            ],
+        })
+    return questions
+
+
+def _serialize(form: FormModel) -> bytes:
+    return _dumps({
+        "id": form.id,
+        "name": form.name,
+        "description": form.description,
+        "is_public": form.is_public,
+        "is_locked": form.is_locked,
+        "questions": _questions(form),
+    })
+
+
+def definition(db: Session, form_id: int, version: int) -> Optional[Tuple[bytes, int]]:
+    """JSON definicije i verzija koju opisuje (novija od tražene ako je forma upravo izmenjena)."""
+    body = definition_cache.get(form_id, version=version)
+    if body is not None:
+        return body, version
+    form = (
+        db.query(FormModel)
+        .options(joinedload(FormModel.questions).joinedload(QuestionModel.options))
+        .filter(FormModel.id == form_id)
+        .first()
+    )
+    if form is None:
+        return None
+    current = form.schema_version or 0
+    body = _serialize(form)
+    definition_cache.set(form_id, body, version=current)
+    return body, current
+
+
+def etag(form_id: int, version: int, role: str) -> str:
+    # telo zavisi od verzije definicije i od uloge korisnika (my_role, capabilities)
+    return f'"form-{form_id}-{version}-{role}"'
+
+
+def with_meta(body: bytes, meta: dict) -> bytes:
+    """Dopisuje polja iz meta na keširani JSON objekat definicije."""
+    return body[:-1] + b"," + _dumps(meta)[1:]
+
+
+def _public_rows(db: Session, after_id: Optional[int], limit: int, include_questions: bool) -> List[dict]:
+    f = FormModel
+    if include_questions:
+        q = db.query(f).options(selectinload(f.questions).selectinload(QuestionModel.options))
+    else:
+        # broj pitanja kao korelisan podupit nad ix_questions_form_order, samo za redove strane
+        question_count = (
+            select(func.count(QuestionModel.id)).where(QuestionModel.form_id == f.id).scalar_subquery()
+        )
+        q = db.query(f.id, f.name, f.description, f.is_public, f.is_locked, question_count.label("question_count"))
+    q = q.filter(f.is_public == True)
+    if after_id is not None:
+        q = q.filter(f.id > after_id)
+    rows = []
+    for r in q.order_by(f.id).limit(limit).all():
+        item = {
+            "id": r.id,
+            "name": r.name,
+            "description": r.description,
+            "is_public": r.is_public,
+            "is_locked": r.is_locked,
+        }
+        if include_questions:
+            item["questions"] = _questions(r)
+            item["question_count"] = len(item["questions"])
+        else:
+            item["questions"] = None
+            item["question_count"] = r.question_count
+        rows.append(item)
+    return rows
+
+
+def public_listing(
+    db: Session, after_id: Optional[int], limit: int, include_questions: bool
+) -> Tuple[bytes, Optional[str]]:
+    """JSON jedne strane javnih formi i kursor sledeće strane (None na poslednjoj)."""
+    key = (after_id, limit, include_questions)
+    cached = public_cache.get(key)
+    if cached is not None:
+        return cached
+    rows, next_cursor = split_page(_public_rows(db, after_id, limit + 1, include_questions), limit, lambda r: (r["id"],))
+    page = (_dumps(rows), next_cursor)
+    public_cache.set(key, page)
+    return page
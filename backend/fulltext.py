@@ -0,0 +1,227 @@
+"""
+Pretraga punog teksta nad formama (naziv, opis), pitanjima (tekst) i tekstualnim odgovorima
+(short_text, long_text).
+
+Postgres: GIN indeksi nad to_tsvector('simple', ...) izrazima; baza ih održava sama pri
+svakom upisu. SQLite: FTS5 tabele forms_fts, questions_fts i answers_fts (unicode61 bez
+dijakritika) koje trigeri ažuriraju pri upisu, izmeni i brisanju, uključujući promenu tipa
+pitanja (odgovori ulaze u indeks ili izlaze iz njega).
+
+Kao i kod user_search.py, objekti nisu u SQLAlchemy metapodacima: prave se migracijom 0011,
+a pri create_all preko after_create događaja tabela forms, questions i answers.
+"""
+import re
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+import permissions
+from models import AnswerModel, FormModel, QuestionModel
+
+KINDS = ("forms", "questions", "answers")
+TEXT_TYPES = ("short_text", "long_text")
+FTS_TABLES = {"forms": "forms_fts", "questions": "questions_fts", "answers": "answers_fts"}
+PG_INDEXES = {"forms": "ix_forms_fts", "questions": "ix_questions_fts", "answers": "ix_answers_fts"}
+MAX_TERMS = 8
+
+_TOKENIZE = "tokenize='unicode61 remove_diacritics 2'"
+_IS_TEXT = "type IN (" + ", ".join(f"'{t}'" for t in TEXT_TYPES) + ")"
+
+# tsvector izrazi moraju biti isti u indeksu i u upitu, inače planer ne koristi indeks
+# ({p} je prefiks tabele: prazan u indeksu, alias u upitu)
+_PG_VECTORS = {
+    "forms": "to_tsvector('simple', coalesce({p}name, '') || ' ' || coalesce({p}description, ''))",
+    "questions": "to_tsvector('simple', {p}text)",
+    "answers": "to_tsvector('simple', {p}value)",
+}
+# samo odgovori bez tipiziranih kolona (tekst); tip pitanja se proverava i u upitu
+_PG_ANSWERS_WHERE = "{p}option_id IS NULL AND {p}value_num IS NULL AND {p}value_date IS NULL"
+
+_SQLITE_DDL = {
+    "forms": [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS forms_fts USING fts5(name, description, {_TOKENIZE})",
+        """CREATE TRIGGER IF NOT EXISTS forms_fts_ai AFTER INSERT ON forms BEGIN
+            INSERT INTO forms_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS forms_fts_au AFTER UPDATE OF name, description ON forms BEGIN
+            UPDATE forms_fts SET name = new.name, description = new.description WHERE rowid = new.id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS forms_fts_ad AFTER DELETE ON forms BEGIN
+            DELETE FROM forms_fts WHERE rowid = old.id;
+        END""",
+        "INSERT INTO forms_fts(rowid, name, description) SELECT id, name, description FROM forms",
+    ],
+    "questions": [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(text, {_TOKENIZE})",
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_ai AFTER INSERT ON questions BEGIN
+            INSERT INTO questions_fts(rowid, text) VALUES (new.id, new.text);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_au AFTER UPDATE OF text ON questions BEGIN
+            UPDATE questions_fts SET text = new.text WHERE rowid = new.id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_ad AFTER DELETE ON questions BEGIN
+            DELETE FROM questions_fts WHERE rowid = old.id;
+        END""",
+        "INSERT INTO questions_fts(rowid, text) SELECT id, text FROM questions",
+    ],
+    "answers": [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS answers_fts USING fts5(value, {_TOKENIZE})",
+        f"""CREATE TRIGGER IF NOT EXISTS answers_fts_ai AFTER INSERT ON answers
+            WHEN EXISTS (SELECT 1 FROM questions WHERE id = new.question_id AND {_IS_TEXT}) BEGIN
+            INSERT INTO answers_fts(rowid, value) VALUES (new.id, new.value);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS answers_fts_au AFTER UPDATE OF value, question_id ON answers BEGIN
+            DELETE FROM answers_fts WHERE rowid = old.id;
+            INSERT INTO answers_fts(rowid, value) SELECT new.id, new.value
+            WHERE EXISTS (SELECT 1 FROM questions WHERE id = new.question_id AND {_IS_TEXT});
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS answers_fts_ad AFTER DELETE ON answers BEGIN
+            DELETE FROM answers_fts WHERE rowid = old.id;
+        END""",
+        # promena tipa pitanja (answer_types.retype_question) uključuje ili isključuje njegove odgovore
+        f"""CREATE TRIGGER IF NOT EXISTS answers_fts_retype AFTER UPDATE OF type ON questions BEGIN
+            DELETE FROM answers_fts WHERE rowid IN (SELECT id FROM answers WHERE question_id = new.id);
+            INSERT INTO answers_fts(rowid, value) SELECT id, value FROM answers
+            WHERE question_id = new.id AND new.{_IS_TEXT};
+        END""",
+        f"""INSERT INTO answers_fts(rowid, value)
+            SELECT a.id, a.value FROM answers a JOIN questions q ON q.id = a.question_id WHERE q.{_IS_TEXT}""",
+    ],
+}
+
+_SQLITE_TRIGGERS = {
+    "forms": ["forms_fts_ai", "forms_fts_au", "forms_fts_ad"],
+    "questions": ["questions_fts_ai", "questions_fts_au", "questions_fts_ad"],
+    "answers": ["answers_fts_ai", "answers_fts_au", "answers_fts_ad", "answers_fts_retype"],
+}
+
+
+def pg_index_ddl(kind: str, concurrently: bool = False) -> str:
+    how = "CONCURRENTLY " if concurrently else ""
+    where = " WHERE " + _PG_ANSWERS_WHERE.format(p="") if kind == "answers" else ""
+    vector = _PG_VECTORS[kind].format(p="")
+    return f"CREATE INDEX {how}IF NOT EXISTS {PG_INDEXES[kind]} ON {kind} USING gin ({vector}){where}"
+
+
+def ddl(dialect: str, kind: str, concurrently: bool = False) -> List[str]:
+    """Naredbe koje prave indeks pretrage za jednu tabelu (CONCURRENTLY samo van transakcije)."""
+    if dialect == "postgresql":
+        return [pg_index_ddl(kind, concurrently)]
+    if dialect == "sqlite":
+        return list(_SQLITE_DDL[kind])
+    return []
+
+
+def drop_ddl(dialect: str, kind: str) -> List[str]:
+    if dialect == "postgresql":
+        return [f"DROP INDEX IF EXISTS {PG_INDEXES[kind]}"]
+    if dialect == "sqlite":
+        return [f"DROP TRIGGER IF EXISTS {t}" for t in _SQLITE_TRIGGERS[kind]] + [
+            f"DROP TABLE IF EXISTS {FTS_TABLES[kind]}"
+        ]
+    return []
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Za alembic autogenerate/compare_metadata: objekti pretrage nisu u metapodacima modela."""
+    if type_ == "table":
+        return not any((name or "").startswith(t) for t in FTS_TABLES.values())
+    if type_ == "index":
+        return name not in PG_INDEXES.values()
+    return True
+
+
+def _listen(model, kind: str):
+    @event.listens_for(model.__table__, "after_create")
+    def _install(target, connection, **kw):
+        for statement in ddl(connection.dialect.name, kind):
+            connection.exec_driver_sql(statement)
+
+    @event.listens_for(model.__table__, "before_drop")
+    def _uninstall(target, connection, **kw):
+        for statement in drop_ddl(connection.dialect.name, kind):
+            connection.exec_driver_sql(statement)
+
+
+_listen(FormModel, "forms")
+_listen(QuestionModel, "questions")
+_listen(AnswerModel, "answers")
+
+
+def _terms(q: str) -> List[str]:
+    terms = re.findall(r"\w+", (q or "").lower())[:MAX_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Parametar q mora sadržati bar jednu reč.")
+    return terms
+
+
+# (SELECT kolone, FROM/JOIN, ključ stranice) po vrsti rezultata; f je uvek forma pogotka
+_SOURCES = {
+    "forms": (
+        "f.id AS id, f.id AS form_id, f.name AS form_name, NULL AS question_id, "
+        "coalesce(f.description, f.name) AS text",
+        "forms f",
+        "f.id",
+    ),
+    "questions": (
+        "q.id AS id, f.id AS form_id, f.name AS form_name, q.id AS question_id, q.text AS text",
+        "questions q JOIN forms f ON f.id = q.form_id",
+        "q.id",
+    ),
+    "answers": (
+        "a.id AS id, f.id AS form_id, f.name AS form_name, q.id AS question_id, a.value AS text",
+        "answers a JOIN questions q ON q.id = a.question_id JOIN forms f ON f.id = q.form_id",
+        "a.id",
+    ),
+}
+_ALIASES = {"forms": "f", "questions": "q", "answers": "a"}
+
+
+def _match(dialect: str, kind: str, terms: List[str]):
+    """(JOIN, WHERE, parametri) za uslov pretrage; svi termini moraju da se nađu, kao prefiksi."""
+    alias = _ALIASES[kind]
+    if dialect == "sqlite":
+        table = FTS_TABLES[kind]
+        return (
+            f" JOIN {table} ON {table}.rowid = {alias}.id",
+            f"{table} MATCH :fts_query",
+            {"fts_query": " ".join(f'"{t}"*' for t in terms)},
+        )
+    # Postgres
+    where = _PG_VECTORS[kind].format(p=alias + ".") + " @@ to_tsquery('simple', :fts_query)"
+    if kind == "answers":
+        where += " AND " + _PG_ANSWERS_WHERE.format(p="a.")
+    return "", where, {"fts_query": " & ".join(f"{t}:*" for t in terms)}
+
+
+def search(db: Session, q: str, kind: str, user, after_id: Optional[int], limit: int) -> List[Dict]:
+    """
+    Pogoci jedne vrste, najnoviji prvi (keyset po id-ju opadajuće), samo iz formi koje korisnik
+    sme da vidi (ista pravila kao _can_view_form / _can_view_results). Vraća limit + 1 redova.
+    """
+    terms = _terms(q)
+    dialect = db.get_bind().dialect.name
+    columns, source, key = _SOURCES[kind]
+    join, where, params = _match(dialect, kind, terms)
+    visible, visible_params = permissions.visible_forms_sql("f", user)
+    conditions = [where, visible]
+    if kind == "answers":
+        conditions.append("q." + _IS_TEXT)
+    if after_id is not None:
+        conditions.append(f"{key} < :after_id")
+        params["after_id"] = after_id
+    sql = f"SELECT {columns} FROM {source}{join} WHERE " + " AND ".join(conditions) + f" ORDER BY {key} DESC LIMIT :limit"
+    rows = db.execute(text(sql), {**params, **visible_params, "limit": limit + 1}).fetchall()
+    return [
+        {
+            "kind": kind[:-1],
+            "id": r.id,
+            "form_id": r.form_id,
+            "form_name": r.form_name,
+            "question_id": r.question_id,
+            "text": r.text,
+        }
+        for r in rows
+    ]
@@ -0,0 +1,146 @@
+"""
+Idempotency-Key za POST zahteve koji menjaju podatke. Prvi odgovor se čuva u idempotency_keys
+(jedinstven ključ (scope, key), rok IDEMPOTENCY_TTL_HOURS), a ponovljen zahtev sa istim ključem
+dobija sačuvani odgovor bez ponovne provere i upisa.
+
+Brisanje isteklih ključeva u paketima:
+    python idempotency.py purge [--batch-size N]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import IdempotencyKeyModel
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class IdempotentRequest:
+    """
+    Omotač oko jednog zahteva. Bez ključa ne radi ništa osim commit-a, pa endpoint ima isti tok
+    sa i bez Idempotency-Key zaglavlja:
+
+        idem = IdempotentRequest(db, key, scope, payload)
+        replay = idem.replay()
+        if replay: return replay
+        ... upis ...
+        return idem.commit(body)
+    """
+
+    def __init__(self, db: Session, key: Optional[str], scope: str, payload: Any):
+        if key is not None and not (0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH):
+            raise HTTPException(status_code=400, detail="Idempotency-Key mora imati od 1 do 255 znakova.")
+        self.db = db
+        self.key = key
+        self.scope = scope
+        self.request_hash = fingerprint(payload) if key is not None else None
+        # True kada je commit izgubio trku sa paralelnim zahtevom i vratio njegov odgovor
+        self.replayed = False
+
+    def replay(self) -> Optional[JSONResponse]:
+        if self.key is None:
+            return None
+        row = self.db.execute(
+            select(IdempotencyKeyModel.request_hash, IdempotencyKeyModel.status_code, IdempotencyKeyModel.response_body)
+            .where(IdempotencyKeyModel.scope == self.scope, IdempotencyKeyModel.key == self.key,
+                   IdempotencyKeyModel.expires_at > _now())
+        ).first()
+        if row is None:
+            return None
+        if row.request_hash != self.request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key je već iskorišćen za drugačiji zahtev.")
+        return JSONResponse(status_code=row.status_code, content=json.loads(row.response_body),
+                            headers={"Idempotent-Replayed": "true"})
+
+    def commit(self, body: dict, status_code: int = 200) -> JSONResponse:
+        """
+        Čuva odgovor u istoj transakciji sa upisom i radi commit. Ako je paralelni zahtev sa istim
+        ključem stigao prvi, unique ograničenje poništava ovaj upis i vraća se njegov odgovor.
+        """
+        try:
+            if self.key is not None:
+                # istekao ključ može još da postoji dok ga purge ne obriše
+                self.db.execute(delete(IdempotencyKeyModel).where(
+                    IdempotencyKeyModel.scope == self.scope, IdempotencyKeyModel.key == self.key,
+                    IdempotencyKeyModel.expires_at <= _now(),
+                ))
+                # unique ograničenje se proverava već pri INSERT-u, ne tek pri commit-u
+                self.db.execute(insert(IdempotencyKeyModel).values(
+                    scope=self.scope,
+                    key=self.key,
+                    request_hash=self.request_hash,
+                    status_code=status_code,
+                    response_body=json.dumps(body),
+                    expires_at=_now() + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+                ))
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            replay = self.replay()
+            if replay is None:
+                raise
+            self.replayed = True
+            return replay
+        return JSONResponse(status_code=status_code, content=body)
+
+    def forget(self):
+        """Briše sačuvan odgovor kada posao potvrđen commit-om ipak nije prihvaćen (npr. red je zatvoren)."""
+        if self.key is None:
+            return
+        self.db.execute(delete(IdempotencyKeyModel).where(
+            IdempotencyKeyModel.scope == self.scope, IdempotencyKeyModel.key == self.key,
+            IdempotencyKeyModel.request_hash == self.request_hash,
+        ))
+        self.db.commit()
+
+
+def purge_expired(db: Session, batch_size: int = 1000) -> int:
+    """Briše istekle ključeve u paketima (kratke transakcije, bez dugog zaključavanja tabele)."""
+    total = 0
+    while True:
+        ids = select(IdempotencyKeyModel.id).where(IdempotencyKeyModel.expires_at <= _now()).limit(batch_size)
+        deleted = db.execute(
+            delete(IdempotencyKeyModel).where(IdempotencyKeyModel.id.in_(ids.scalar_subquery()))
+        ).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Purge expired idempotency keys.")
+    parser.add_argument("command", choices=["purge"])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        print(f"purged {purge_expired(db, args.batch_size)} expired idempotency keys")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+"""
+Upis popunjavanja: zajednički helper za direktan upis i opcioni write-behind režim
+(ANSWER_INGEST_MODE=queue). U write-behind režimu proverena popunjavanja se upisuju u lokalni
+spool fajl i ograničen red, zahtev se odmah potvrđuje (202), a pozadinska nit ih upisuje u bazu
+grupnim commit-om na svakih INGEST_FLUSH_MS ms ili INGEST_FLUSH_MAX popunjavanja.
+
+Spool je dnevnik: uz svaki grupni commit upisuje se linija sa potvrđenim id-jevima, a po
+pokretanju se ponovo šalju samo nepotvrđeni unosi. Pad između commit-a i te linije može dovesti
+do ponovnog upisa (at-least-once). Popunjavanja čiji upis nije uspeo ostaju nepotvrđena u
+spool-u i pokušavaju se ponovo sa rastućim razmakom (INGEST_RETRY_MS, udvostručava se do
+INGEST_RETRY_MAX_MS); posle INGEST_MAX_ATTEMPTS neuspeha prelaze u dead-letter fajl
+(INGEST_DEAD_LETTER_PATH) i tek tada se potvrđuju. Vreme popunjavanja se beleži pri prijemu,
+pa i zakasneli upis ide u pravu mesečnu particiju.
+"""
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import rollups
+from answer_types import AnswerRow, date_value, insert_answers
+from models import FormModel, SubmissionModel
+
+ANSWER_INGEST_MODE = os.getenv("ANSWER_INGEST_MODE", "direct")
+INGEST_QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", "10000"))
+INGEST_FLUSH_MS = int(os.getenv("INGEST_FLUSH_MS", "50"))
+INGEST_FLUSH_MAX = int(os.getenv("INGEST_FLUSH_MAX", "500"))
+INGEST_SPOOL_PATH = os.getenv("INGEST_SPOOL_PATH", os.path.join(tempfile.gettempdir(), "answers_ingest.spool"))
+INGEST_SPOOL_FSYNC = os.getenv("INGEST_SPOOL_FSYNC", "0") == "1"
+INGEST_DEAD_LETTER_PATH = os.getenv("INGEST_DEAD_LETTER_PATH", INGEST_SPOOL_PATH + ".dead")
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "8"))
+INGEST_RETRY_MS = int(os.getenv("INGEST_RETRY_MS", "500"))
+INGEST_RETRY_MAX_MS = int(os.getenv("INGEST_RETRY_MAX_MS", "60000"))
+
+logger = logging.getLogger(__name__)
+
+
+def bump_answers_version(db: Session, form_id: int):
+    db.query(FormModel).filter(FormModel.id == form_id).update(
+        {FormModel.answers_version: FormModel.answers_version + 1}, synchronize_session=False
+    )
+
+
+def persist_submissions(
+    db: Session, form_id: int, submissions: List[Tuple[Optional[int], List[AnswerRow], Optional[datetime]]]
+) -> List[int]:
+    """
+    Upisuje već proverena popunjavanja (user_id, redovi odgovora, vreme prijema): po jedan red u
+    submissions, sve odgovore sa tipiziranim kolonama jednim executemany (i izbore multiple
+    choice pitanja), rollup-ove i verziju odgovora forme. Vreme se upisuje eksplicitno (bez
+    njega: sada), a ne podrazumevanom vrednošću baze u trenutku upisa.
+    Commit ostaje pozivaocu; vraća id-jeve popunjavanja redom.
+    """
+    now = datetime.now(timezone.utc)
+    times = [submitted_at or now for _, _, submitted_at in submissions]
+    subs = [
+        SubmissionModel(form_id=form_id, user_id=user_id, submitted_at=submitted_at)
+        for (user_id, _, _), submitted_at in zip(submissions, times)
+    ]
+    db.add_all(subs)
+    db.flush()
+
+    answer_rows = []
+    selections = []
+    rollup_rows = []
+    for sub, (user_id, rows, _), submitted_at in zip(subs, submissions, times):
+        for row in rows:
+            # unosi iz spool-a stižu kao JSON liste; stariji spool nema tipizirane kolone
+            a = AnswerRow(*row)
+            answer_rows.append({
+                "question_id": a.question_id,
+                "user_id": user_id,
+                "value": a.value,
+                "submitted_at": submitted_at,
+                "submission_id": sub.id,
+                "option_id": a.option_id,
+                "value_num": a.value_num,
+                "value_date": date_value(a.type, a.value),
+            })
+            selections.append(tuple(a.selections))
+            rollup_rows.append(a)
+
+    # jedan executemany (insertmanyvalues: višeredni INSERT) umesto flush-a red po red
+    insert_answers(db, answer_rows, selections)
+    rollups.apply_answers(db, rollup_rows)
+    bump_answers_version(db, form_id)
+    return [sub.id for sub in subs]
+
+
+class QueueFull(Exception):
+    pass
+
+
+class QueueClosed(Exception):
+    pass
+
+
+@dataclass
+class PendingSubmission:
+    form_id: int
+    user_id: Optional[int]
+    answers: List[AnswerRow]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    submitted_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    attempts: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "id": self.id, "form_id": self.form_id, "user_id": self.user_id, "answers": self.answers,
+            "submitted_at": self.submitted_at.isoformat(),
+        })
+
+    @classmethod
+    def from_json(cls, rec: dict) -> "PendingSubmission":
+        # stariji spool nema submitted_at; tada je najbliže vreme ponovnog slanja
+        submitted_at = datetime.fromisoformat(rec["submitted_at"]) if rec.get("submitted_at") else datetime.now(timezone.utc)
+        return cls(
+            form_id=rec["form_id"], user_id=rec["user_id"], answers=[tuple(a) for a in rec["answers"]],
+            id=rec["id"], submitted_at=submitted_at,
+        )
+
+    def rows(self) -> Tuple[Optional[int], List[AnswerRow], datetime]:
+        return self.user_id, self.answers, self.submitted_at
+
+
+class IngestQueue:
+    def __init__(self, spool_path: str = INGEST_SPOOL_PATH, maxsize: int = INGEST_QUEUE_MAX,
+                 flush_ms: int = INGEST_FLUSH_MS, flush_max: int = INGEST_FLUSH_MAX,
+                 dead_letter_path: str = INGEST_DEAD_LETTER_PATH, max_attempts: int = INGEST_MAX_ATTEMPTS,
+                 retry_ms: int = INGEST_RETRY_MS, retry_max_ms: int = INGEST_RETRY_MAX_MS):
+        self.spool_path = spool_path
+        self.flush_ms = flush_ms
+        self.flush_max = flush_max
+        self.dead_letter_path = dead_letter_path
+        self.max_attempts = max_attempts
+        self.retry_ms = retry_ms
+        self.retry_max_ms = retry_max_ms
+        self._q: "queue.Queue[PendingSubmission]" = queue.Queue(maxsize=maxsize)
+        # (kada, popunjavanje) koja čekaju ponovni pokušaj; i dalje su nepotvrđena u spool-u
+        self._retry: List[Tuple[float, PendingSubmission]] = []
+        self._lock = threading.Lock()
+        self._spool = None
+        self._unconfirmed = 0
+        self._reserved = 0
+        self._bind = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {
+            "enqueued": 0, "rejected": 0, "committed": 0, "failed": 0, "retried": 0, "dead_lettered": 0, "replayed": 0,
+            "flushes": 0, "last_flush_size": 0, "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0,
+        }
+
+    # --- životni ciklus ---
+
+    def start(self, bind):
+        """Pokreće pisača (idempotentno) i ponovo šalje nepotvrđene unose iz spool-a."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._bind = bind
+            self._closed = False
+            pending = self._read_spool()
+            # spool se prepisuje samo nepotvrđenim unosima, pa ne raste preko restartova
+            os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+            self._spool = open(self.spool_path, "w", encoding="utf-8")
+            for item in pending:
+                self._spool.write(item.to_json() + "\n")
+                self._q.put(item)
+            self._spool.flush()
+            self._unconfirmed = len(pending)
+            self._stats["replayed"] += len(pending)
+            self._thread = threading.Thread(target=self._run, name="answers-ingest", daemon=True)
+            self._thread.start()
+
+    def drain(self, timeout: float = 30.0):
+        """
+        Zaustavlja prijem i čeka da se red isprazni u bazu. Popunjavanja koja čekaju ponovni
+        pokušaj ostaju u spool-u i šalju se pri sledećem pokretanju.
+        """
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._lock:
+            self._thread = None
+            self._retry = []
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+
+    # --- prijem ---
+
+    def _full(self) -> bool:
+        return 0 < self._q.maxsize <= self._q.qsize() + self._reserved
+
+    def reserve(self):
+        """
+        Zauzima mesto u redu pre nego što se prijem potvrdi drugde (npr. upis Idempotency-Key),
+        pa kasniji submit(reserved=True) ne može da dobije QueueFull. Vraća se sa release().
+        """
+        with self._lock:
+            if self._closed or self._thread is None:
+                raise QueueClosed()
+            if self._full():
+                self._stats["rejected"] += 1
+                raise QueueFull()
+            self._reserved += 1
+
+    def release(self):
+        with self._lock:
+            self._reserved -= 1
+
+    def submit(self, form_id: int, user_id: Optional[int], answers: List[AnswerRow],
+               item_id: Optional[str] = None, reserved: bool = False) -> str:
+        item = PendingSubmission(form_id=form_id, user_id=user_id, answers=[list(a) for a in answers])
+        if item_id is not None:
+            item.id = item_id
+        with self._lock:
+            if reserved:
+                self._reserved -= 1
+            if self._closed or self._thread is None:
+                raise QueueClosed()
+            if not reserved and self._full():
+                self._stats["rejected"] += 1
+                raise QueueFull()
+            # prvo spool, pa red: potvrđen zahtev je uvek na disku
+            self._spool.write(item.to_json() + "\n")
+            self._spool.flush()
+            if INGEST_SPOOL_FSYNC:
+                os.fsync(self._spool.fileno())
+            self._q.put_nowait(item)
+            self._unconfirmed += 1
+            self._stats["enqueued"] += 1
+        return item.id
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["queue_depth"] = self._q.qsize()
+            out["queue_max"] = self._q.maxsize
+            out["retry_pending"] = len(self._retry)
+            out["unconfirmed"] = self._unconfirmed
+            out["running"] = self._thread is not None and not self._closed
+        out["avg_flush_ms"] = round(out.pop("total_flush_ms") / out["flushes"], 3) if out["flushes"] else 0.0
+        return out
+
+    # --- pisač ---
+
+    def _run(self):
+        while True:
+            batch = self._due_retries()
+            if not batch:
+                try:
+                    batch.append(self._q.get(timeout=self._idle_wait()))
+                except queue.Empty:
+                    if self._closed:
+                        return
+                    continue
+            deadline = time.monotonic() + self.flush_ms / 1000
+            while len(batch) < self.flush_max:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _due_retries(self) -> List[PendingSubmission]:
+        now = time.monotonic()
+        due, waiting = [], []
+        with self._lock:
+            for when, item in self._retry:
+                if when <= now and len(due) < self.flush_max:
+                    due.append(item)
+                else:
+                    waiting.append((when, item))
+            self._retry = waiting
+        return due
+
+    def _idle_wait(self) -> float:
+        with self._lock:
+            if not self._retry:
+                return 0.2
+            return min(0.2, max(0.0, min(when for when, _ in self._retry) - time.monotonic()))
+
+    def _flush(self, batch: List[PendingSubmission]):
+        started = time.perf_counter()
+        by_form: Dict[int, List[PendingSubmission]] = {}
+        for item in batch:
+            by_form.setdefault(item.form_id, []).append(item)
+
+        done: List[str] = []
+        failed: List[Tuple[List[PendingSubmission], Exception]] = []
+        db = Session(bind=self._bind)
+        try:
+            try:
+                for form_id, items in by_form.items():
+                    persist_submissions(db, form_id, [it.rows() for it in items])
+                db.commit()
+                done = [item.id for item in batch]
+            except Exception:
+                # jedna loša forma (npr. obrisana u međuvremenu) ne sme da obori ostale
+                db.rollback()
+                for form_id, items in by_form.items():
+                    try:
+                        persist_submissions(db, form_id, [it.rows() for it in items])
+                        db.commit()
+                        done.extend(it.id for it in items)
+                    except Exception as exc:
+                        db.rollback()
+                        failed.append((items, exc))
+        finally:
+            db.close()
+
+        retry, dead = [], []
+        for items, exc in failed:
+            logger.warning(
+                "Ingest: upis %d popunjavanja za formu %d nije uspeo", len(items), items[0].form_id, exc_info=exc
+            )
+            for item in items:
+                item.attempts += 1
+                if item.attempts >= self.max_attempts:
+                    dead.append((item, exc))
+                else:
+                    retry.append(item)
+        if dead and not self._dead_letter(dead):
+            # bez dead-letter fajla ne sme da se potvrdi; pokušava se ponovo kasnije
+            retry.extend(item for item, _ in dead)
+            dead = []
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        now = time.monotonic()
+        with self._lock:
+            # potvrđuju se samo upisana i prebačena u dead-letter; ostala ostaju u spool-u
+            self._confirm(done + [item.id for item, _ in dead])
+            for item in retry:
+                delay_ms = min(self.retry_ms * 2 ** (item.attempts - 1), self.retry_max_ms)
+                self._retry.append((now + delay_ms / 1000, item))
+            s = self._stats
+            s["committed"] += len(done)
+            s["failed"] += len(batch) - len(done)
+            s["retried"] += len(retry)
+            s["dead_lettered"] += len(dead)
+            s["flushes"] += 1
+            s["last_flush_size"] = len(batch)
+            s["last_flush_ms"] = round(elapsed_ms, 3)
+            s["max_flush_ms"] = max(s["max_flush_ms"], round(elapsed_ms, 3))
+            s["total_flush_ms"] += elapsed_ms
+
+    def _dead_letter(self, dead: List[Tuple[PendingSubmission, Exception]]) -> bool:
+        """Popunjavanja koja ni posle max_attempts nisu upisana; format linije je kao u spool-u."""
+        try:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for item, exc in dead:
+                    rec = json.loads(item.to_json())
+                    rec.update(attempts=item.attempts, error=repr(exc))
+                    f.write(json.dumps(rec) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            logger.exception("Ingest: upis u dead-letter fajl %s nije uspeo", self.dead_letter_path)
+            return False
+        for item, _ in dead:
+            logger.error(
+                "Ingest: popunjavanje %s za formu %d prebačeno u %s posle %d pokušaja",
+                item.id, item.form_id, self.dead_letter_path, item.attempts,
+            )
+        return True
+
+    # --- spool ---
+
+    def _confirm(self, ids: List[str]):
+        """Poziva se pod lock-om posle commit-a; kad ništa ne čeka, spool se skraćuje."""
+        if not ids:
+            return
+        self._unconfirmed -= len(ids)
+        if self._spool is None:
+            return
+        if self._unconfirmed == 0:
+            self._spool.seek(0)
+            self._spool.truncate()
+        else:
+            self._spool.write(json.dumps({"confirmed": ids}) + "\n")
+        self._spool.flush()
+
+    def _read_spool(self) -> List[PendingSubmission]:
+        if not os.path.exists(self.spool_path):
+            return []
+        entries: Dict[str, PendingSubmission] = {}
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # poslednja linija može biti nedovršena ako je proces pao usred upisa
+                if "confirmed" in rec:
+                    for item_id in rec["confirmed"]:
+                        entries.pop(item_id, None)
+                else:
+                    entries[rec["id"]] = PendingSubmission.from_json(rec)
+        return list(entries.values())
+
+
+ingest_queue = IngestQueue()
+
+
+def queue_mode() -> bool:
+    return ANSWER_INGEST_MODE == "queue"
@@ -0,0 +1,94 @@
+"""baseline schema (users, forms, questions, options, collaborators, answers)
+
+Postojeće baze koje su napravljene pre migracija samo se obeleže:
+    alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("is_superadmin", sa.Boolean()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "forms",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("is_public", sa.Boolean()),
+        sa.Column("is_locked", sa.Boolean()),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_forms_id", "forms", ["id"])
+
+    op.create_table(
+        "questions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("form_id", sa.Integer(), sa.ForeignKey("forms.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("is_required", sa.Boolean()),
+        sa.Column("order", sa.Integer()),
+        sa.Column("max_choices", sa.Integer()),
+        sa.Column("image_url", sa.String()),
+    )
+    op.create_index("ix_questions_id", "questions", ["id"])
+
+    op.create_table(
+        "options",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("question_id", sa.Integer(), sa.ForeignKey("questions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("image_url", sa.String()),
+    )
+    op.create_index("ix_options_id", "options", ["id"])
+
+    op.create_table(
+        "collaborators",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("form_id", sa.Integer(), sa.ForeignKey("forms.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.UniqueConstraint("form_id", "user_id", name="uq_collab_form_user"),
+    )
+    op.create_index("ix_collaborators_form_id", "collaborators", ["form_id"])
+    op.create_index("ix_collaborators_user_id", "collaborators", ["user_id"])
+
+    op.create_table(
+        "answers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("question_id", sa.Integer(), sa.ForeignKey("questions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL")),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("submitted_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_answers_id", "answers", ["id"])
+
+
+def downgrade():
+    op.drop_table("answers")
+    op.drop_table("collaborators")
+    op.drop_table("options")
+    op.drop_table("questions")
+    op.drop_table("forms")
+    op.drop_table("users")
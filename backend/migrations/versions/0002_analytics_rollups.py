@@ -0,0 +1,42 @@
+"""analytics rollups (question_stats, answer_value_counts)
+
+Posle upgrade-a popuniti rollup-ove iz postojećih odgovora:
+    python rollups.py rebuild
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "question_stats",
+        sa.Column("question_id", sa.Integer(), sa.ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("answer_count", sa.Integer(), nullable=False),
+        sa.Column("num_count", sa.Integer(), nullable=False),
+        sa.Column("num_sum", sa.Float()),
+        sa.Column("num_min", sa.Float()),
+        sa.Column("num_max", sa.Float()),
+    )
+    op.create_table(
+        "answer_value_counts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("question_id", sa.Integer(), sa.ForeignKey("questions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("question_id", "value", name="uq_value_count_question_value"),
+    )
+
+
+def downgrade():
+    op.drop_table("answer_value_counts")
+    op.drop_table("question_stats")
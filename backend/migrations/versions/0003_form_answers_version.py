@@ -0,0 +1,24 @@
+"""forms.answers_version for analytics caching
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("forms") as batch:
+        batch.add_column(sa.Column("answers_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    with op.batch_alter_table("forms") as batch:
+        batch.drop_column("answers_version")
@@ -0,0 +1,81 @@
+"""submissions table and answers.submission_id
+
+Postojeći odgovori se grupišu u popunjavanja po (forma, korisnik, submitted_at). Svi odgovori
+jednog POST-a dobijaju isto vreme (now() na početku transakcije), pa je to najbolje dostupno
+pravilo; dva anonimna popunjavanja u istom trenutku se spajaju u jedno.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "submissions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("form_id", sa.Integer(), sa.ForeignKey("forms.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("submitted_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_submissions_form_id", "submissions", ["form_id"])
+
+    with op.batch_alter_table("answers") as batch:
+        batch.add_column(sa.Column("submission_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key(
+            "fk_answers_submission_id", "submissions", ["submission_id"], ["id"], ondelete="CASCADE"
+        )
+
+    op.execute("""
+        INSERT INTO submissions (form_id, user_id, submitted_at)
+        SELECT q.form_id, a.user_id, a.submitted_at
+        FROM answers a
+        JOIN questions q ON q.id = a.question_id
+        GROUP BY q.form_id, a.user_id, a.submitted_at
+    """)
+
+    if op.get_bind().dialect.name == "postgresql":
+        # COALESCE umesto IS NOT DISTINCT FROM da bi planer mogao da koristi hash join
+        op.execute("""
+            UPDATE answers a
+            SET submission_id = s.id
+            FROM questions q, submissions s
+            WHERE q.id = a.question_id
+              AND s.form_id = q.form_id
+              AND COALESCE(s.user_id, 0) = COALESCE(a.user_id, 0)
+              AND COALESCE(s.submitted_at, 'epoch') = COALESCE(a.submitted_at, 'epoch')
+        """)
+    else:
+        op.create_index("ix_submissions_backfill", "submissions", ["form_id", "user_id", "submitted_at"])
+        op.execute("""
+            UPDATE answers
+            SET submission_id = (
+                SELECT s.id
+                FROM submissions s
+                JOIN questions q ON q.form_id = s.form_id
+                WHERE q.id = answers.question_id
+                  AND s.user_id IS answers.user_id
+                  AND s.submitted_at IS answers.submitted_at
+            )
+        """)
+        op.drop_index("ix_submissions_backfill", "submissions")
+
+    # indeks tek posle popunjavanja, da UPDATE ne održava indeks red po red
+    op.create_index("ix_answers_submission_id", "answers", ["submission_id"])
+
+
+def downgrade():
+    op.drop_index("ix_answers_submission_id", "answers")
+    with op.batch_alter_table("answers") as batch:
+        batch.drop_constraint("fk_answers_submission_id", type_="foreignkey")
+        batch.drop_column("submission_id")
+    op.drop_index("ix_submissions_form_id", "submissions")
+    op.drop_table("submissions")
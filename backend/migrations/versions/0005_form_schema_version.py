@@ -0,0 +1,24 @@
+"""forms.schema_version for cached answer validators
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("forms") as batch:
+        batch.add_column(sa.Column("schema_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    with op.batch_alter_table("forms") as batch:
+        batch.drop_column("schema_version")
@@ -0,0 +1,168 @@
+"""typed answer columns and answer_selections
+
+answers dobija option_id, value_num i value_date, a multiple choice izbori idu u
+answer_selections (jedan red po izabranoj opciji). Postojeći odgovori se popunjavaju iz
+answers.value pravilima koja su važila pri predaji u trenutku ove revizije, pitanje po pitanje
+i u paketima; tekstualna pitanja se preskaču jer za njih sve kolone ostaju NULL. Pravila su
+kopirana ovde (ne uvoze se iz answer_types), da kasnije izmene aplikacije ne menjaju ovu migraciju.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from datetime import date, datetime, timezone
+from math import isfinite
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+TYPED_QUESTION_TYPES = (
+    "single_choice", "radio", "numeric_choice", "multiple_choice", "checkbox",
+    "number", "numeric", "date", "datetime",
+)
+BATCH_SIZE = 5000
+
+_answers = sa.table(
+    "answers",
+    sa.column("id", sa.Integer),
+    sa.column("question_id", sa.Integer),
+    sa.column("value", sa.String),
+    sa.column("option_id", sa.Integer),
+    sa.column("value_num", sa.Float),
+    sa.column("value_date", sa.DateTime(timezone=True)),
+)
+_selections = sa.table("answer_selections", sa.column("answer_id", sa.Integer), sa.column("option_id", sa.Integer))
+_options = sa.table("options", sa.column("id", sa.Integer), sa.column("question_id", sa.Integer), sa.column("text", sa.String))
+
+_RETYPE = (
+    _answers.update()
+    .where(_answers.c.id == sa.bindparam("b_id"))
+    .values(
+        option_id=sa.bindparam("b_option_id"),
+        value_num=sa.bindparam("b_value_num"),
+        value_date=sa.bindparam("b_value_date"),
+    )
+)
+
+
+def _number(value):
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return None
+    return x if isfinite(x) else None
+
+
+def _parse_id(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _typed_fields(qtype, value, option_ids, number_by_id):
+    """(option_id, value_num, selections), kao answer_types.typed_fields u reviziji 0007."""
+    kind = {"radio": "single_choice", "checkbox": "multiple_choice"}.get(qtype, qtype)
+    if kind in ("single_choice", "numeric_choice"):
+        oid = _parse_id(value)
+        if oid not in option_ids:
+            return None, None, ()
+        return oid, number_by_id.get(oid) if kind == "numeric_choice" else None, ()
+    if kind == "multiple_choice":
+        seen = []
+        for part in str(value).split(","):
+            oid = _parse_id(part)
+            if oid in option_ids and oid not in seen:
+                seen.append(oid)
+        return None, None, tuple(seen)
+    if kind in ("number", "numeric"):
+        return None, _number(value), ()
+    return None, None, ()
+
+
+def _date_value(qtype, value):
+    try:
+        if qtype == "date":
+            d = date.fromisoformat(value)
+            return datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+        if qtype == "datetime":
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError, AttributeError):
+        pass
+    return None
+
+
+def _backfill_question(conn, question_id, qtype):
+    opts = conn.execute(sa.select(_options.c.id, _options.c.text).where(_options.c.question_id == question_id)).all()
+    option_ids = frozenset(o.id for o in opts)
+    numbers = {o.id: _number(o.text) for o in opts if _number(o.text) is not None}
+
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            sa.select(_answers.c.id, _answers.c.value)
+            .where(_answers.c.question_id == question_id, _answers.c.id > last_id)
+            .order_by(_answers.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            return
+        params, selections = [], []
+        for aid, value in batch:
+            option_id, value_num, sel = _typed_fields(qtype, value, option_ids, numbers)
+            params.append({
+                "b_id": aid, "b_option_id": option_id, "b_value_num": value_num,
+                "b_value_date": _date_value(qtype, value),
+            })
+            selections.extend({"answer_id": aid, "option_id": oid} for oid in sel)
+        conn.execute(_RETYPE, params)
+        if selections:
+            conn.execute(_selections.insert(), selections)
+        last_id = batch[-1].id
+
+
+def upgrade():
+    with op.batch_alter_table("answers") as batch:
+        batch.add_column(sa.Column("option_id", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("value_num", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("value_date", sa.DateTime(timezone=True), nullable=True))
+        batch.create_foreign_key(
+            "fk_answers_option_id", "options", ["option_id"], ["id"], ondelete="SET NULL"
+        )
+
+    op.create_table(
+        "answer_selections",
+        sa.Column("answer_id", sa.Integer(), sa.ForeignKey("answers.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("option_id", sa.Integer(), sa.ForeignKey("options.id", ondelete="CASCADE"), primary_key=True),
+    )
+
+    conn = op.get_bind()
+    questions = conn.execute(
+        sa.text("SELECT id, type FROM questions WHERE type IN :types ORDER BY id")
+        .bindparams(sa.bindparam("types", expanding=True)),
+        {"types": list(TYPED_QUESTION_TYPES)},
+    ).all()
+    for qid, qtype in questions:
+        _backfill_question(conn, qid, qtype)
+
+    # indeksi tek posle popunjavanja, da UPDATE ne održava indeks red po red
+    op.create_index("ix_answers_option_id", "answers", ["option_id"])
+    op.create_index("ix_answer_selections_option_id", "answer_selections", ["option_id"])
+
+
+def downgrade():
+    op.drop_index("ix_answer_selections_option_id", "answer_selections")
+    op.drop_table("answer_selections")
+    op.drop_index("ix_answers_option_id", "answers")
+    with op.batch_alter_table("answers") as batch:
+        batch.drop_constraint("fk_answers_option_id", type_="foreignkey")
+        batch.drop_column("value_date")
+        batch.drop_column("value_num")
+        batch.drop_column("option_id")
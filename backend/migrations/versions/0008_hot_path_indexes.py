@@ -0,0 +1,46 @@
+"""indexes for answer, export and form listing queries
+
+Na Postgres-u se indeksi prave sa CONCURRENTLY (van transakcije), da upis odgovora ne stoji
+dok se indeks nad answers gradi.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_answers_question_submitted", "answers", ["question_id", "submitted_at"]),
+    ("ix_questions_form_order", "questions", ["form_id", "order"]),
+    ("ix_options_question_id", "options", ["question_id"]),
+    ("ix_forms_owner_id", "forms", ["owner_id"]),
+    ("ix_forms_public", "forms", ["is_public", "id"]),
+    # (form_id, submitted_at, id) pokriva i pretragu samo po form_id
+    ("ix_submissions_form_submitted", "submissions", ["form_id", "submitted_at", "id"]),
+]
+
+
+def _create(name, table, columns):
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        op.create_index(name, table, columns)
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        _create(name, table, columns)
+    op.drop_index("ix_submissions_form_id", "submissions")
+
+
+def downgrade():
+    op.create_index("ix_submissions_form_id", "submissions", ["form_id"])
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table)
@@ -0,0 +1,42 @@
+"""composite indexes for keyset-paginated form listings
+
+(owner_id) i (user_id) se zamenjuju sa (owner_id, id) i (user_id, form_id): strana liste
+formi se tada čita redom iz indeksa, bez sortiranja svih formi korisnika.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+REPLACED = [
+    # (novi, tabela, kolone, stari, kolone starog)
+    ("ix_forms_owner", "forms", ["owner_id", "id"], "ix_forms_owner_id", ["owner_id"]),
+    ("ix_collaborators_user_form", "collaborators", ["user_id", "form_id"], "ix_collaborators_user_id", ["user_id"]),
+]
+
+
+def _create(name, table, columns):
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        op.create_index(name, table, columns)
+
+
+def upgrade():
+    for name, table, columns, old, _ in REPLACED:
+        _create(name, table, columns)
+        op.drop_index(old, table)
+
+
+def downgrade():
+    for name, table, _, old, old_columns in reversed(REPLACED):
+        _create(old, table, old_columns)
+        op.drop_index(name, table)
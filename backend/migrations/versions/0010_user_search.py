@@ -0,0 +1,35 @@
+"""substring search index for users
+
+Postgres: pg_trgm GIN indeksi nad username i email (CONCURRENTLY, van transakcije).
+SQLite: FTS5 trigram tabela users_search sa trigerima; popunjava se iz postojećih korisnika.
+Naredbe su u user_search.py, isto kao za create_all.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+import user_search
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            for statement in user_search.ddl(dialect, concurrently=True):
+                op.execute(statement)
+    else:
+        for statement in user_search.ddl(dialect):
+            op.execute(statement)
+
+
+def downgrade():
+    for statement in user_search.drop_ddl(op.get_bind().dialect.name):
+        op.execute(statement)
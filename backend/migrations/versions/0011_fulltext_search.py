@@ -0,0 +1,45 @@
+"""full-text search indexes for forms, questions and text answers
+
+Postgres: GIN indeksi nad to_tsvector izrazima (CONCURRENTLY; nad particionisanom answers
+to nije podržano, pa se taj indeks pravi običnim CREATE INDEX). SQLite: FTS5 tabele sa
+trigerima, popunjene iz postojećih redova. Naredbe su u fulltext.py, isto kao za create_all.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+import fulltext
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def _answers_partitioned(bind) -> bool:
+    return bind.exec_driver_sql("SELECT relkind FROM pg_class WHERE oid = 'answers'::regclass").scalar() == "p"
+
+
+def upgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        partitioned = _answers_partitioned(bind)
+        with op.get_context().autocommit_block():
+            for kind in fulltext.KINDS:
+                concurrently = not (kind == "answers" and partitioned)
+                for statement in fulltext.ddl(dialect, kind, concurrently=concurrently):
+                    op.execute(statement)
+    else:
+        for kind in fulltext.KINDS:
+            for statement in fulltext.ddl(dialect, kind):
+                op.execute(statement)
+
+
+def downgrade():
+    for kind in reversed(fulltext.KINDS):
+        for statement in fulltext.drop_ddl(op.get_bind().dialect.name, kind):
+            op.execute(statement)
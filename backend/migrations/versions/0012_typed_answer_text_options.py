@@ -0,0 +1,122 @@
+"""map choice answers stored as option text to option ids; reset rollups
+
+Analitika i rollup-ovi od ove revizije čitaju samo tipizirane kolone (option_id,
+answer_selections, value_num). Stariji choice odgovori sačuvani kao tekst opcije (npr. "Plava"
+umesto id-ja) u reviziji 0007 nisu dobili option_id, pa se ovde povezuju sa opcijom po tekstu,
+bez obzira na velika slova. Pravila su kopirana ovde (ne uvoze se iz answer_types).
+
+Ključevi u answer_value_counts su sada id opcije odnosno broj, pa se postojeći rollup-ovi brišu;
+pitanje bez rollup-a analitika računa iz answers, a prva sledeća predaja ga ponovo gradi
+(ili odmah: python rollups.py rebuild).
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from math import isfinite
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+SINGLE_TYPES = ("single_choice", "radio", "numeric_choice")
+MULTI_TYPES = ("multiple_choice", "checkbox")
+BATCH_SIZE = 5000
+
+_answers = sa.table(
+    "answers",
+    sa.column("id", sa.Integer),
+    sa.column("question_id", sa.Integer),
+    sa.column("value", sa.String),
+    sa.column("option_id", sa.Integer),
+    sa.column("value_num", sa.Float),
+)
+_selections = sa.table("answer_selections", sa.column("answer_id", sa.Integer), sa.column("option_id", sa.Integer))
+_options = sa.table("options", sa.column("id", sa.Integer), sa.column("question_id", sa.Integer), sa.column("text", sa.String))
+
+_SET_OPTION = (
+    _answers.update()
+    .where(_answers.c.id == sa.bindparam("b_id"))
+    .values(option_id=sa.bindparam("b_option_id"), value_num=sa.bindparam("b_value_num"))
+)
+
+
+def _number(value):
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return None
+    return x if isfinite(x) else None
+
+
+def _unmapped(question_id, multi, last_id):
+    q = sa.select(_answers.c.id, _answers.c.value).where(
+        _answers.c.question_id == question_id, _answers.c.id > last_id
+    )
+    if multi:
+        has_selection = sa.exists().where(_selections.c.answer_id == _answers.c.id)
+        q = q.where(~has_selection)
+    else:
+        q = q.where(_answers.c.option_id.is_(None))
+    return q.order_by(_answers.c.id).limit(BATCH_SIZE)
+
+
+def _map_question(conn, question_id, qtype):
+    opts = conn.execute(sa.select(_options.c.id, _options.c.text).where(_options.c.question_id == question_id)).all()
+    by_text = {(o.text or "").strip().lower(): o.id for o in opts if (o.text or "").strip()}
+    if not by_text:
+        return
+    numbers = {o.id: _number(o.text) for o in opts}
+    multi = qtype in MULTI_TYPES
+
+    last_id = 0
+    while True:
+        batch = conn.execute(_unmapped(question_id, multi, last_id)).all()
+        if not batch:
+            return
+        params, selections = [], []
+        for aid, value in batch:
+            if multi:
+                seen = []
+                for part in str(value or "").split(","):
+                    oid = by_text.get(part.strip().lower())
+                    if oid is not None and oid not in seen:
+                        seen.append(oid)
+                selections.extend({"answer_id": aid, "option_id": oid} for oid in seen)
+            else:
+                oid = by_text.get(str(value or "").strip().lower())
+                if oid is not None:
+                    value_num = numbers.get(oid) if qtype == "numeric_choice" else None
+                    params.append({"b_id": aid, "b_option_id": oid, "b_value_num": value_num})
+        if params:
+            conn.execute(_SET_OPTION, params)
+        if selections:
+            conn.execute(_selections.insert(), selections)
+        last_id = batch[-1].id
+
+
+def _reset_rollups(conn):
+    conn.execute(sa.text("DELETE FROM answer_value_counts"))
+    conn.execute(sa.text("DELETE FROM question_stats"))
+
+
+def upgrade():
+    conn = op.get_bind()
+    questions = conn.execute(
+        sa.text("SELECT id, type FROM questions WHERE type IN :types ORDER BY id")
+        .bindparams(sa.bindparam("types", expanding=True)),
+        {"types": list(SINGLE_TYPES + MULTI_TYPES)},
+    ).all()
+    for qid, qtype in questions:
+        _map_question(conn, qid, qtype)
+    _reset_rollups(conn)
+
+
+def downgrade():
+    # povezani id-jevi ostaju (tačni su i za staru šemu), ali stari kod čita drugačije ključeve
+    _reset_rollups(op.get_bind())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, func, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, DateTime, Float, func, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from enum import Enum
@@ -20,10 +20,18 @@ class FormModel(Base):
     is_public = Column(Boolean, default=False)
     is_locked = Column(Boolean, default=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # raste sa svakom promenom odgovora ili pitanja; ključ za keš analitike i ETag
+    answers_version = Column(Integer, nullable=False, default=0, server_default="0")
+    schema_version = Column(Integer, nullable=False, default=0, server_default="0")
     user = relationship("UserModel", backref="forms")
     questions = relationship("QuestionModel", back_populates="form", cascade="all, delete", passive_deletes=True)
     collaborators = relationship("CollaboratorModel",back_populates="form", cascade="all, delete-orphan",passive_deletes=True
 )
+    __table_args__ = (
+        # forme vlasnika po id-ju (keyset strane liste)
+        Index("ix_forms_owner", "owner_id", "id"),
+        Index("ix_forms_public", "is_public", "id"),
+    )
      
 
 class QuestionModel(Base):
@@ -39,6 +47,9 @@ class QuestionModel(Base):
     options = relationship("OptionModel", back_populates="question", cascade="all, delete")
     max_choices = Column(Integer, nullable=True)
     image_url = Column(String, nullable=True)
+    __table_args__ = (
+        Index("ix_questions_form_order", "form_id", "order"),
+    )
 
 
 class OptionModel(Base):
@@ -49,15 +60,20 @@ class OptionModel(Base):
     text = Column(String, nullable=False)
     image_url = Column(String, nullable=True)
     question = relationship("QuestionModel", back_populates="options")
+    __table_args__ = (
+        Index("ix_options_question_id", "question_id"),
+    )
 
 class CollaboratorModel(Base):
     __tablename__ = "collaborators"
     id = Column(Integer, primary_key=True)
     form_id = Column(Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     role = Column(String, nullable=False) 
     __table_args__ = (
         UniqueConstraint('form_id', 'user_id', name='uq_collab_form_user'),
+        # forme saradnika po id-ju (keyset strane liste)
+        Index("ix_collaborators_user_form", "user_id", "form_id"),
     )  
     form = relationship("FormModel", back_populates="collaborators", passive_deletes=True)
     user = relationship("UserModel", passive_deletes=True)
@@ -70,6 +86,69 @@ class AnswerModel(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     value = Column(String, nullable=False)
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
+    submission_id = Column(Integer, ForeignKey("submissions.id", ondelete="CASCADE"), nullable=True, index=True)
+    # tipizirane kopije value (vidi answer_types.py); NULL kada se vrednost ne odnosi na tip pitanja
+    option_id = Column(Integer, ForeignKey("options.id", ondelete="SET NULL"), nullable=True, index=True)
+    value_num = Column(Float, nullable=True)
+    value_date = Column(DateTime(timezone=True), nullable=True)
+    __table_args__ = (
+        # odgovori pitanja hronološki (izvozi, analitika, brisanje pitanja)
+        Index("ix_answers_question_submitted", "question_id", "submitted_at"),
+    )
+
+class AnswerSelectionModel(Base):
+    __tablename__ = "answer_selections"
+
+    answer_id = Column(Integer, ForeignKey("answers.id", ondelete="CASCADE"), primary_key=True)
+    option_id = Column(Integer, ForeignKey("options.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class SubmissionModel(Base):
+    __tablename__ = "submissions"
+
+    id = Column(Integer, primary_key=True)
+    form_id = Column(Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    submitted_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        # lista popunjavanja forme, najnovija prva
+        Index("ix_submissions_form_submitted", "form_id", "submitted_at", "id"),
+    )
+
+class AnswerValueCountModel(Base):
+    __tablename__ = "answer_value_counts"
+
+    id = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+    value = Column(String, nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+    __table_args__ = (
+        UniqueConstraint("question_id", "value", name="uq_value_count_question_value"),
+    )
+
+class QuestionStatsModel(Base):
+    __tablename__ = "question_stats"
+
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    answer_count = Column(Integer, nullable=False, default=0)
+    num_count = Column(Integer, nullable=False, default=0)
+    num_sum = Column(Float, nullable=True)
+    num_min = Column(Float, nullable=True)
+    num_max = Column(Float, nullable=True)
+
+class IdempotencyKeyModel(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String(200), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_scope_key"),
+    )
 
 class QuestionType(str, Enum):
     single_choice = "single_choice"
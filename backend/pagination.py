@@ -0,0 +1,49 @@
+"""
+Keyset (cursor) paginacija za liste. Telo odgovora ostaje niz; kursor sledeće strane je u
+zaglavlju X-Next-Cursor (nema ga na poslednjoj strani). Kursor je neproziran base64 JSON sa
+ključem poslednjeg vraćenog reda, pa je cena strane ista bez obzira na to koliko je duboko.
+"""
+import base64
+import binascii
+import json
+import os
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "1000"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *types: Callable) -> Optional[tuple]:
+    """Vrednosti ključa iz kursora, konvertovane datim tipovima; None bez kursora."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(t(v) for t, v in zip(types, values))
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Neispravan cursor.")
+
+
+def split_page(rows: Sequence, limit: int, key: Callable[[Any], tuple]) -> Tuple[List, Optional[str]]:
+    """Redovi su pročitani sa limit + 1; višak znači da postoji sledeća strana."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]):
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,260 @@
+"""
+Opciono particionisanje answers tabele na Postgres-u (RANGE po submitted_at, jedna particija
+po mesecu: answers_pYYYYMM, plus answers_default). VACUUM i održavanje indeksa tada rade
+nad mesečnim delovima, a stari meseci se odvajaju bez brisanja red po red.
+
+Jednokratna konverzija (u prozoru održavanja, tabela je zaključana dok se podaci kopiraju):
+    python partitions.py convert [--ahead 3]
+Redovno održavanje (npr. cron jednom dnevno):
+    python partitions.py maintain [--ahead 3] [--detach-older-than MESECI]
+    python partitions.py status
+
+Posle konverzije primarni ključ je (id, submitted_at), a answer_selections.answer_id više nema
+spoljni ključ ka answers (Postgres to ne dozvoljava bez ključa particije); izbori se zato
+brišu eksplicitno pre odgovora (delete_question, delete_form), a i kaskadno sa opcijama.
+Odvojene particije ostaju kao obične tabele (arhiva); rollup-ovi ih i dalje broje.
+SQLite i neparticionisan Postgres rade kao i ranije.
+"""
+import argparse
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import AddConstraint, ForeignKeyConstraint
+
+import fulltext
+from models import AnswerModel, SubmissionModel
+
+PARTITION_PREFIX = "answers_p"
+DEFAULT_PARTITION = "answers_default"
+_PARTITION_NAME = re.compile(r"^answers_p(\d{4})(\d{2})$")
+
+_partitioned: Dict[str, bool] = {}
+
+
+def _month(dt: datetime) -> Tuple[int, int]:
+    return dt.year, dt.month
+
+
+def add_months(ym: Tuple[int, int], n: int) -> Tuple[int, int]:
+    y, m = ym
+    idx = y * 12 + (m - 1) + n
+    return idx // 12, idx % 12 + 1
+
+
+def partition_name(ym: Tuple[int, int]) -> str:
+    return f"{PARTITION_PREFIX}{ym[0]:04d}{ym[1]:02d}"
+
+
+def month_start(ym: Tuple[int, int]) -> datetime:
+    return datetime(ym[0], ym[1], 1, tzinfo=timezone.utc)
+
+
+def _literal(dt: datetime) -> str:
+    # granice particija su DDL, pa idu kao literal; vrednosti pravimo sami
+    return "'" + dt.strftime("%Y-%m-%d %H:%M:%S+00") + "'"
+
+
+def is_partitioned(db: Session) -> bool:
+    """Da li je answers particionisana tabela (keš po bazi; SQLite nikad nije)."""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    key = str(bind.engine.url)
+    if key not in _partitioned:
+        _partitioned[key] = bool(db.execute(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_partitioned_table pt
+                JOIN pg_class c ON c.oid = pt.partrelid
+                WHERE c.relname = 'answers' AND c.relnamespace = to_regnamespace(current_schema())
+            )
+        """)).scalar())
+    return _partitioned[key]
+
+
+def answer_time_bounds(db: Session, form_id: int) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Najraniji i najkasniji submitted_at popunjavanja forme, ako je answers particionisana.
+    Odgovori imaju isto submitted_at kao njihovo popunjavanje (ista transakcija), pa uslov
+    BETWEEN nad tim granicama ne menja rezultat, a Postgres preskače ostale particije.
+    """
+    if not is_partitioned(db):
+        return None
+    lo, hi = db.query(func.min(SubmissionModel.submitted_at), func.max(SubmissionModel.submitted_at)).filter(
+        SubmissionModel.form_id == form_id
+    ).one()
+    if lo is None:
+        return None
+    return lo, hi
+
+
+def range_pruning_clause(db: Session, since: datetime, until: datetime, alias: str = "a") -> Tuple[str, dict]:
+    """SQL uslov koji ograničava odgovore na [since, until], ako je answers particionisana."""
+    if not is_partitioned(db):
+        return "", {}
+    return (
+        f" AND {alias}.submitted_at BETWEEN :prune_since AND :prune_until",
+        {"prune_since": since, "prune_until": until},
+    )
+
+
+def pruning_clause(db: Session, form_id: int, alias: str = "a") -> Tuple[str, dict]:
+    """SQL uslov (sa parametrima) koji omogućava partition pruning za odgovore jedne forme."""
+    bounds = answer_time_bounds(db, form_id)
+    if bounds is None:
+        return "", {}
+    return range_pruning_clause(db, bounds[0], bounds[1], alias)
+
+
+def list_partitions(db: Session) -> List[str]:
+    return [r[0] for r in db.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'answers' AND p.relnamespace = to_regnamespace(current_schema())
+        ORDER BY c.relname
+    """))]
+
+
+def _create_month(db: Session, ym: Tuple[int, int], existing: List[str]) -> bool:
+    """
+    Pravi mesečnu particiju ako ne postoji. Redovi tog meseca koji su u međuvremenu završili u
+    answers_default (održavanje nije pokrenuto na vreme) prebacuju se u novu particiju.
+    """
+    name = partition_name(ym)
+    if name in existing:
+        return False
+    lo, hi = _literal(month_start(ym)), _literal(month_start(add_months(ym, 1)))
+    db.execute(text(f"CREATE TABLE {name} (LIKE answers INCLUDING DEFAULTS)"))
+    if DEFAULT_PARTITION in existing:
+        db.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE submitted_at >= {lo} AND submitted_at < {hi} RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """))
+    db.execute(text(f"ALTER TABLE answers ATTACH PARTITION {name} FOR VALUES FROM ({lo}) TO ({hi})"))
+    existing.append(name)
+    return True
+
+
+def ensure_partitions(db: Session, ahead: int = 3, since: Optional[Tuple[int, int]] = None) -> List[str]:
+    """Particije od since (podrazumevano tekući mesec) do ahead meseci unapred; vraća nove."""
+    existing = list_partitions(db)
+    now = _month(datetime.now(timezone.utc))
+    ym = since or now
+    created = []
+    while ym <= add_months(now, ahead):
+        if _create_month(db, ym, existing):
+            created.append(partition_name(ym))
+        ym = add_months(ym, 1)
+    return created
+
+
+def detach_older_than(db: Session, months: int) -> List[str]:
+    """Odvaja mesečne particije starije od datog broja meseci; tabele ostaju u bazi."""
+    cutoff = add_months(_month(datetime.now(timezone.utc)), -months)
+    detached = []
+    for name in list_partitions(db):
+        m = _PARTITION_NAME.match(name)
+        if m and (int(m.group(1)), int(m.group(2))) < cutoff:
+            db.execute(text(f"ALTER TABLE answers DETACH PARTITION {name}"))
+            detached.append(name)
+    return detached
+
+
+def convert(db: Session, ahead: int = 3) -> int:
+    """
+    Pretvara answers u particionisanu tabelu u jednoj transakciji: stara tabela se preimenuje,
+    nova se pravi sa istim kolonama, podrazumevanim vrednostima i sekvencom, podaci se kopiraju,
+    a indeksi i spoljni ključevi se prave iz models.AnswerModel. Vraća broj prebačenih redova.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        raise RuntimeError("Particionisanje answers tabele je podržano samo na Postgres-u.")
+    if is_partitioned(db):
+        raise RuntimeError("Tabela answers je već particionisana.")
+
+    table = AnswerModel.__table__
+    db.execute(text("LOCK TABLE answers IN ACCESS EXCLUSIVE MODE"))
+    # ključ particije ne sme biti NULL; popunjavanje i njegovi odgovori dobijaju isto vreme
+    db.execute(text("UPDATE submissions SET submitted_at = 'epoch' WHERE submitted_at IS NULL"))
+    db.execute(text("""
+        UPDATE answers a SET submitted_at = COALESCE(
+            (SELECT s.submitted_at FROM submissions s WHERE s.id = a.submission_id), 'epoch')
+        WHERE a.submitted_at IS NULL
+    """))
+
+    db.execute(text("ALTER TABLE answers RENAME TO answers_unpartitioned"))
+    db.execute(text("ALTER TABLE answers_unpartitioned RENAME CONSTRAINT answers_pkey TO answers_unpartitioned_pkey"))
+    for idx in table.indexes:
+        db.execute(text(f"ALTER INDEX IF EXISTS {idx.name} RENAME TO {idx.name}_unpartitioned"))
+    answers_fts = fulltext.PG_INDEXES["answers"]
+    db.execute(text(f"ALTER INDEX IF EXISTS {answers_fts} RENAME TO {answers_fts}_unpartitioned"))
+
+    db.execute(text(
+        "CREATE TABLE answers (LIKE answers_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (submitted_at)"
+    ))
+    db.execute(text("ALTER TABLE answers ALTER COLUMN submitted_at SET NOT NULL"))
+    db.execute(text("ALTER TABLE answers ADD CONSTRAINT answers_pkey PRIMARY KEY (id, submitted_at)"))
+    db.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF answers DEFAULT"))
+
+    first = db.execute(text(
+        "SELECT min(submitted_at) FROM answers_unpartitioned WHERE submitted_at > 'epoch'"
+    )).scalar()
+    ensure_partitions(db, ahead, since=_month(first.astimezone(timezone.utc)) if first else None)
+
+    moved = db.execute(text("INSERT INTO answers SELECT * FROM answers_unpartitioned")).rowcount
+
+    for idx in table.indexes:
+        idx.create(db.connection())
+    # indeks pretrage nije u metapodacima (vidi fulltext.py)
+    for statement in fulltext.ddl("postgresql", "answers"):
+        db.execute(text(statement))
+    for constraint in table.constraints:
+        if isinstance(constraint, ForeignKeyConstraint):
+            db.execute(AddConstraint(constraint))
+
+    db.execute(text("ALTER SEQUENCE answers_id_seq OWNED BY answers.id"))
+    # CASCADE uklanja i spoljni ključ answer_selections.answer_id
+    db.execute(text("DROP TABLE answers_unpartitioned CASCADE"))
+    db.commit()
+    _partitioned.clear()
+    db.execute(text("ANALYZE answers"))
+    return moved
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Postgres partitioning of the answers table.")
+    parser.add_argument("command", choices=["convert", "maintain", "status"])
+    parser.add_argument("--ahead", type=int, default=3, help="broj budućih mesečnih particija")
+    parser.add_argument("--detach-older-than", type=int, default=None, metavar="MONTHS")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        if args.command == "convert":
+            print(f"answers is now partitioned by month ({convert(db, args.ahead)} rows moved).")
+            return 0
+        if not is_partitioned(db):
+            print("answers is not partitioned (run: python partitions.py convert).")
+            return 1
+        if args.command == "maintain":
+            for name in ensure_partitions(db, args.ahead):
+                print(f"created {name}")
+            if args.detach_older_than is not None:
+                for name in detach_older_than(db, args.detach_older_than):
+                    print(f"detached {name}")
+            db.commit()
+        for name in list_partitions(db):
+            print(name)
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
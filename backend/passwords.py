@@ -0,0 +1,100 @@
+"""
+bcrypt heširanje i provera lozinki van request niti. Posao ide u poseban, ograničen pool
+procesa (PASSWORD_WORKERS; 0 = thread pool, npr. gde procesi nisu dozvoljeni), pa talas prijava
+ne zauzima niti koje opslužuju /api/forms/*.
+
+Broj istovremenih operacija je ograničen (PASSWORD_MAX_PENDING, uključujući one koje čekaju
+slobodan proces); preko toga se odmah vraća 503 sa Retry-After umesto da kašnjenje raste svima.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(2, os.cpu_count() or 1))))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", str(max(PASSWORD_WORKERS, 1) * 8)))
+PASSWORD_RETRY_AFTER = os.getenv("PASSWORD_RETRY_AFTER", "1")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+rejected = 0
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _get_pool() -> Executor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: aplikacija ima pozadinske niti (ingest, izvozi), a fork bi kopirao njihove lock-ove
+            _pool = ProcessPoolExecutor(PASSWORD_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+class _Slot:
+    """Zauzima jedno od PASSWORD_MAX_PENDING mesta ili odmah odbija zahtev sa 503."""
+
+    def __enter__(self):
+        global _pending, rejected
+        with _pending_lock:
+            if _pending >= PASSWORD_MAX_PENDING:
+                rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Previše istovremenih prijava, pokušajte ponovo za trenutak.",
+                    headers={"Retry-After": PASSWORD_RETRY_AFTER},
+                )
+            _pending += 1
+
+    def __exit__(self, *exc):
+        global _pending
+        with _pending_lock:
+            _pending -= 1
+
+
+async def _run(fn, *args):
+    with _Slot():
+        if PASSWORD_WORKERS <= 0:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run(_verify, plain_password, hashed_password)
+
+
+def stats() -> dict:
+    return {
+        "workers": PASSWORD_WORKERS,
+        "max_pending": PASSWORD_MAX_PENDING,
+        "pending": _pending,
+        "rejected": rejected,
+    }
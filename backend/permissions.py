@@ -0,0 +1,106 @@
+"""
+Prava korisnika nad formama. Vlasnik, uloga saradnika i javnost forme se čitaju jednim upitom
+(forms LEFT JOIN collaborators), i to za više formi odjednom; superadmin dolazi iz snimka
+korisnika. Rezultat se pamti u db.info, a sesija traje koliko i zahtev, pa se isti par
+(forma, korisnik) u jednom zahtevu razrešava samo jednom. Rute koje menjaju saradnike ili
+javnost forme zovu forget.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from models import CollaboratorModel, FormModel
+
+_INFO_KEY = "form_access"
+
+
+@dataclass(frozen=True)
+class FormAccess:
+    form_id: int
+    owner_id: int
+    is_public: bool
+    user_id: Optional[int]
+    collab_role: Optional[str]
+    is_superadmin: bool
+    # verzija definicije forme (ključ keša u form_definitions.py), čita se istim upitom
+    schema_version: int = 0
+
+    @property
+    def is_owner(self) -> bool:
+        return self.user_id is not None and self.user_id == self.owner_id
+
+    @property
+    def is_collaborator(self) -> bool:
+        return self.collab_role is not None
+
+    @property
+    def is_editor(self) -> bool:
+        return (self.collab_role or "").lower() == "editor"
+
+    @property
+    def can_view(self) -> bool:
+        """Forma i rezultati: javna forma, superadmin, vlasnik ili bilo koji saradnik."""
+        return self.is_public or self.is_superadmin or self.is_owner or self.is_collaborator
+
+
+def _memo(db: Session) -> Dict[tuple, Optional[FormAccess]]:
+    return db.info.setdefault(_INFO_KEY, {})
+
+
+def resolve_many(db: Session, form_ids: Iterable[int], user) -> Dict[int, FormAccess]:
+    """Prava korisnika (ili anonimnog, user=None) za sve date forme; forme koje ne postoje se izostavljaju."""
+    user_id = user.id if user else None
+    superadmin = bool(user and getattr(user, "is_superadmin", False))
+    memo = _memo(db)
+    form_ids = list(dict.fromkeys(form_ids))
+    missing = [fid for fid in form_ids if (fid, user_id) not in memo]
+    if missing:
+        rows = (
+            db.query(FormModel.id, FormModel.owner_id, FormModel.is_public, FormModel.schema_version,
+                     CollaboratorModel.role)
+            .outerjoin(CollaboratorModel, and_(
+                CollaboratorModel.form_id == FormModel.id,
+                CollaboratorModel.user_id == (user_id if user_id is not None else -1),
+            ))
+            .filter(FormModel.id.in_(missing))
+            .all()
+        )
+        for fid in missing:
+            memo[(fid, user_id)] = None
+        for r in rows:
+            memo[(r.id, user_id)] = FormAccess(
+                r.id, r.owner_id, bool(r.is_public), user_id, r.role, superadmin, r.schema_version or 0
+            )
+    return {fid: memo[(fid, user_id)] for fid in form_ids if memo[(fid, user_id)] is not None}
+
+
+def visible_forms_sql(alias: str, user) -> Tuple[str, dict]:
+    """
+    SQL uslov FormAccess.can_view nad formom {alias}, za upite koji filtriraju i straniče u bazi
+    (pretraga): javna forma, superadmin, vlasnik ili saradnik.
+    """
+    user_id = user.id if user else None
+    return (
+        f"(:viewer_is_superadmin OR {alias}.is_public OR {alias}.owner_id = :viewer_id OR EXISTS ("
+        f"SELECT 1 FROM collaborators vc WHERE vc.form_id = {alias}.id AND vc.user_id = :viewer_id))",
+        {
+            "viewer_is_superadmin": bool(user and getattr(user, "is_superadmin", False)),
+            "viewer_id": user_id if user_id is not None else -1,
+        },
+    )
+
+
+def resolve(db: Session, form_id: int, user) -> Optional[FormAccess]:
+    return resolve_many(db, [form_id], user).get(form_id)
+
+
+def forget(db: Session, form_id: Optional[int] = None):
+    """Briše zapamćena prava (za jednu formu ili sva) posle izmene saradnika ili forme."""
+    memo = _memo(db)
+    if form_id is None:
+        memo.clear()
+        return
+    for key in [k for k in memo if k[0] == form_id]:
+        del memo[key]
@@ -0,0 +1,340 @@
+"""
+Inkrementalni rollup-ovi za analitiku: question_stats (broj odgovora i numerička statistika po pitanju)
+i answer_value_counts (broj ponavljanja svake vrednosti / izabrane opcije po pitanju).
+
+Ponovna izgradnja iz answers tabele i provera:
+    python rollups.py rebuild [--form-id ID]
+    python rollups.py check [--form-id ID]
+"""
+import argparse
+import sys
+from math import fsum, isclose
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Float, bindparam, case, cast, insert, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from analytics import (
+    DATE_TYPES,
+    MULTI_CHOICE_TYPES,
+    NUMBER_TYPES,
+    SINGLE_CHOICE_TYPES,
+    answer_totals,
+    answer_value_counts,
+    numeric_stats,
+    value_key,
+)
+from answer_types import AnswerRow
+from models import AnswerValueCountModel, QuestionModel, QuestionStatsModel
+
+
+class _Rollup:
+    """Brojevi za jedno pitanje: ili razlika koju donosi nova predaja, ili kompletno stanje."""
+
+    def __init__(self, qtype: str):
+        self.qtype = qtype
+        self.answer_count = 0
+        self.values: Dict[str, int] = {}
+        self.num_count = 0
+        self.num_sum: List[float] = []
+        self.num_min: Optional[float] = None
+        self.num_max: Optional[float] = None
+
+    def add(self, row: AnswerRow, n: int = 1):
+        """Jedan odgovor, po tipiziranim kolonama (isti ključevi kao analytics.answer_value_counts)."""
+        self.answer_count += n
+        if self.qtype in SINGLE_CHOICE_TYPES:
+            keys = [row.option_id]
+        elif self.qtype in MULTI_CHOICE_TYPES:
+            keys = list(row.selections)
+        elif self.qtype in NUMBER_TYPES:
+            keys = [row.value_num] if row.value_num is not None else []
+        elif self.qtype in DATE_TYPES:
+            keys = [row.value]
+        else:
+            keys = []
+        for k in keys:
+            self.add_key(k, n)
+
+        if self.qtype in NUMBER_TYPES and row.value_num is not None:
+            x = row.value_num
+            self.num_count += n
+            self.num_sum.append(x * n)
+            self.num_min = x if self.num_min is None else min(self.num_min, x)
+            self.num_max = x if self.num_max is None else max(self.num_max, x)
+
+    def add_key(self, key, n: int):
+        k = value_key(key)
+        self.values[k] = self.values.get(k, 0) + n
+
+    @property
+    def total_sum(self) -> Optional[float]:
+        return fsum(self.num_sum) if self.num_count else None
+
+
+def _value_rows(question_id: int, r: _Rollup) -> List[dict]:
+    return [{"question_id": question_id, "value": v, "total": n} for v, n in r.values.items()]
+
+
+def _upsert_value_counts(db: Session, rows: List[dict]):
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        for row in rows:
+            updated = db.query(AnswerValueCountModel).filter(
+                AnswerValueCountModel.question_id == row["question_id"],
+                AnswerValueCountModel.value == row["value"],
+            ).update({AnswerValueCountModel.total: AnswerValueCountModel.total + row["total"]}, synchronize_session=False)
+            if not updated:
+                db.add(AnswerValueCountModel(**row))
+        return
+
+    # executemany nad istom naredbom: kompajlira se jednom, bez obzira na broj redova
+    table = AnswerValueCountModel.__table__
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["question_id", "value"],
+        set_={"total": table.c.total + stmt.excluded.total},
+    )
+    db.execute(stmt, rows)
+
+
+def _live_rollup(db: Session, question_id: int, qtype: str) -> _Rollup:
+    """Kompletno stanje pitanja istim agregatima kojima i analitika čita answers tabelu."""
+    r = _Rollup(qtype)
+    r.answer_count = answer_totals(db, [question_id]).get(question_id, 0)
+    for key, n in answer_value_counts(db, {question_id: qtype}).get(question_id, []):
+        r.add_key(key, n)
+    if qtype in NUMBER_TYPES:
+        stats = numeric_stats(db, [question_id]).get(question_id)
+        if stats:
+            r.num_count, num_sum, r.num_min, r.num_max = stats
+            r.num_sum = [num_sum]
+    return r
+
+
+def create_empty(db: Session, question_id: int):
+    """Novo pitanje nema odgovora, pa je prazan rollup odmah tačan."""
+    db.execute(insert(QuestionStatsModel).values(question_id=question_id, answer_count=0, num_count=0))
+
+
+def drop_question(db: Session, question_id: int):
+    db.query(AnswerValueCountModel).filter(AnswerValueCountModel.question_id == question_id).delete(synchronize_session=False)
+    db.query(QuestionStatsModel).filter(QuestionStatsModel.question_id == question_id).delete(synchronize_session=False)
+
+
+def drop_form(db: Session, form_id: int):
+    for table in ("answer_value_counts", "question_stats"):
+        db.execute(
+            text(f"DELETE FROM {table} WHERE question_id IN (SELECT id FROM questions WHERE form_id=:fid)"),
+            {"fid": form_id},
+        )
+
+
+def rebuild_question(db: Session, question_id: int, qtype: str):
+    """Briše rollup pitanja i pravi ga ponovo iz answers tabele (očekuje flush-ovane odgovore)."""
+    r = _live_rollup(db, question_id, qtype)
+    drop_question(db, question_id)
+    db.execute(insert(QuestionStatsModel).values(
+        question_id=question_id,
+        answer_count=r.answer_count,
+        num_count=r.num_count,
+        num_sum=r.total_sum,
+        num_min=r.num_min,
+        num_max=r.num_max,
+    ))
+    rows = _value_rows(question_id, r)
+    if rows:
+        db.execute(insert(AnswerValueCountModel), rows)
+
+
+def _float_param(name: str):
+    # eksplicitan CAST da bi i "IS NULL" nad parametrom imao tip na svim drajverima
+    return cast(bindparam(name), Float)
+
+
+_stats = QuestionStatsModel.__table__
+_d_sum, _d_min, _d_max = _float_param("b_num_sum"), _float_param("b_num_min"), _float_param("b_num_max")
+_STATS_INCREMENT = (
+    update(_stats)
+    .where(_stats.c.question_id == bindparam("b_question_id"))
+    .values(
+        answer_count=_stats.c.answer_count + bindparam("b_answer_count"),
+        num_count=_stats.c.num_count + bindparam("b_num_count"),
+        num_sum=case(
+            (_d_sum.is_(None), _stats.c.num_sum),
+            (_stats.c.num_sum.is_(None), _d_sum),
+            else_=_stats.c.num_sum + _d_sum,
+        ),
+        num_min=case(
+            (_d_min.is_(None), _stats.c.num_min),
+            (or_(_stats.c.num_min.is_(None), _stats.c.num_min > _d_min), _d_min),
+            else_=_stats.c.num_min,
+        ),
+        num_max=case(
+            (_d_max.is_(None), _stats.c.num_max),
+            (or_(_stats.c.num_max.is_(None), _stats.c.num_max < _d_max), _d_max),
+            else_=_stats.c.num_max,
+        ),
+    )
+)
+
+
+def _existing_stats(db: Session, question_ids: List[int]) -> set:
+    return {
+        qid for (qid,) in
+        db.query(QuestionStatsModel.question_id).filter(QuestionStatsModel.question_id.in_(question_ids)).all()
+    }
+
+
+def lock_questions(question_ids: List[int]):
+    """
+    Zaključava pitanja redom po id-ju (Postgres: FOR NO KEY UPDATE, koji ne čeka na ključeve
+    koje drže INSERT-i odgovora u drugim transakcijama); SQLite ionako serijalizuje upise.
+    """
+    return (
+        select(QuestionModel.id)
+        .where(QuestionModel.id.in_(question_ids))
+        .order_by(QuestionModel.id)
+        .with_for_update(key_share=True)
+    )
+
+
+def apply_answers(db: Session, answers: Iterable[AnswerRow]):
+    """
+    Ažurira rollup-ove za nove odgovore (sa tipiziranim kolonama, vidi answer_types.AnswerRow)
+    u istoj transakciji u kojoj su odgovori dodati. Redovi se menjaju redom po
+    (question_id, value), pa se paralelne predaje više pitanja ne zaključavaju unakrst.
+    """
+    per_q: Dict[int, _Rollup] = {}
+    for a in answers:
+        per_q.setdefault(a.question_id, _Rollup(a.type)).add(a)
+    if not per_q:
+        return
+
+    existing = _existing_stats(db, list(per_q))
+    missing = sorted(qid for qid in per_q if qid not in existing)
+    if missing:
+        # pitanje iz vremena pre rollup-a: inkrement bi izgubio stare odgovore, pa ga gradimo iz answers.
+        # Dve predaje istog pitanja bi ga obe gradile; zaključavanje pitanja ih serijalizuje, a ona koja
+        # čeka posle toga vidi gotov rollup i samo dodaje svoje odgovore.
+        db.flush()
+        db.execute(lock_questions(missing)).all()
+        built = _existing_stats(db, missing)
+        existing |= built
+        for qid in missing:
+            if qid not in built:
+                rebuild_question(db, qid, per_q[qid].qtype)
+
+    stats_rows = []
+    value_rows = []
+    for qid in sorted(existing):
+        r = per_q[qid]
+        stats_rows.append({
+            "b_question_id": qid,
+            "b_answer_count": r.answer_count,
+            "b_num_count": r.num_count,
+            "b_num_sum": r.total_sum,
+            "b_num_min": r.num_min,
+            "b_num_max": r.num_max,
+        })
+        value_rows.extend(_value_rows(qid, r))
+    if stats_rows:
+        # jedan executemany za sva pitanja umesto po jednog UPDATE-a
+        db.execute(_STATS_INCREMENT, stats_rows)
+    value_rows.sort(key=lambda row: (row["question_id"], row["value"]))
+    _upsert_value_counts(db, value_rows)
+
+
+def check_question(db: Session, question_id: int, qtype: str) -> List[str]:
+    """Poredi sačuvani rollup sa stanjem u answers tabeli; vraća listu razlika."""
+    live = _live_rollup(db, question_id, qtype)
+    stats = db.query(
+        QuestionStatsModel.answer_count,
+        QuestionStatsModel.num_count,
+        QuestionStatsModel.num_sum,
+        QuestionStatsModel.num_min,
+        QuestionStatsModel.num_max,
+    ).filter(QuestionStatsModel.question_id == question_id).first()
+    if stats is None:
+        return [f"question {question_id}: missing question_stats row"]
+
+    problems = []
+    if stats.answer_count != live.answer_count:
+        problems.append(f"question {question_id}: answer_count {stats.answer_count} != {live.answer_count}")
+    if stats.num_count != live.num_count:
+        problems.append(f"question {question_id}: num_count {stats.num_count} != {live.num_count}")
+    for name, stored, expected in (
+        ("num_sum", stats.num_sum, live.total_sum),
+        ("num_min", stats.num_min, live.num_min),
+        ("num_max", stats.num_max, live.num_max),
+    ):
+        if (stored is None) != (expected is None) or (
+            stored is not None and not isclose(stored, expected, rel_tol=1e-9, abs_tol=1e-9)
+        ):
+            problems.append(f"question {question_id}: {name} {stored} != {expected}")
+
+    stored_values = {
+        v: n for v, n in
+        db.query(AnswerValueCountModel.value, AnswerValueCountModel.total)
+        .filter(AnswerValueCountModel.question_id == question_id, AnswerValueCountModel.total > 0)
+        .all()
+    }
+    if stored_values != live.values:
+        problems.append(f"question {question_id}: value counts differ ({len(stored_values)} stored, {len(live.values)} live)")
+    return problems
+
+
+def _questions(db: Session, form_id: Optional[int]) -> List[QuestionModel]:
+    q = db.query(QuestionModel)
+    if form_id is not None:
+        q = q.filter(QuestionModel.form_id == form_id)
+    return q.order_by(QuestionModel.id).all()
+
+
+def rebuild(db: Session, form_id: Optional[int] = None) -> int:
+    questions = _questions(db, form_id)
+    for q in questions:
+        rebuild_question(db, q.id, q.type)
+    db.commit()
+    return len(questions)
+
+
+def check(db: Session, form_id: Optional[int] = None) -> List[str]:
+    problems = []
+    for q in _questions(db, form_id):
+        problems.extend(check_question(db, q.id, q.type))
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild or verify analytics rollups.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--form-id", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            n = rebuild(db, args.form_id)
+            print(f"Rebuilt rollups for {n} questions.")
+        problems = check(db, args.form_id)
+        for p in problems:
+            print(p)
+        if problems:
+            print(f"{len(problems)} mismatches between rollups and answers.")
+            return 1
+        print("Rollups match the answers table.")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -75,6 +75,10 @@ class FormOut(BaseModel):
     class Config:
         from_attributes = True
 
+class PublicFormOut(FormOut):
+    question_count: int
+    questions: Optional[List[QuestionOut]] = None
+
 class AnswerItem(BaseModel):
     question_id: int
     answer: Union[str, int, List[str]]  
@@ -83,6 +87,9 @@ class AnswerItem(BaseModel):
 class AnswerSubmission(BaseModel):
     answers: List[AnswerItem]
 
+class AnswerBatch(BaseModel):
+    submissions: List[AnswerSubmission]
+
 class FormUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -133,6 +140,19 @@ class FormWithMeta(FormOut):
     capabilities: Optional[FormCapabilities] = None
     model_config = ConfigDict(from_attributes=True)  
 
+class ExportJobCreate(BaseModel):
+    format: Literal["xlsx", "csv", "ndjson", "parquet"] = "xlsx"
+
+class ExportJobOut(BaseModel):
+    job_id: str
+    form_id: int
+    format: str
+    status: Literal["queued", "running", "done", "failed", "expired"]
+    answers_version: Optional[int] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     email: Optional[str] = None
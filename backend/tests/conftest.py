@@ -1,17 +1,20 @@
 import sys, pathlib, os, pytest
+from contextlib import contextmanager
+from typing import Any, NamedTuple
 BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(BACKEND_DIR))
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 os.environ.setdefault("SECRET_KEY", "test-secret")
 os.environ.setdefault("ALGORITHM", "HS256")
 os.environ["DATABASE_URL"] = "sqlite:///./test_db.sqlite3"
 
-from models import UserModel
+from models import UserModel, FormModel, QuestionModel, OptionModel, AnswerModel
 from auth_api import app, get_db
 from database import Base
 import form_db_circl_fix
+from form_cur_user_circl_fix import invalidate_user
 
 engine = create_engine(
     os.environ["DATABASE_URL"],
@@ -56,6 +59,62 @@ def db():
     finally:
         s.close()
 
+class CapturedQuery(NamedTuple):
+    statement: str
+    parameters: Any
+    executemany: bool
+
+    @property
+    def is_select(self) -> bool:
+        return self.statement.lstrip().upper().startswith("SELECT")
+
+@pytest.fixture()
+def capture_queries():
+    """
+    Beleži upite nad test bazom unutar with bloka:
+        with capture_queries() as queries: ...
+    queries je lista CapturedQuery (statement, parameters, executemany), redom izvršavanja.
+    """
+    @contextmanager
+    def _capture():
+        queries = []
+
+        def _listener(conn, cursor, statement, parameters, context, executemany):
+            queries.append(CapturedQuery(statement, parameters, executemany))
+
+        event.listen(engine, "before_cursor_execute", _listener)
+        try:
+            yield queries
+        finally:
+            event.remove(engine, "before_cursor_execute", _listener)
+    return _capture
+
+@pytest.fixture()
+def without_foreign_keys(monkeypatch):
+    """
+    Rute rade nad SQLite vezom bez PRAGMA foreign_keys, pa se ON DELETE CASCADE ne izvršava.
+    Posle testa se brišu redovi koje bi kaskada obrisala (pitanja i opcije obrisanih formi),
+    jer SQLite ponovo koristi id obrisane forme.
+    """
+    no_fk_engine = create_engine(os.environ["DATABASE_URL"], connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=no_fk_engine)
+
+    def _get_db():
+        s = Session()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, _get_db)
+    monkeypatch.setitem(app.dependency_overrides, form_db_circl_fix.get_db, _get_db)
+    yield
+    no_fk_engine.dispose()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM options WHERE question_id IN "
+                          "(SELECT id FROM questions WHERE form_id NOT IN (SELECT id FROM forms))"))
+        conn.execute(text("DELETE FROM questions WHERE form_id NOT IN (SELECT id FROM forms)"))
+
 @pytest.fixture()
 def register_user_and_token(client):
     def _create(username: str, email: str, password: str = "pass123"):
@@ -77,5 +136,25 @@ def make_superadmin(db):
         assert user, f"Korisnik {username} ne postoji u test bazi."
         setattr(user, "is_superadmin", True)
         db.commit()
+        # izmena mimo API-ja: keširani token ne bi video novu ulogu do isteka TTL-a
+        invalidate_user(user.id)
         return user.id
-    return _make
\ No newline at end of file
+    return _make
+
+@pytest.fixture
+def seed_export_form(db):
+    """Privatna forma sa single_choice i number pitanjem i n_answers odgovora na svako."""
+    def _seed(owner_id: int, n_answers: int = 25):
+        form = FormModel(name="Izvoz", description=None, is_public=False, is_locked=False, owner_id=owner_id)
+        db.add(form); db.flush()
+        q1 = QuestionModel(form_id=form.id, text="Boja", type="single_choice", is_required=True, order=1)
+        q2 = QuestionModel(form_id=form.id, text="Broj", type="number", is_required=False, order=2)
+        db.add_all([q1, q2]); db.flush()
+        red = OptionModel(question_id=q1.id, text="Crvena")
+        db.add(red); db.flush()
+        for i in range(n_answers):
+            db.add(AnswerModel(question_id=q1.id, value=str(red.id), option_id=red.id, user_id=owner_id))
+            db.add(AnswerModel(question_id=q2.id, value=str(i), value_num=float(i)))
+        db.commit()
+        return {"form_id": form.id, "q": [q1, q2], "n": n_answers}
+    return _seed
@@ -0,0 +1,21 @@
+def test_token_cache_skips_user_query_and_invalidates(client, db, register_user_and_token, auth_header, capture_queries):
+    token = register_user_and_token("kes_korisnik", "kes_korisnik@example.com")
+    h = auth_header(token)
+    me = client.get("/api/me", headers=h).json()
+
+    with capture_queries() as queries:
+        assert client.get("/api/forms/owned", headers=h).status_code == 200
+        assert client.get("/api/me", headers=h).json()["id"] == me["id"]
+    assert [q for q in queries if q.is_select and "FROM users" in q.statement] == []
+
+    # promena korisničkog imena poništava keš: token glasi na staro ime
+    r = client.put(f"/api/users/{me['id']}", json={"username": "kes_korisnik2"}, headers=h)
+    assert r.status_code == 200, r.text
+    assert client.get("/api/me", headers=h).status_code == 401
+
+    other = register_user_and_token("kes_drugi", "kes_drugi@example.com")
+    oh = auth_header(other)
+    other_id = client.get("/api/me", headers=oh).json()["id"]
+    assert client.delete(f"/api/users/{other_id}", headers=oh).status_code == 204
+    assert client.get("/api/me", headers=oh).status_code == 401
+    assert client.get("/api/me", headers=auth_header("nije-token")).status_code == 401
@@ -0,0 +1,78 @@
+import os
+import time
+
+import pytest
+
+import export_jobs
+
+
+@pytest.fixture
+def export_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs, "EXPORT_STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _wait_for(client, url, h, timeout=10):
+    deadline = time.time() + timeout
+    while True:
+        job = client.get(url, headers=h).json()
+        if job["status"] not in ("queued", "running") or time.time() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_export_job_builds_and_reuses_artifact(client, seed_export_form, register_user_and_token, auth_header, export_store):
+    h = auth_header(register_user_and_token("posao", "posao@example.com"))
+    me = client.get("/api/me", headers=h).json()
+    form_id = seed_export_form(me["id"], n_answers=5)["form_id"]
+
+    r = client.post(f"/api/forms/{form_id}/exports", json={"format": "csv"}, headers=h)
+    assert r.status_code == 202, r.text
+    job = _wait_for(client, f"/api/forms/{form_id}/exports/{r.json()['job_id']}", h)
+    assert job["status"] == "done", job
+
+    download = client.get(job["download_url"], headers=h)
+    assert download.status_code == 200
+    assert download.content == client.get(f"/api/forms/{form_id}/export.csv", headers=h).content
+
+    again = client.post(f"/api/forms/{form_id}/exports", json={"format": "csv"}, headers=h).json()
+    assert again["status"] == "done"
+    assert again["answers_version"] == job["answers_version"]
+
+    form = client.get(f"/api/forms/{form_id}", headers=h).json()
+    answers = [{"question_id": form["questions"][0]["id"], "answer": "Crvena"},
+               {"question_id": form["questions"][1]["id"], "answer": "7"}]
+    r = client.post(f"/api/forms/{form_id}/answers", json={"answers": answers}, headers=h)
+    assert r.status_code == 200, r.text
+
+    fresh = client.post(f"/api/forms/{form_id}/exports", json={"format": "csv"}, headers=h).json()
+    assert fresh["status"] in ("queued", "running")
+    fresh = _wait_for(client, f"/api/forms/{form_id}/exports/{fresh['job_id']}", h)
+    assert fresh["answers_version"] > job["answers_version"]
+    assert sorted(os.listdir(export_store)) == [f"form_{form_id}_v{fresh['answers_version']}.csv"]
+
+    stale = client.get(f"/api/forms/{form_id}/exports/{job['job_id']}", headers=h).json()
+    assert stale["status"] == "expired"
+    assert client.get(f"/api/forms/{form_id}/exports/{job['job_id']}/download", headers=h).status_code == 410
+
+
+def test_export_job_requires_results_access(client, seed_export_form, register_user_and_token, auth_header, export_store):
+    owner = auth_header(register_user_and_token("posao_vlasnik", "posao_vlasnik@example.com"))
+    me = client.get("/api/me", headers=owner).json()
+    form_id = seed_export_form(me["id"], n_answers=1)["form_id"]
+    job_id = client.post(f"/api/forms/{form_id}/exports", json={"format": "ndjson"}, headers=owner).json()["job_id"]
+
+    stranger = auth_header(register_user_and_token("posao_stranac", "posao_stranac@example.com"))
+    assert client.post(f"/api/forms/{form_id}/exports", json={"format": "csv"}, headers=stranger).status_code == 403
+    assert client.get(f"/api/forms/{form_id}/exports/{job_id}", headers=stranger).status_code == 403
+
+
+def test_evict_removes_old_then_least_recent(export_store):
+    now = time.time()
+    for name, size, age in [("a.csv", 100, 10), ("b.csv", 100, 5), ("c.csv", 100, 1), ("old.csv", 10, 10_000)]:
+        path = export_store / name
+        path.write_bytes(b"x" * size)
+        os.utime(path, (now - age, now - age))
+
+    export_jobs.evict(max_bytes=250, max_age=3600)
+    assert sorted(os.listdir(export_store)) == ["b.csv", "c.csv"]
@@ -0,0 +1,125 @@
+import csv
+import gzip
+import json
+from io import BytesIO, StringIO
+
+import pytest
+from openpyxl import load_workbook
+
+
+def test_export_xlsx_streams_write_only_workbook(client, seed_export_form, register_user_and_token, auth_header):
+    token = register_user_and_token("izvoz", "izvoz@example.com")
+    h = auth_header(token)
+    me = client.get("/api/me", headers=h).json()
+    seeded = seed_export_form(me["id"])
+
+    r = client.get(f"/api/forms/{seeded['form_id']}/export.xlsx", headers=h)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("application/vnd.openxmlformats")
+
+    wb = load_workbook(BytesIO(r.content), read_only=True)
+    assert wb.sheetnames == ["Questions", "Answers", "Analytics"]
+
+    questions = list(wb["Questions"].iter_rows(values_only=True))
+    assert questions[1][:3] == (seeded["q"][0].id, "Boja", "single_choice")
+
+    answers = list(wb["Answers"].iter_rows(values_only=True))
+    assert answers[0] == ("Question ID", "Question", "Answer", "User email", "Submitted at", "Submission ID")
+    assert len(answers) == 1 + 2 * seeded["n"]
+    assert {row[3] for row in answers[1:]} == {"izvoz@example.com", "anonimo"}
+
+    metrics = {(row[0], row[3]): row[4] for row in wb["Analytics"].iter_rows(min_row=2, values_only=True)}
+    assert metrics[(seeded["q"][0].id, "total_answers")] == seeded["n"]
+    assert metrics[(seeded["q"][1].id, "max")] == seeded["n"] - 1
+
+
+def test_export_xlsx_requires_results_access(client, seed_export_form, register_user_and_token, auth_header):
+    owner = register_user_and_token("izvoz_vlasnik", "izvoz_vlasnik@example.com")
+    me = client.get("/api/me", headers=auth_header(owner)).json()
+    seeded = seed_export_form(me["id"], n_answers=1)
+
+    stranger = register_user_and_token("izvoz_stranac", "izvoz_stranac@example.com")
+    r = client.get(f"/api/forms/{seeded['form_id']}/export.xlsx", headers=auth_header(stranger))
+    assert r.status_code == 403
+
+
+def test_export_csv_and_ndjson_stream_answer_rows(client, seed_export_form, register_user_and_token, auth_header):
+    token = register_user_and_token("izvoz_csv", "izvoz_csv@example.com")
+    h = auth_header(token)
+    me = client.get("/api/me", headers=h).json()
+    seeded = seed_export_form(me["id"], n_answers=10)
+
+    r = client.get(f"/api/forms/{seeded['form_id']}/export.csv", headers=h)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(StringIO(r.text)))
+    assert rows[0] == ["submission_id", "question_id", "question", "answer", "user_email", "submitted_at"]
+    assert len(rows) == 1 + 2 * seeded["n"]
+    assert {row[4] for row in rows[1:]} == {"izvoz_csv@example.com", ""}
+
+    r = client.get(f"/api/forms/{seeded['form_id']}/export.ndjson", params={"gzip": "true"}, headers=h)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"] == "application/gzip"
+    assert 'filename="form_%d_answers.ndjson.gz"' % seeded["form_id"] in r.headers["content-disposition"]
+    lines = gzip.decompress(r.content).decode("utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 2 * seeded["n"]
+    assert sorted(int(rec["answer"]) for rec in records if rec["question_id"] == seeded["q"][1].id) == list(range(seeded["n"]))
+    assert records[0]["user_email"] in ("izvoz_csv@example.com", None)
+
+
+def test_export_csv_requires_results_access(client, seed_export_form, register_user_and_token, auth_header):
+    owner = register_user_and_token("csv_vlasnik", "csv_vlasnik@example.com")
+    me = client.get("/api/me", headers=auth_header(owner)).json()
+    seeded = seed_export_form(me["id"], n_answers=1)
+
+    stranger = register_user_and_token("csv_stranac", "csv_stranac@example.com")
+    for fmt in ("csv", "ndjson"):
+        r = client.get(f"/api/forms/{seeded['form_id']}/export.{fmt}", headers=auth_header(stranger))
+        assert r.status_code == 403
+
+
+def test_export_parquet_has_typed_columns(client, seed_export_form, register_user_and_token, auth_header):
+    pq = pytest.importorskip("pyarrow.parquet")
+    token = register_user_and_token("izvoz_parquet", "izvoz_parquet@example.com")
+    h = auth_header(token)
+    me = client.get("/api/me", headers=h).json()
+    seeded = seed_export_form(me["id"], n_answers=10)
+
+    r = client.get(f"/api/forms/{seeded['form_id']}/export.parquet", headers=h)
+    assert r.status_code == 200, r.text
+
+    table = pq.read_table(BytesIO(r.content))
+    assert str(table.schema.field("question_id").type) == "int64"
+    assert str(table.schema.field("answer_number").type) == "double"
+    assert str(table.schema.field("submitted_at").type).startswith("timestamp")
+    assert table.num_rows == 2 * seeded["n"]
+
+    rows = table.to_pylist()
+    numbers = sorted(row["answer_number"] for row in rows if row["question_id"] == seeded["q"][1].id)
+    assert numbers == [float(i) for i in range(seeded["n"])]
+    assert all(row["answer_number"] is None for row in rows if row["question_id"] == seeded["q"][0].id)
+
+
+def test_export_parquet_numeric_choice_has_answer_number(client, register_user_and_token, auth_header):
+    pq = pytest.importorskip("pyarrow.parquet")
+    h = auth_header(register_user_and_token("izvoz_skala", "izvoz_skala@example.com"))
+    form_id = client.post("/api/forms", json={"name": "Skala", "description": "", "is_public": False}, headers=h).json()["id"]
+    r = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Ocena", "type": "numeric_choice", "is_required": "true",
+        "options": json.dumps([{"text": "1.5"}, {"text": "2.5"}, {"text": "4.5"}]),
+    }, headers=h)
+    assert r.status_code == 200, r.text
+    q_scale = r.json()["id"]
+
+    for grade in ("4.5", "1.5", "4.5"):
+        r = client.post(f"/api/forms/{form_id}/answers", json={"answers": [{"question_id": q_scale, "answer": grade}]},
+                        headers=h)
+        assert r.status_code == 200, r.text
+
+    r = client.get(f"/api/forms/{form_id}/export.parquet", headers=h)
+    assert r.status_code == 200, r.text
+    rows = pq.read_table(BytesIO(r.content)).to_pylist()
+    # answer je id izabrane opcije, answer_number njena vrednost na skali
+    assert [row["answer_number"] for row in rows] == [4.5, 1.5, 4.5]
+    assert all(row["question_type"] == "numeric_choice" for row in rows)
@@ -0,0 +1,114 @@
+from sqlalchemy.orm import Session
+from answer_types import retype_question
+from models import FormModel, QuestionModel, OptionModel, AnswerModel
+
+
+def seed_form_with_answers(db: Session, owner_id: int) -> dict:
+    form = FormModel(name="Analitika", description=None, is_public=False, is_locked=False, owner_id=owner_id)
+    db.add(form); db.flush()
+
+    q1 = QuestionModel(form_id=form.id, text="Boja", type="single_choice", is_required=True, order=1)
+    q2 = QuestionModel(form_id=form.id, text="Voće", type="multiple_choice", is_required=False, order=2)
+    q3 = QuestionModel(form_id=form.id, text="Godine", type="number", is_required=False, order=3)
+    q4 = QuestionModel(form_id=form.id, text="Datum", type="date", is_required=False, order=4)
+    q5 = QuestionModel(form_id=form.id, text="Komentar", type="short_text", is_required=False, order=5)
+    db.add_all([q1, q2, q3, q4, q5]); db.flush()
+
+    red = OptionModel(question_id=q1.id, text="Crvena")
+    blue = OptionModel(question_id=q1.id, text="Plava")
+    apple = OptionModel(question_id=q2.id, text="Jabuka")
+    pear = OptionModel(question_id=q2.id, text="Kruška")
+    db.add_all([red, blue, apple, pear]); db.flush()
+
+    values = {
+        q1.id: [str(red.id), str(red.id), "plava", "nepoznato"],
+        q2.id: [f"{apple.id},{pear.id}", str(apple.id), "Jabuka,šljiva"],
+        q3.id: ["3", "3", "10", "x"],
+        q4.id: ["2024-01-02", " 2024-01-02", "2023-05-05", ""],
+        q5.id: ["a", "b"],
+    }
+    for qid, vals in values.items():
+        for v in vals:
+            db.add(AnswerModel(question_id=qid, value=v))
+    db.flush()
+    # tipizirane kolone kao posle migracije; tekst opcije ("plava") se prepoznaje, nepoznat se preskače
+    for q in (q1, q2, q3, q4, q5):
+        retype_question(db, q.id, q.type)
+    db.commit()
+    return {"form_id": form.id, "q": [q1, q2, q3, q4, q5], "o": [red, blue, apple, pear]}
+
+
+def test_analytics_aggregates_all_question_types(client, db, register_user_and_token, auth_header):
+    token = register_user_and_token("analitika", "analitika@example.com")
+    me = client.get("/api/me", headers=auth_header(token)).json()
+    seeded = seed_form_with_answers(db, owner_id=me["id"])
+    q1, q2, q3, q4, q5 = seeded["q"]
+    red, blue, apple, pear = seeded["o"]
+
+    r = client.get(f"/api/forms/{seeded['form_id']}/analytics", headers=auth_header(token))
+    assert r.status_code == 200, r.text
+    by_id = {item["question_id"]: item for item in r.json()["analytics"]}
+
+    assert by_id[q1.id] == {
+        "question_id": q1.id, "text": "Boja", "type": "single_choice",
+        "distribution": [
+            {"option_id": red.id, "option_text": "Crvena", "count": 2, "percent": 50.0},
+            {"option_id": blue.id, "option_text": "Plava", "count": 1, "percent": 25.0},
+            {"option_id": None, "option_text": "_other", "count": 1, "percent": 25.0},
+        ],
+        "total_answers": 4,
+    }
+    assert by_id[q2.id] == {
+        "question_id": q2.id, "text": "Voće", "type": "multiple_choice",
+        "distribution": [
+            {"option_id": apple.id, "option_text": "Jabuka", "count": 3, "percent": 75.0},
+            {"option_id": pear.id, "option_text": "Kruška", "count": 1, "percent": 25.0},
+        ],
+        "total_answers": 3,
+        "total_selections": 4,
+    }
+    assert by_id[q3.id] == {
+        "question_id": q3.id, "text": "Godine", "type": "number",
+        "count": 3, "min": 3.0, "avg": 5.3333, "max": 10.0,
+        "histogram": [{"value": "3", "count": 2}, {"value": "10", "count": 1}],
+    }
+    assert by_id[q4.id] == {
+        "question_id": q4.id, "text": "Datum", "type": "date",
+        "count": 4,
+        "by_value": [{"value": "2023-05-05", "count": 1}, {"value": "2024-01-02", "count": 2}],
+    }
+    assert by_id[q5.id] == {"question_id": q5.id, "text": "Komentar", "type": "short_text", "count": 2}
+
+
+def test_analytics_etag_and_cache_invalidation(client, db, register_user_and_token, auth_header, make_superadmin):
+    token = register_user_and_token("etag", "etag@example.com")
+    make_superadmin("etag")
+    h = auth_header(token)
+    me = client.get("/api/me", headers=h).json()
+    seeded = seed_form_with_answers(db, owner_id=me["id"])
+    form_id = seeded["form_id"]
+    q_color = seeded["q"][0]
+    red = seeded["o"][0]
+
+    first = client.get(f"/api/forms/{form_id}/analytics", headers=h)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get(f"/api/forms/{form_id}/analytics", headers={**h, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+
+    r = client.post(f"/api/forms/{form_id}/answers", json={"answers": [{"question_id": q_color.id, "answer": red.id}]},
+                    headers=h)
+    assert r.status_code == 200, r.text
+
+    fresh = client.get(f"/api/forms/{form_id}/analytics", headers={**h, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    color = next(d for d in fresh.json()["analytics"] if d["question_id"] == q_color.id)
+    assert color["total_answers"] == 5
+
+    client.get(f"/api/forms/{form_id}/analytics", headers=h)
+    stats = client.get("/api/admin/cache-stats", headers=h).json()
+    assert stats["analytics"]["hits"] >= 1
+    assert stats["analytics"]["misses"] >= 2
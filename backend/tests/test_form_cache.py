@@ -0,0 +1,41 @@
+import form_definitions
+
+
+def test_form_definition_is_cached_with_etag(client, db, register_user_and_token, auth_header, capture_queries):
+    owner = auth_header(register_user_and_token("kes_vlasnik", "kes_vlasnik@example.com"))
+    form_id = client.post("/api/forms", json={"name": "Keš", "description": "Opis", "is_public": True}, headers=owner).json()["id"]
+    r = client.post(f"/api/forms/{form_id}/questions", headers=owner,
+                    data={"text": "Ime", "type": "short_text", "is_required": "true"})
+    assert r.status_code == 200, r.text
+
+    first = client.get(f"/api/forms/{form_id}", headers=owner)
+    assert first.status_code == 200
+    body = first.json()
+    assert body["my_role"] == "owner" and body["capabilities"] == {"can_edit": True}
+    assert [q["text"] for q in body["questions"]] == ["Ime"]
+    etag = first.headers["ETag"]
+
+    # keširana definicija: samo upit za prava (koji nosi i verziju), bez pitanja i opcija
+    with capture_queries() as queries:
+        again = client.get(f"/api/forms/{form_id}", headers=owner)
+    assert again.content == first.content and again.headers["ETag"] == etag and len(queries) == 1
+    hits = form_definitions.definition_cache.hits
+    with capture_queries() as queries:
+        not_modified = client.get(f"/api/forms/{form_id}", headers={**owner, "If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b"" and len(queries) == 1
+    assert form_definitions.definition_cache.hits == hits
+
+    anon = client.get(f"/api/forms/{form_id}")
+    assert anon.json()["my_role"] == "viewer" and anon.json()["capabilities"] == {"can_edit": False}
+    assert anon.headers["ETag"] != etag and anon.json()["questions"] == body["questions"]
+
+    r = client.post(f"/api/forms/{form_id}/questions", headers=owner,
+                    data={"text": "Grad", "type": "short_text", "is_required": "false"})
+    assert r.status_code == 200, r.text
+    changed = client.get(f"/api/forms/{form_id}", headers={**owner, "If-None-Match": etag})
+    assert changed.status_code == 200 and [q["text"] for q in changed.json()["questions"]] == ["Ime", "Grad"]
+
+    assert client.put(f"/api/forms/{form_id}", json={"name": "Novi naziv", "is_public": False}, headers=owner).status_code == 200
+    renamed = client.get(f"/api/forms/{form_id}", headers={**owner, "If-None-Match": changed.headers["ETag"]})
+    assert renamed.status_code == 200 and renamed.json()["name"] == "Novi naziv"
+    assert client.get(f"/api/forms/{form_id}").status_code == 403
@@ -0,0 +1,70 @@
+import form_definitions
+from models import CollaboratorModel, FormModel, UserModel
+from pagination import PAGE_MAX_LIMIT
+
+
+def test_listing_query_count_does_not_grow_with_forms(client, db, register_user_and_token, auth_header, capture_queries):
+    h = auth_header(register_user_and_token("liste", "liste@example.com"))
+    register_user_and_token("liste_drugi", "liste_drugi@example.com")
+    me = client.get("/api/me", headers=h).json()
+    other = db.query(UserModel).filter(UserModel.username == "liste_drugi").one()
+
+    def _add_forms(n):
+        for i in range(n):
+            db.add(FormModel(name=f"Moja {i}", is_public=False, owner_id=me["id"]))
+            shared = FormModel(name=f"Tuđa {i}", is_public=False, owner_id=other.id)
+            db.add(shared); db.flush()
+            db.add(CollaboratorModel(form_id=shared.id, user_id=me["id"], role="editor" if i % 2 else "viewer"))
+        db.commit()
+
+    counts = []
+    for n in (1, 30):
+        _add_forms(n)
+        with capture_queries() as q_owned:
+            owned = client.get("/api/forms/owned", headers=h).json()
+        with capture_queries() as q_mine:
+            mine = client.get("/api/forms/mine", headers=h).json()
+        counts.append((len(q_owned), len(q_mine)))
+
+    assert counts[0] == counts[1]
+    assert counts[1] == (1, 1)
+    assert len(owned) == 31 and all(f["my_role"] == "owner" and f["capabilities"]["can_edit"] for f in owned)
+    roles = {(f["my_role"], f["capabilities"]["can_edit"]) for f in mine}
+    assert roles == {("owner", True), ("editor", True), ("viewer", False)}
+    assert len(mine) == 62
+
+
+def test_public_listing_is_one_query_and_cached(client, db, register_user_and_token, auth_header, capture_queries):
+    h = auth_header(register_user_and_token("javne", "javne@example.com"))
+    ids = []
+    for i in range(3):
+        r = client.post("/api/forms", json={"name": f"Javna {i}", "description": None, "is_public": True}, headers=h)
+        ids.append(r.json()["id"])
+        for j in range(i + 1):
+            client.post(f"/api/forms/{ids[-1]}/questions", headers=h,
+                        data={"text": f"P{j}", "type": "short_text", "is_required": "false"})
+    form_definitions.public_cache.clear()
+
+    def _page():
+        return client.get("/api/forms/public", params={"limit": PAGE_MAX_LIMIT}).json()
+
+    with capture_queries() as queries:
+        listing = _page()
+    assert len(queries) == 1
+    mine = {f["id"]: f for f in listing if f["id"] in ids}
+    assert [mine[i]["question_count"] for i in ids] == [1, 2, 3]
+    assert all(f["questions"] is None for f in mine.values())
+    with capture_queries() as queries:
+        _page()
+    assert queries == []
+
+    with capture_queries() as queries:
+        full = client.get("/api/forms/public", params={"include": "questions"}).json()
+    assert len(queries) == 3  # forme, pa selectin pitanja i opcija
+    assert [q["text"] for q in next(f for f in full if f["id"] == ids[2])["questions"]] == ["P0", "P1", "P2"]
+
+    assert client.put(f"/api/forms/{ids[0]}", json={"is_public": False}, headers=h).status_code == 200
+    assert ids[0] not in {f["id"] for f in _page()}
+    assert client.delete(f"/api/forms/{ids[1]}", headers=h).status_code == 200
+    assert ids[1] not in {f["id"] for f in _page()}
+    assert client.get("/api/forms/public", params={"include": "answers"}).status_code == 422
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+import idempotency
+from models import IdempotencyKeyModel, SubmissionModel
+
+
+def test_submit_answers_replays_first_response(client, db, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("ponovo", "ponovo@example.com"))
+    form_id = client.post("/api/forms", json={"name": "Ponovo", "description": "", "is_public": True}, headers=h).json()["id"]
+    qid = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Boja", "type": "single_choice", "is_required": "true",
+        "options": json.dumps([{"text": "Crvena"}, {"text": "Plava"}]),
+    }, headers=h).json()["id"]
+
+    payload = {"answers": [{"question_id": qid, "answer": "Plava"}]}
+    key = {"Idempotency-Key": "mobilni-123"}
+    first = client.post(f"/api/forms/{form_id}/answers", json=payload, headers=key)
+    second = client.post(f"/api/forms/{form_id}/answers", json=payload, headers=key)
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert db.query(SubmissionModel).filter(SubmissionModel.form_id == form_id).count() == 1
+
+    other = client.post(f"/api/forms/{form_id}/answers", json={"answers": [{"question_id": qid, "answer": "Crvena"}]}, headers=key)
+    assert other.status_code == 422
+
+    # isti ključ od prijavljenog korisnika je drugi scope
+    assert client.post(f"/api/forms/{form_id}/answers", json=payload, headers={**key, **h}).json()["submission_id"] != first.json()["submission_id"]
+
+
+def test_create_form_and_add_question_are_idempotent(client, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("ponovo2", "ponovo2@example.com"))
+    headers = {**h, "Idempotency-Key": "forma-1"}
+    body = {"name": "Jednom", "description": "", "is_public": False}
+    form_id = client.post("/api/forms", json=body, headers=headers).json()["id"]
+    assert client.post("/api/forms", json=body, headers=headers).json()["id"] == form_id
+
+    data = {"text": "Ime", "type": "short_text", "is_required": "true"}
+    q1 = client.post(f"/api/forms/{form_id}/questions", data=data, headers={**h, "Idempotency-Key": "pitanje-1"}).json()["id"]
+    q2 = client.post(f"/api/forms/{form_id}/questions", data=data, headers={**h, "Idempotency-Key": "pitanje-1"}).json()["id"]
+    assert q1 == q2
+    assert len(client.get(f"/api/forms/{form_id}", headers=h).json()["questions"]) == 1
+
+    other = auth_header(register_user_and_token("ponovo3", "ponovo3@example.com"))
+    assert client.post("/api/forms", json=body, headers={**other, "Idempotency-Key": "forma-1"}).json()["id"] != form_id
+
+
+def test_purge_expired_keys_in_batches(db):
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"scope": "test", "key": f"k{i}", "request_hash": "x", "status_code": 200, "response_body": "{}",
+         "expires_at": now - timedelta(hours=1) if i < 5 else now + timedelta(hours=1)}
+        for i in range(7)
+    ]
+    db.execute(insert(IdempotencyKeyModel), rows)
+    db.commit()
+
+    assert idempotency.purge_expired(db, batch_size=2) == 5
+    assert sorted(k for (k,) in db.query(IdempotencyKeyModel.key).filter(IdempotencyKeyModel.scope == "test")) == ["k5", "k6"]
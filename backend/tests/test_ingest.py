@@ -0,0 +1,187 @@
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import form
+import idempotency
+import ingest
+from answer_types import AnswerRow
+from ingest import IngestQueue, PendingSubmission
+from models import AnswerModel, SubmissionModel
+
+
+@pytest.fixture
+def queue_mode(monkeypatch):
+    monkeypatch.setattr(form, "queue_mode", lambda: True)
+
+    def _use(q):
+        monkeypatch.setattr(form, "ingest_queue", q)
+        return q
+    return _use
+
+
+def _form(client, h):
+    form_id = client.post("/api/forms", json={"name": "Red", "description": "", "is_public": True}, headers=h).json()["id"]
+    qid = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Boja", "type": "single_choice", "is_required": "true",
+        "options": json.dumps([{"text": "Crvena"}, {"text": "Plava"}]),
+    }, headers=h).json()["id"]
+    return form_id, qid
+
+
+def _count(db, form_id):
+    db.expire_all()
+    return db.query(SubmissionModel).filter(SubmissionModel.form_id == form_id).count()
+
+
+def test_queued_submissions_are_group_committed(client, db, register_user_and_token, auth_header, queue_mode, tmp_path):
+    h = auth_header(register_user_and_token("red", "red@example.com"))
+    form_id, qid = _form(client, h)
+    q = queue_mode(IngestQueue(spool_path=str(tmp_path / "spool"), flush_ms=20))
+
+    for color in ("Crvena", "Plava", "Crvena", "Plava", "Crvena"):
+        r = client.post(f"/api/forms/{form_id}/answers", json={"answers": [{"question_id": qid, "answer": color}]})
+        assert r.status_code == 202, r.text
+        assert r.json()["ingest_id"]
+    assert client.post(f"/api/forms/{form_id}/answers", json={"answers": [{"question_id": qid, "answer": "Zelena"}]}).status_code == 400
+
+    q.drain()
+    assert _count(db, form_id) == 5
+    stats = q.stats()
+    assert (stats["committed"], stats["failed"], stats["queue_depth"]) == (5, 0, 0)
+    assert stats["flushes"] >= 1
+    assert (tmp_path / "spool").read_text() == ""
+
+    color = next(i for i in client.get(f"/api/forms/{form_id}/analytics", headers=h).json()["analytics"] if i["question_id"] == qid)
+    assert color["total_answers"] == 5
+
+
+def test_full_queue_returns_429_and_spool_is_replayed(client, db, register_user_and_token, auth_header, queue_mode, tmp_path):
+    h = auth_header(register_user_and_token("red_pun", "red_pun@example.com"))
+    form_id, qid = _form(client, h)
+    spool = tmp_path / "spool"
+
+    # pisač koji ništa ne uzima iz reda, kao da je baza zaglavljena
+    stuck = IngestQueue(spool_path=str(spool), maxsize=1)
+    stuck._run = lambda: None
+    queue_mode(stuck)
+
+    payload = {"answers": [{"question_id": qid, "answer": "Plava"}]}
+    assert client.post(f"/api/forms/{form_id}/answers", json=payload).status_code == 202
+    r = client.post(f"/api/forms/{form_id}/answers", json=payload)
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "1"
+    assert stuck.stats()["rejected"] == 1
+    stuck.drain()
+    assert _count(db, form_id) == 0
+
+    # novi proces: nepotvrđen unos iz spool-a se upisuje pri pokretanju
+    fresh = IngestQueue(spool_path=str(spool), flush_ms=10)
+    fresh.start(db.get_bind())
+    fresh.drain()
+    assert _count(db, form_id) == 1
+    assert fresh.stats()["replayed"] == 1
+    assert spool.read_text() == ""
+
+
+def test_failed_flush_is_retried_and_then_dead_lettered(client, db, register_user_and_token, auth_header, queue_mode, tmp_path, monkeypatch):
+    h = auth_header(register_user_and_token("red_greska", "red_greska@example.com"))
+    form_id, qid = _form(client, h)
+    spool, dead = tmp_path / "spool", tmp_path / "dead"
+    payload = {"answers": [{"question_id": qid, "answer": "Plava"}]}
+
+    # prolazna greška baze: prvi pokušaj pada, drugi uspeva
+    real_persist, calls = ingest.persist_submissions, []
+
+    def flaky(*args):
+        calls.append(1)
+        if len(calls) <= 2:  # grupni commit i pokušaj po formi
+            raise OperationalError("INSERT", {}, Exception("veza prekinuta"))
+        return real_persist(*args)
+
+    monkeypatch.setattr(ingest, "persist_submissions", flaky)
+    q = queue_mode(IngestQueue(spool_path=str(spool), dead_letter_path=str(dead), flush_ms=10, retry_ms=20))
+    assert client.post(f"/api/forms/{form_id}/answers", json=payload).status_code == 202
+    for _ in range(100):
+        if q.stats()["committed"]:
+            break
+        time.sleep(0.02)
+    q.drain()
+    stats = q.stats()
+    assert (stats["committed"], stats["failed"], stats["retried"], stats["unconfirmed"]) == (1, 1, 1, 0)
+    assert _count(db, form_id) == 1 and spool.read_text() == "" and not dead.exists()
+
+    # trajna greška: posle max_attempts popunjavanje ide u dead-letter, tek tada se potvrđuje
+    def broken(*args):
+        raise ValueError("loše")
+
+    monkeypatch.setattr(ingest, "persist_submissions", broken)
+    q = queue_mode(IngestQueue(spool_path=str(spool), dead_letter_path=str(dead), flush_ms=10,
+                               retry_ms=10, max_attempts=2))
+    ingest_id = client.post(f"/api/forms/{form_id}/answers", json=payload).json()["ingest_id"]
+    assert q.stats()["unconfirmed"] == 1 and ingest_id in spool.read_text()
+    for _ in range(100):
+        if q.stats()["dead_lettered"]:
+            break
+        time.sleep(0.02)
+    q.drain()
+    assert q.stats()["unconfirmed"] == 0 and spool.read_text() == ""
+    rec = json.loads(dead.read_text())
+    assert rec["id"] == ingest_id and rec["attempts"] == 2 and "loše" in rec["error"]
+    assert _count(db, form_id) == 1
+
+
+def test_replayed_submission_keeps_its_submission_time(client, db, register_user_and_token, auth_header, tmp_path):
+    h = auth_header(register_user_and_token("red_vreme", "red_vreme@example.com"))
+    form_id, qid = _form(client, h)
+    option_id = client.get(f"/api/forms/{form_id}", headers=h).json()["questions"][0]["options"][0]["id"]
+    spool = tmp_path / "spool"
+
+    # popunjavanje primljeno pre restarta, u prethodnom mesecu
+    submitted_at = datetime(2026, 1, 31, 23, 59, 30, tzinfo=timezone.utc)
+    item = PendingSubmission(form_id=form_id, user_id=None, submitted_at=submitted_at,
+                             answers=[list(AnswerRow(qid, "single_choice", "Crvena", option_id, None, ()))])
+    spool.write_text(item.to_json() + "\n")
+
+    q = IngestQueue(spool_path=str(spool), flush_ms=10)
+    q.start(db.get_bind())
+    q.drain()
+    db.expire_all()
+    sub = db.query(SubmissionModel).filter(SubmissionModel.form_id == form_id).one()
+    answer = db.query(AnswerModel).filter(AnswerModel.submission_id == sub.id).one()
+    assert sub.submitted_at.replace(tzinfo=None) == submitted_at.replace(tzinfo=None)
+    assert answer.submitted_at.replace(tzinfo=None) == submitted_at.replace(tzinfo=None)
+
+
+def test_idempotency_race_loser_does_not_enqueue(client, db, register_user_and_token, auth_header, queue_mode, tmp_path, monkeypatch):
+    h = auth_header(register_user_and_token("red_kljuc", "red_kljuc@example.com"))
+    form_id, qid = _form(client, h)
+    stuck = IngestQueue(spool_path=str(tmp_path / "spool"), maxsize=2)
+    stuck._run = lambda: None
+    queue_mode(stuck)
+    payload = {"answers": [{"question_id": qid, "answer": "Plava"}]}
+    key = {"Idempotency-Key": "trka-1"}
+
+    first = client.post(f"/api/forms/{form_id}/answers", json=payload, headers=key)
+    assert first.status_code == 202 and stuck.stats()["enqueued"] == 1
+
+    # paralelni zahtev je prošao replay() pre nego što je pobednik upisao ključ
+    real_replay = idempotency.IdempotentRequest.replay
+    calls = []
+
+    def late_replay(self):
+        calls.append(1)
+        return None if len(calls) == 1 else real_replay(self)
+
+    monkeypatch.setattr(idempotency.IdempotentRequest, "replay", late_replay)
+    second = client.post(f"/api/forms/{form_id}/answers", json=payload, headers=key)
+    assert second.status_code == 202 and second.headers["Idempotent-Replayed"] == "true"
+    assert second.json()["ingest_id"] == first.json()["ingest_id"]
+    stats = stuck.stats()
+    assert (stats["enqueued"], stats["queue_depth"], stats["rejected"]) == (1, 1, 0)
+    # ključ je upisan pre reda, a ingest_id je id unosa u spool-u
+    assert first.json()["ingest_id"] in (tmp_path / "spool").read_text()
+    stuck.drain()
@@ -0,0 +1,103 @@
+import pathlib
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+
+from database import Base
+import fulltext
+import user_search
+
+BACKEND_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _config(connection) -> Config:
+    cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    cfg.attributes["connection"] = connection
+    cfg.attributes["configure_logger"] = False
+    return cfg
+
+
+def test_migration_chain_matches_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.sqlite3'}")
+    with engine.begin() as conn:
+        command.upgrade(_config(conn), "head")
+    with engine.connect() as conn:
+        # FTS5 tabele pretrage nisu u metapodacima (vidi user_search.py i fulltext.py)
+        include_name = lambda *a: user_search.include_name(*a) and fulltext.include_name(*a)
+        context = MigrationContext.configure(conn, opts={"include_name": include_name})
+        assert compare_metadata(context, Base.metadata) == []
+
+    # downgrade do baseline-a i nazad mora da prođe bez ručnih koraka
+    with engine.begin() as conn:
+        command.downgrade(_config(conn), "0001")
+    with engine.begin() as conn:
+        command.upgrade(_config(conn), "head")
+    engine.dispose()
+
+
+def test_typed_answers_backfill(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.sqlite3'}")
+    with engine.begin() as conn:
+        command.upgrade(_config(conn), "0006")
+        for statement in (
+            "INSERT INTO users (id, username) VALUES (1, 'stari')",
+            "INSERT INTO forms (id, name, owner_id) VALUES (1, 'Stara', 1)",
+            "INSERT INTO questions (id, form_id, text, type) VALUES (1, 1, 'Boja', 'radio'), (2, 1, 'Voće', 'checkbox'),"
+            " (3, 1, 'Ocena', 'number'), (4, 1, 'Dan', 'date'), (5, 1, 'Skala', 'numeric_choice')",
+            "INSERT INTO options (id, question_id, text) VALUES (10, 1, 'Crvena'), (20, 2, 'Jabuka'), (21, 2, 'Kruška'),"
+            " (50, 5, '3'), (51, 5, 'x')",
+            "INSERT INTO answers (id, question_id, value) VALUES (1, 1, '10'), (2, 1, '99'), (3, 2, '21,20,21'),"
+            " (4, 3, '4.5'), (5, 3, 'nan'), (6, 4, '2026-03-01'), (7, 5, '50'), (8, 5, '51')",
+        ):
+            conn.exec_driver_sql(statement)
+    with engine.begin() as conn:
+        command.upgrade(_config(conn), "0007")
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT id, option_id, value_num, value_date FROM answers ORDER BY id").all()
+        selections = conn.exec_driver_sql("SELECT answer_id, option_id FROM answer_selections ORDER BY rowid").all()
+    engine.dispose()
+
+    assert [tuple(r[:3]) for r in rows] == [
+        (1, 10, None), (2, None, None), (3, None, None), (4, None, 4.5), (5, None, None),
+        (6, None, None), (7, 50, 3.0), (8, 51, None),
+    ]
+    assert rows[5][3].startswith("2026-03-01 00:00:00")
+    assert [tuple(s) for s in selections] == [(3, 21), (3, 20)]
+
+
+def test_text_choice_answers_are_mapped_to_options(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'text_options.sqlite3'}")
+    with engine.begin() as conn:
+        command.upgrade(_config(conn), "0011")
+        for statement in (
+            "INSERT INTO users (id, username) VALUES (1, 'stari')",
+            "INSERT INTO forms (id, name, owner_id) VALUES (1, 'Stara', 1)",
+            "INSERT INTO questions (id, form_id, text, type) VALUES (1, 1, 'Boja', 'radio'), (2, 1, 'Voće', 'checkbox'),"
+            " (3, 1, 'Skala', 'numeric_choice')",
+            "INSERT INTO options (id, question_id, text) VALUES (10, 1, 'Crvena'), (20, 2, 'Jabuka'), (21, 2, 'Kruška'),"
+            " (30, 3, '4')",
+            "INSERT INTO answers (id, question_id, value) VALUES (1, 1, ' crvena'), (2, 1, 'Plava'), (3, 2, 'Kruška,jabuka,x'),"
+            " (4, 3, '4')",
+            "INSERT INTO answers (id, question_id, value, option_id) VALUES (5, 1, '10', 10)",
+            "INSERT INTO question_stats (question_id, answer_count, num_count) VALUES (1, 2, 0)",
+            "INSERT INTO answer_value_counts (question_id, value, total) VALUES (1, 'Crvena', 2)",
+        ):
+            conn.exec_driver_sql(statement)
+    with engine.begin() as conn:
+        command.upgrade(_config(conn), "0012")
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT id, option_id, value_num FROM answers ORDER BY id").all()
+        selections = conn.exec_driver_sql("SELECT answer_id, option_id FROM answer_selections ORDER BY rowid").all()
+        rollup_rows = conn.exec_driver_sql(
+            "SELECT (SELECT COUNT(*) FROM question_stats) + (SELECT COUNT(*) FROM answer_value_counts)"
+        ).scalar()
+    engine.dispose()
+
+    # "4" je za numeric_choice već bio id-kandidat, ali opcija 4 ne postoji pa se poklapa tekst
+    assert [tuple(r) for r in rows] == [(1, 10, None), (2, None, None), (3, None, None), (4, 30, 4.0), (5, 10, None)]
+    assert [tuple(s) for s in selections] == [(3, 21), (3, 20)]
+    assert rollup_rows == 0
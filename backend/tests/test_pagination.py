@@ -0,0 +1,76 @@
+import form_definitions
+from models import CollaboratorModel, FormModel, UserModel
+
+
+def _walk(client, path, headers=None, **params):
+    """Sve strane liste, prateći X-Next-Cursor; vraća redove i broj strana."""
+    rows, pages, cursor = [], 0, None
+    while True:
+        r = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert r.status_code == 200, r.text
+        rows.extend(r.json())
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return rows, pages
+
+
+def test_form_and_user_lists_are_keyset_paged(client, db, register_user_and_token, auth_header, make_superadmin):
+    h = auth_header(register_user_and_token("strane", "strane@example.com"))
+    register_user_and_token("strane_drugi", "strane_drugi@example.com")
+    me = client.get("/api/me", headers=h).json()
+    other = db.query(UserModel).filter(UserModel.username == "strane_drugi").one()
+    for i in range(5):
+        db.add(FormModel(name=f"Strana {i}", is_public=(i % 2 == 0), owner_id=me["id"]))
+        shared = FormModel(name=f"Deljena {i}", is_public=False, owner_id=other.id)
+        db.add(shared); db.flush()
+        db.add(CollaboratorModel(form_id=shared.id, user_id=me["id"], role="viewer"))
+    db.commit()
+
+    owned, pages = _walk(client, "/api/forms/owned", h, limit=2)
+    assert pages == 3 and [f["name"] for f in owned] == [f"Strana {i}" for i in range(5)]
+    mine, _ = _walk(client, "/api/forms/mine", h, limit=3)
+    ids = [f["id"] for f in mine]
+    assert len(ids) == 10 and ids == sorted(set(ids))
+    assert {f["my_role"] for f in mine} == {"owner", "viewer"}
+
+    form_definitions.public_cache.clear()  # forme su dodate mimo API-ja
+    public, _ = _walk(client, "/api/forms/public", limit=1)
+    assert {"Strana 0", "Strana 2", "Strana 4"} <= {f["name"] for f in public}
+    assert len({f["id"] for f in public}) == len(public)
+
+    own_only, _ = _walk(client, f"/api/users/{me['id']}/forms", h, limit=2)
+    with_collab, _ = _walk(client, f"/api/users/{me['id']}/forms", h, limit=4, include_collab=True)
+    assert len(own_only) == 5 and len(with_collab) == 10
+
+    make_superadmin("strane")
+    users, _ = _walk(client, "/api/users", h, limit=1)
+    assert [u["id"] for u in users] == sorted(u.id for u in db.query(UserModel).all())
+
+    assert client.get("/api/forms/owned", params={"cursor": "nije-kursor"}, headers=h).status_code == 400
+    assert client.get("/api/forms/owned", params={"limit": 0}, headers=h).status_code == 422
+
+
+def test_answers_pages_never_split_a_submission(client, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("strane_odg", "strane_odg@example.com"))
+    form_id = client.post("/api/forms", json={"name": "Strane", "description": None, "is_public": False}, headers=h).json()["id"]
+    q1, q2 = (
+        client.post(f"/api/forms/{form_id}/questions", data={"text": text, "type": "short_text", "is_required": "true"},
+                    headers=h).json()["id"]
+        for text in ("Ime", "Grad")
+    )
+    for i in range(5):
+        payload = {"answers": [{"question_id": q1, "answer": f"ime {i}"}, {"question_id": q2, "answer": f"grad {i}"}]}
+        assert client.post(f"/api/forms/{form_id}/answers", json=payload, headers=h).status_code == 200
+
+    rows, pages = _walk(client, f"/api/forms/{form_id}/answers", h, limit=2)
+    assert pages == 3
+    assert [r["odgovor"] for r in rows] == [v for i in range(5) for v in (f"ime {i}", f"grad {i}")]
+
+    r = client.get(f"/api/forms/{form_id}/submissions", params={"limit": 2}, headers=h)
+    newest = r.json()
+    r = client.get(f"/api/forms/{form_id}/submissions",
+                   params={"limit": 10, "cursor": r.headers["X-Next-Cursor"]}, headers=h)
+    older = r.json()
+    assert r.headers["X-Total-Count"] == "5" and "X-Next-Cursor" not in r.headers
+    assert len(newest) == 2 and len(older) == 3 and newest[-1]["id"] > older[0]["id"]
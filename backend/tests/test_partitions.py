@@ -0,0 +1,94 @@
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+import partitions
+from models import AnswerModel, AnswerSelectionModel, SubmissionModel
+
+
+def test_month_arithmetic_and_names():
+    assert partitions.add_months((2026, 11), 3) == (2027, 2)
+    assert partitions.add_months((2026, 1), -1) == (2025, 12)
+    assert partitions.partition_name((2026, 3)) == "answers_p202603"
+    assert partitions.month_start((2026, 3)).isoformat() == "2026-03-01T00:00:00+00:00"
+
+
+def test_sqlite_stays_unpartitioned(db):
+    assert partitions.is_partitioned(db) is False
+    assert partitions.pruning_clause(db, 1) == ("", {})
+    with pytest.raises(RuntimeError):
+        partitions.convert(db)
+
+
+def _form_with_submissions(client, db, h, times):
+    """Forma sa jednim popunjavanjem (dva odgovora) po zadatom trenutku."""
+    form_id = client.post("/api/forms", json={"name": "Particije", "description": "", "is_public": False}, headers=h).json()["id"]
+    qids = [
+        client.post(f"/api/forms/{form_id}/questions", data={
+            "text": text_, "type": "multiple_choice", "is_required": "true",
+            "options": json.dumps([{"text": "Da"}, {"text": "Ne"}]),
+        }, headers=h).json()["id"]
+        for text_ in ("Prvo", "Drugo")
+    ]
+    for _ in times:
+        r = client.post(f"/api/forms/{form_id}/answers", json={"answers": [
+            {"question_id": qid, "answer": ["Da", "Ne"]} for qid in qids
+        ]}, headers=h)
+        assert r.status_code == 200, r.text
+
+    # kao da su popunjavanja stigla u različitim mesecima (odgovori dele vreme svog popunjavanja).
+    # Vremena imaju mikrosekunde: SQLite poredi netipizirane parametre kao tekst, pa se granica
+    # bez njih ne bi poklopila sa sačuvanim "...:59.000000" (Postgres poredi timestamp-ove)
+    subs = db.query(SubmissionModel).filter(SubmissionModel.form_id == form_id).order_by(SubmissionModel.id).all()
+    for sub, at in zip(subs, times):
+        sub.submitted_at = at
+        db.query(AnswerModel).filter(AnswerModel.submission_id == sub.id).update(
+            {AnswerModel.submitted_at: at}, synchronize_session=False
+        )
+    db.commit()
+    return form_id, qids
+
+
+def test_pruning_clause_bounds_cover_form_submissions(client, db, register_user_and_token, auth_header, monkeypatch):
+    monkeypatch.setattr(partitions, "is_partitioned", lambda db: True)
+    h = auth_header(register_user_and_token("particije", "particije@example.com"))
+    times = [datetime(2026, 3, 2, 8, 0, 0, 1), datetime(2026, 1, 15, 12, 30, 0, 5), datetime(2026, 5, 31, 23, 59, 59, 999999)]
+    form_id, qids = _form_with_submissions(client, db, h, times)
+
+    clause, params = partitions.pruning_clause(db, form_id, alias="x")
+    assert clause == " AND x.submitted_at BETWEEN :prune_since AND :prune_until"
+    assert (params["prune_since"].replace(tzinfo=None), params["prune_until"].replace(tzinfo=None)) == (min(times), max(times))
+
+    since, until = datetime(2026, 2, 1), datetime(2026, 4, 1)
+    assert partitions.range_pruning_clause(db, since, until) == (
+        " AND a.submitted_at BETWEEN :prune_since AND :prune_until",
+        {"prune_since": since, "prune_until": until},
+    )
+
+    # uslov ne sme da izostavi nijedan odgovor forme
+    form_answers = "SELECT COUNT(*) FROM answers x JOIN questions q ON q.id = x.question_id WHERE q.form_id = :fid"
+    assert db.execute(text(form_answers + clause), {"fid": form_id, **params}).scalar() == 2 * len(times)
+
+    monkeypatch.setattr(partitions, "is_partitioned", lambda db: False)
+    assert partitions.pruning_clause(db, form_id) == ("", {})
+
+
+def test_delete_form_with_pruning_removes_every_answer(client, db, register_user_and_token, auth_header, monkeypatch,
+                                                      without_foreign_keys):
+    # bez kaskade odgovore briše samo DELETE sa uslovom za particije, pa bi svaki izostavljen ostao
+    monkeypatch.setattr(partitions, "is_partitioned", lambda db: True)
+    h = auth_header(register_user_and_token("particije_brisanje", "particije_brisanje@example.com"))
+    times = [datetime(2025, 12, 31, 23, 59, 59, 250000), datetime(2026, 1, 1, 0, 0, 0, 1), datetime(2026, 7, 4, 10, 15, 0, 7)]
+    form_id, qids = _form_with_submissions(client, db, h, times)
+    answer_ids = [a.id for a in db.query(AnswerModel.id).filter(AnswerModel.question_id.in_(qids))]
+    assert len(answer_ids) == 2 * len(times)
+
+    r = client.delete(f"/api/forms/{form_id}", headers=h)
+    assert r.status_code == 200, r.text
+
+    db.expire_all()
+    assert db.query(AnswerModel).filter(AnswerModel.id.in_(answer_ids)).count() == 0
+    assert db.query(AnswerSelectionModel).filter(AnswerSelectionModel.answer_id.in_(answer_ids)).count() == 0
+    assert db.query(SubmissionModel).filter(SubmissionModel.form_id == form_id).count() == 0
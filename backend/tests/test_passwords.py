@@ -0,0 +1,18 @@
+import passwords
+
+
+def test_login_uses_pool_and_sheds_load(client, monkeypatch, register_user_and_token):
+    register_user_and_token("lozinka", "lozinka@example.com", password="tajna123")
+
+    r = client.post("/api/login", json={"identifier": "lozinka@example.com", "password": "tajna123"})
+    assert r.status_code == 200, r.text
+    r = client.post("/token", data={"username": "lozinka", "password": "pogresna"})
+    assert r.status_code == 401
+
+    # sva mesta zauzeta: prijava se odmah odbija umesto da čeka
+    monkeypatch.setattr(passwords, "PASSWORD_MAX_PENDING", 0)
+    r = client.post("/api/login", json={"identifier": "lozinka", "password": "tajna123"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == passwords.PASSWORD_RETRY_AFTER
+    assert passwords.stats()["rejected"] >= 1
+    assert passwords.stats()["pending"] == 0
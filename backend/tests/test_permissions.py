@@ -0,0 +1,34 @@
+import permissions
+from models import CollaboratorModel, FormModel, UserModel
+
+
+def test_resolver_batches_and_memoizes_per_session(db, register_user_and_token, capture_queries):
+    register_user_and_token("prava_vlasnik", "prava_vlasnik@example.com")
+    register_user_and_token("prava_saradnik", "prava_saradnik@example.com")
+    owner = db.query(UserModel).filter(UserModel.username == "prava_vlasnik").one()
+    collab = db.query(UserModel).filter(UserModel.username == "prava_saradnik").one()
+
+    forms = [FormModel(name=f"Prava {i}", is_public=(i == 2), owner_id=owner.id) for i in range(3)]
+    db.add_all(forms); db.flush()
+    db.add(CollaboratorModel(form_id=forms[0].id, user_id=collab.id, role="Editor"))
+    db.add(CollaboratorModel(form_id=forms[1].id, user_id=collab.id, role="viewer"))
+    db.commit()
+    ids = [f.id for f in forms]
+    db.refresh(owner); db.refresh(collab)
+
+    with capture_queries() as statements:
+        access = permissions.resolve_many(db, ids + [10**9], collab)
+        assert len(statements) == 1
+        assert set(access) == set(ids)
+        assert access[ids[0]].is_editor and access[ids[1]].collab_role == "viewer"
+        assert access[ids[2]].can_view and not access[ids[2]].is_collaborator
+        assert permissions.resolve(db, ids[1], collab).can_view
+        assert permissions.resolve(db, 10**9, collab) is None
+        assert len(statements) == 1
+
+        owner_access = permissions.resolve(db, ids[0], owner)
+        assert owner_access.is_owner and len(statements) == 2
+
+        permissions.forget(db, ids[0])
+        permissions.resolve(db, ids[0], collab)
+        assert len(statements) == 3
@@ -0,0 +1,66 @@
+"""
+EXPLAIN QUERY PLAN za upite koje izvršavaju ključni endpoint-i (odgovori, izvoz, analitika,
+popunjavanja, liste formi). Test pada ako neki od njih čita veliku tabelu punim prolazom.
+"""
+import re
+
+# tabele koje rastu sa brojem korisnika/odgovora; users je ovde pokriven jedinstvenim indeksima
+HOT_TABLES = {"answers", "questions", "options", "submissions", "forms", "answer_selections",
+              "answer_value_counts", "question_stats", "collaborators"}
+
+
+def full_scans(engine, statement, parameters):
+    """Redovi plana 'SCAN <tabela>' za velike tabele (alias se razrešava iz samog upita)."""
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", statement, re.I):
+        aliases[(alias or table).lower()] = table.lower()
+        aliases[table.lower()] = table.lower()
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    bad = []
+    for row in plan:
+        m = re.match(r"SCAN (\w+)", row[-1])
+        if m and aliases.get(m.group(1).lower(), m.group(1).lower()) in HOT_TABLES:
+            bad.append(row[-1])
+    return bad
+
+
+def test_hot_queries_use_indexes(client, db, seed_export_form, register_user_and_token, auth_header, capture_queries):
+    h = auth_header(register_user_and_token("planer", "planer@example.com"))
+    me = client.get("/api/me", headers=h).json()
+    seeded = seed_export_form(me["id"], n_answers=200)
+    form_id = seeded["form_id"]
+    q_color = seeded["q"][0].id
+    for i in range(3):
+        r = client.post(f"/api/forms/{form_id}/answers", json={"answers": [{"question_id": q_color, "answer": "Crvena"}]}, headers=h)
+        assert r.status_code == 200, r.text
+
+    engine = db.get_bind()
+    with capture_queries() as queries:
+        for path in (
+            f"/api/forms/{form_id}",
+            f"/api/forms/{form_id}/answers",
+            f"/api/forms/{form_id}/analytics",
+            f"/api/forms/{form_id}/export.csv",
+            f"/api/forms/{form_id}/submissions",
+            "/api/forms/owned",
+            "/api/forms/mine",
+            "/api/forms/public",
+            "/api/users",
+        ):
+            assert client.get(path, headers=h).status_code == 200, path
+        r = client.get(f"/api/forms/{form_id}/answers", params={"limit": 1}, headers=h)
+        r = client.get(f"/api/forms/{form_id}/answers",
+                       params={"limit": 1, "cursor": r.headers["X-Next-Cursor"]}, headers=h)
+        assert r.status_code == 200 and len(r.json()) == 1
+        r = client.delete(f"/api/forms/{form_id}", headers=h)
+        assert r.status_code == 200, r.text
+
+    statements = [(q.statement, q.parameters) for q in queries if q.is_select and not q.executemany]
+    assert len(statements) > 10
+    regressions = {}
+    for statement, parameters in statements:
+        bad = full_scans(engine, statement, parameters)
+        if bad:
+            regressions[" ".join(statement.split())] = bad
+    assert regressions == {}
@@ -0,0 +1,135 @@
+import json
+
+from sqlalchemy.dialects import postgresql
+
+import rollups
+from analytics import _from_rollups, build_live_analytics
+from models import AnswerModel, FormModel, QuestionModel, QuestionStatsModel, AnswerValueCountModel
+
+
+def _create_form_with_questions(client, h):
+    form_id = client.post("/api/forms", json={"name": "Rollup", "description": "", "is_public": True}, headers=h).json()["id"]
+    q_color = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Boja", "type": "single_choice", "is_required": "true",
+        "options": json.dumps([{"text": "Crvena"}, {"text": "Plava"}]),
+    }, headers=h).json()["id"]
+    q_fruit = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Voće", "type": "multiple_choice", "is_required": "false",
+        "options": json.dumps([{"text": "Jabuka"}, {"text": "Kruška"}]),
+    }, headers=h).json()["id"]
+    q_text = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Komentar", "type": "short_text", "is_required": "false",
+    }, headers=h).json()["id"]
+    return form_id, q_color, q_fruit, q_text
+
+
+def _live(db, form_id):
+    db.expire_all()
+    form = db.query(FormModel).filter(FormModel.id == form_id).first()
+    return build_live_analytics(db, list(form.questions))
+
+
+def test_rollups_follow_submissions_and_edits(client, db, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("rollup", "rollup@example.com"))
+    form_id, q_color, q_fruit, q_text = _create_form_with_questions(client, h)
+
+    for color, fruits in [("Crvena", ["Jabuka", "Kruška"]), ("Plava", ["Jabuka"]), ("Crvena", [])]:
+        answers = [{"question_id": q_color, "answer": color}, {"question_id": q_text, "answer": "ok"}]
+        if fruits:
+            answers.append({"question_id": q_fruit, "answer": fruits})
+        r = client.post(f"/api/forms/{form_id}/answers", json={"answers": answers})
+        assert r.status_code == 200, r.text
+
+    assert db.query(QuestionStatsModel).filter(QuestionStatsModel.question_id == q_color).one().answer_count == 3
+    r = client.get(f"/api/forms/{form_id}/analytics", headers=h)
+    assert r.status_code == 200, r.text
+    assert r.json()["analytics"] == _live(db, form_id)
+    assert rollups.check(db, form_id) == []
+
+    r = client.put(f"/api/forms/{form_id}/questions/{q_text}", json={"type": "multiple_choice"}, headers=h)
+    assert r.status_code == 200, r.text
+    assert rollups.check(db, form_id) == []
+
+    r = client.delete(f"/api/forms/{form_id}/questions/{q_fruit}", headers=h)
+    assert r.status_code == 204
+    assert db.query(AnswerValueCountModel).filter(AnswerValueCountModel.question_id == q_fruit).count() == 0
+    assert db.query(QuestionStatsModel).filter(QuestionStatsModel.question_id == q_fruit).count() == 0
+
+
+def test_question_without_rollup_is_rebuilt_on_first_submission(client, db, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("legacy", "legacy@example.com"))
+    owner_id = client.get("/api/me", headers=h).json()["id"]
+
+    form = FormModel(name="Stara", description=None, is_public=True, is_locked=False, owner_id=owner_id)
+    db.add(form); db.flush()
+    q = QuestionModel(form_id=form.id, text="Ocena", type="number", is_required=True, order=1)
+    db.add(q); db.flush()
+    db.add_all([AnswerModel(question_id=q.id, value=v, value_num=float(v)) for v in ("4", "5")])
+    db.commit()
+
+    r = client.get(f"/api/forms/{form.id}/analytics", headers=h)
+    assert r.json()["analytics"][0]["count"] == 2
+
+    r = client.post(f"/api/forms/{form.id}/answers", json={"answers": [{"question_id": q.id, "answer": "9"}]})
+    assert r.status_code == 200, r.text
+
+    db.expire_all()
+    stats = db.query(QuestionStatsModel).filter(QuestionStatsModel.question_id == q.id).one()
+    assert (stats.answer_count, stats.num_count, stats.num_min, stats.num_max) == (3, 3, 4.0, 9.0)
+    r = client.get(f"/api/forms/{form.id}/analytics", headers=h)
+    assert r.json()["analytics"][0]["avg"] == 6.0
+    assert rollups.check(db, form.id) == []
+
+
+def test_rollup_and_live_analytics_agree_on_numbers(client, db, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("prosek", "prosek@example.com"))
+    owner_id = client.get("/api/me", headers=h).json()["id"]
+
+    form = FormModel(name="Prosek", description=None, is_public=True, is_locked=False, owner_id=owner_id)
+    db.add(form); db.flush()
+    q = QuestionModel(form_id=form.id, text="Iznos", type="number", is_required=True, order=1)
+    db.add(q); db.flush()
+    # zbir ovih vrednosti u float-u nije tačan, pa bi različito zaokruživanje dalo drugi prosek
+    values = ["0.1", "0.2", "0.3", "0.00005", "1e-5", "2.675"]
+    db.add_all([AnswerModel(question_id=q.id, value=v, value_num=float(v)) for v in values])
+    db.commit()
+    rollups.rebuild(db, form.id)
+
+    db.expire_all()
+    questions = list(db.query(FormModel).filter(FormModel.id == form.id).one().questions)
+    rolled = _from_rollups(db, questions)
+    assert rolled is not None
+    assert rolled == build_live_analytics(db, questions)
+    assert rolled[0]["avg"] == round(sum(float(v) for v in values) / len(values), 4)
+
+
+def test_rollup_rows_are_locked_in_question_order(client, db, register_user_and_token, auth_header, monkeypatch, capture_queries):
+    h = auth_header(register_user_and_token("redosled", "redosled@example.com"))
+    form_id, q_color, q_fruit, q_text = _create_form_with_questions(client, h)
+
+    answers = [
+        {"question_id": q_text, "answer": "b"},
+        {"question_id": q_fruit, "answer": ["Kruška", "Jabuka"]},
+        {"question_id": q_color, "answer": "Plava"},
+    ]
+    with capture_queries() as queries:
+        assert client.post(f"/api/forms/{form_id}/answers", json={"answers": answers}).status_code == 200
+    statements = [(q.statement, q.parameters) for q in queries]
+    stats_update = next(p for s, p in statements if s.startswith("UPDATE question_stats"))
+    assert [row[-1] for row in stats_update] == sorted([q_color, q_fruit, q_text])
+    value_upsert = next(p for s, p in statements if s.startswith("INSERT INTO answer_value_counts"))
+    keys = [(row[0], row[1]) for row in value_upsert]
+    assert keys == sorted(keys) and len(keys) == 3  # boja i dva voća; tekst se ne broji po vrednosti
+
+    # pitanje bez rollup-a koje je paralelna predaja izgradila dok se čekalo na zaključavanje
+    assert "FOR NO KEY UPDATE" in str(rollups.lock_questions([q_color]).compile(dialect=postgresql.dialect()))
+    real_existing, calls, rebuilt = rollups._existing_stats, [], []
+
+    def stale_first_check(db, ids):
+        calls.append(ids)
+        return set() if len(calls) == 1 else real_existing(db, ids)
+
+    monkeypatch.setattr(rollups, "_existing_stats", stale_first_check)
+    monkeypatch.setattr(rollups, "rebuild_question", lambda *a: rebuilt.append(a))
+    assert client.post(f"/api/forms/{form_id}/answers", json={"answers": [{"question_id": q_color, "answer": "Crvena"}]}).status_code == 200
+    assert rebuilt == [] and rollups.check(db, form_id) == []
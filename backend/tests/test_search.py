@@ -0,0 +1,74 @@
+import json
+
+
+def _form(client, h, name, description, is_public):
+    r = client.post("/api/forms", json={"name": name, "description": description, "is_public": is_public}, headers=h)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def _question(client, h, form_id, text, qtype, options=None):
+    data = {"text": text, "type": qtype, "is_required": "false"}
+    if options is not None:
+        data["options"] = json.dumps([{"text": t} for t in options])
+    r = client.post(f"/api/forms/{form_id}/questions", data=data, headers=h)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def _search(client, h=None, **params):
+    r = client.get("/api/search", params=params, headers=h)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_search_respects_visibility_and_follows_changes(client, register_user_and_token, auth_header):
+    owner = auth_header(register_user_and_token("trazi_vlasnik", "trazi_vlasnik@example.com"))
+    other = auth_header(register_user_and_token("trazi_drugi", "trazi_drugi@example.com"))
+    private_id = _form(client, owner, "Anketa o biciklima", "Privatno istraživanje", False)
+    public_id = _form(client, other, "Javna biciklistička anketa", None, True)
+    q_text = _question(client, owner, private_id, "Koji bicikl voziš?", "short_text")
+    q_choice = _question(client, owner, private_id, "Boja", "single_choice", ["Zelenkasta"])
+    choice_option = client.get(f"/api/forms/{private_id}", headers=owner).json()["questions"][1]["options"][0]["id"]
+    r = client.post(f"/api/forms/{private_id}/answers", headers=owner, json={"answers": [
+        {"question_id": q_text, "answer": "Zelenkasti brdski bicikl"},
+        {"question_id": q_choice, "answer": choice_option},
+    ]})
+    assert r.status_code == 200, r.text
+
+    assert [h["form_id"] for h in _search(client, q="bicikl")] == [public_id]
+    assert [h["form_id"] for h in _search(client, owner, q="bicikl")] == [public_id, private_id]
+    assert _search(client, owner, q="istrazivanje biciklima")[0]["form_id"] == private_id
+    # dijakritici se ignorišu, poslednja reč je prefiks
+    hits = _search(client, owner, q="vozis", kind="questions")
+    assert [(h["kind"], h["question_id"]) for h in hits] == [("question", q_text)]
+
+    assert client.get("/api/search", params={"q": "brdski", "kind": "answers"}).status_code == 401
+    assert _search(client, other, q="brdski", kind="answers") == []
+    hits = _search(client, owner, q="brdski", kind="answers")
+    assert [(h["form_id"], h["text"]) for h in hits] == [(private_id, "Zelenkasti brdski bicikl")]
+    # odgovori na pitanja sa izborom nisu tekst
+    assert [h["question_id"] for h in _search(client, owner, q="zelenkast", kind="answers")] == [q_text]
+
+    page = client.get("/api/search", params={"q": "anketa", "limit": 1}, headers=owner)
+    assert [h["form_id"] for h in page.json()] == [public_id]
+    page = client.get("/api/search", params={"q": "anketa", "limit": 1, "cursor": page.headers["X-Next-Cursor"]}, headers=owner)
+    assert [h["form_id"] for h in page.json()] == [private_id] and "X-Next-Cursor" not in page.headers
+
+    assert client.put(f"/api/forms/{private_id}", json={"name": "Upitnik o trotinetima"}, headers=owner).status_code == 200
+    assert [h["form_id"] for h in _search(client, owner, q="trotinet")] == [private_id]
+    assert [h["form_id"] for h in _search(client, owner, q="biciklima")] == []
+
+    r = client.put(f"/api/forms/{private_id}/questions/{q_text}", headers=owner,
+                   json={"text": "Koliko bicikala imaš?", "type": "long_text", "is_required": False})
+    assert r.status_code == 200, r.text
+    assert [h["question_id"] for h in _search(client, owner, q="bicikala", kind="questions")] == [q_text]
+    assert len(_search(client, owner, q="brdski", kind="answers")) == 1
+    r = client.put(f"/api/forms/{private_id}/questions/{q_text}", headers=owner,
+                   json={"text": "Koliko bicikala imaš?", "type": "date", "is_required": False})
+    assert r.status_code == 200, r.text
+    assert _search(client, owner, q="brdski", kind="answers") == []
+
+    assert client.delete(f"/api/forms/{private_id}", headers=owner).status_code == 200
+    assert _search(client, owner, q="trotinet") == []
+    assert client.get("/api/search", params={"q": "?!"}).status_code == 400
@@ -0,0 +1,74 @@
+import json
+
+
+def _private_form(client, h):
+    form_id = client.post("/api/forms", json={"name": "Anketa", "description": "", "is_public": False}, headers=h).json()["id"]
+    q_color = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Boja", "type": "single_choice", "is_required": "true",
+        "options": json.dumps([{"text": "Crvena"}, {"text": "Plava"}]),
+    }, headers=h).json()["id"]
+    q_text = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Komentar", "type": "short_text", "is_required": "false",
+    }, headers=h).json()["id"]
+    return form_id, q_color, q_text
+
+
+def test_each_post_creates_one_submission(client, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("popunjavanje", "popunjavanje@example.com"))
+    form_id, q_color, q_text = _private_form(client, h)
+
+    ids = []
+    for color, comment in [("Crvena", "prvi"), ("Plava", "drugi")]:
+        r = client.post(f"/api/forms/{form_id}/answers", json={"answers": [
+            {"question_id": q_color, "answer": color}, {"question_id": q_text, "answer": comment},
+        ]}, headers=h)
+        assert r.status_code == 200, r.text
+        ids.append(r.json()["submission_id"])
+    assert ids[0] != ids[1]
+
+    r = client.get(f"/api/forms/{form_id}/submissions", headers=h)
+    assert r.status_code == 200, r.text
+    assert r.headers["X-Total-Count"] == "2"
+    assert sorted(s["id"] for s in r.json()) == sorted(ids)
+    assert all(s["user_email"] == "popunjavanje@example.com" for s in r.json())
+
+    r = client.get(f"/api/forms/{form_id}/submissions/{ids[1]}", headers=h)
+    assert r.status_code == 200, r.text
+    assert [(a["question_id"], a["type"]) for a in r.json()["answers"]] == [(q_color, "single_choice"), (q_text, "short_text")]
+    assert r.json()["answers"][1]["value"] == "drugi"
+
+    other_form, _, _ = _private_form(client, h)
+    assert client.get(f"/api/forms/{other_form}/submissions/{ids[0]}", headers=h).status_code == 404
+
+    stranger = auth_header(register_user_and_token("popunjavanje_stranac", "popunjavanje_stranac@example.com"))
+    assert client.get(f"/api/forms/{form_id}/submissions", headers=stranger).status_code == 403
+
+
+def test_batch_reports_item_errors_and_stores_valid(client, db, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("kiosk", "kiosk@example.com"))
+    form_id, q_color, q_text = _private_form(client, h)
+
+    batch = {"submissions": [
+        {"answers": [{"question_id": q_color, "answer": "Crvena"}, {"question_id": q_text, "answer": "a"}]},
+        {"answers": [{"question_id": q_text, "answer": "bez boje"}]},
+        {"answers": [{"question_id": q_color, "answer": "Zelena"}]},
+        {"answers": [{"question_id": q_color, "answer": "Plava"}]},
+    ]}
+    r = client.post(f"/api/forms/{form_id}/answers/batch", json=batch, headers=h)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["accepted"], body["rejected"]) == (2, 2)
+    assert [item["status"] for item in body["results"]] == ["ok", "error", "error", "ok"]
+    assert body["results"][1]["detail"] == "Pitanje 'Boja' je obavezno."
+    assert body["results"][2]["detail"] == "Nevažeća opcija za pitanje 'Boja'."
+
+    r = client.get(f"/api/forms/{form_id}/submissions", headers=h)
+    assert r.headers["X-Total-Count"] == "2"
+    stored = client.get(f"/api/forms/{form_id}/submissions/{body['results'][3]['submission_id']}", headers=h).json()
+    assert [a["question_id"] for a in stored["answers"]] == [q_color]
+
+    r = client.get(f"/api/forms/{form_id}/analytics", headers=h)
+    color = next(item for item in r.json()["analytics"] if item["question_id"] == q_color)
+    assert color["total_answers"] == 2
+
+    assert client.post(f"/api/forms/{form_id}/answers/batch", json=batch).status_code == 403
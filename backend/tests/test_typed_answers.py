@@ -0,0 +1,82 @@
+import json
+
+from sqlalchemy import func, text
+
+from models import AnswerModel, AnswerSelectionModel, OptionModel
+
+
+def _question(client, h, form_id, text, qtype, options=None):
+    data = {"text": text, "type": qtype, "is_required": "false"}
+    if options is not None:
+        data["options"] = json.dumps([{"text": t} for t in options])
+    r = client.post(f"/api/forms/{form_id}/questions", data=data, headers=h)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def test_submit_writes_typed_columns_and_selections(client, db, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("tipovi", "tipovi@example.com"))
+    form_id = client.post("/api/forms", json={"name": "Tipovi", "description": "", "is_public": False}, headers=h).json()["id"]
+    q_multi = _question(client, h, form_id, "Voće", "multiple_choice", ["Jabuka", "Kruška", "Šljiva"])
+    q_scale = _question(client, h, form_id, "Ocena", "numeric_choice", ["1", "2", "3"])
+    q_date = _question(client, h, form_id, "Datum", "date")
+
+    opts = {o.text: o.id for o in db.query(OptionModel).filter(OptionModel.question_id.in_([q_multi, q_scale]))}
+    for fruit, grade in [(["Jabuka", "Šljiva"], 3), (["Jabuka"], 2), (["Kruška", "Jabuka", "Jabuka"], 3)]:
+        r = client.post(f"/api/forms/{form_id}/answers", json={"answers": [
+            {"question_id": q_multi, "answer": fruit},
+            {"question_id": q_scale, "answer": grade},
+            {"question_id": q_date, "answer": "2026-10-18"},
+        ]}, headers=h)
+        assert r.status_code == 200, r.text
+
+    db.expire_all()
+    per_option = dict(
+        db.query(AnswerSelectionModel.option_id, func.count())
+        .filter(AnswerSelectionModel.option_id.in_([opts["Jabuka"], opts["Kruška"], opts["Šljiva"]]))
+        .group_by(AnswerSelectionModel.option_id)
+        .all()
+    )
+    # ponovljena opcija u jednom odgovoru se broji jednom
+    assert per_option == {opts["Jabuka"]: 3, opts["Kruška"]: 1, opts["Šljiva"]: 1}
+
+    scale = db.query(AnswerModel).filter(AnswerModel.question_id == q_scale).all()
+    assert {a.option_id for a in scale} == {opts["2"], opts["3"]}
+    assert db.query(func.avg(AnswerModel.value_num)).filter(AnswerModel.question_id == q_scale).scalar() == 8 / 3
+
+    dates = db.query(AnswerModel).filter(AnswerModel.question_id == q_date).all()
+    assert all(a.value_date.date().isoformat() == "2026-10-18" and a.option_id is None for a in dates)
+
+    # promena tipa ponovo računa tipizirane kolone iz answers.value
+    r = client.put(f"/api/forms/{form_id}/questions/{q_scale}", json={"type": "multiple_choice"}, headers=h)
+    assert r.status_code == 200, r.text
+    db.expire_all()
+    assert {a.option_id for a in db.query(AnswerModel).filter(AnswerModel.question_id == q_scale)} == {None}
+    assert db.query(AnswerSelectionModel).filter(AnswerSelectionModel.option_id == opts["3"]).count() == 2
+
+
+def test_deletes_leave_no_orphan_selections(client, db, register_user_and_token, auth_header, without_foreign_keys):
+    h = auth_header(register_user_and_token("siroce", "siroce@example.com"))
+    form_id = client.post("/api/forms", json={"name": "Siročad", "description": "", "is_public": False}, headers=h).json()["id"]
+    q_fruit = _question(client, h, form_id, "Voće", "multiple_choice", ["Jabuka", "Kruška"])
+    q_veg = _question(client, h, form_id, "Povrće", "multiple_choice", ["Luk", "Paprika"])
+    for _ in range(3):
+        r = client.post(f"/api/forms/{form_id}/answers", json={"answers": [
+            {"question_id": q_fruit, "answer": ["Jabuka", "Kruška"]},
+            {"question_id": q_veg, "answer": ["Luk"]},
+        ]}, headers=h)
+        assert r.status_code == 200, r.text
+
+    def orphans():
+        db.expire_all()
+        return db.execute(text(
+            "SELECT COUNT(*) FROM answer_selections WHERE answer_id NOT IN (SELECT id FROM answers)"
+        )).scalar()
+
+    assert client.delete(f"/api/forms/{form_id}/questions/{q_fruit}", headers=h).status_code == 204
+    assert orphans() == 0
+    assert db.query(AnswerSelectionModel).join(AnswerModel).filter(AnswerModel.question_id == q_veg).count() == 3
+
+    assert client.delete(f"/api/forms/{form_id}", headers=h).status_code == 200
+    assert orphans() == 0
+    assert db.query(AnswerModel).filter(AnswerModel.question_id.in_([q_fruit, q_veg])).count() == 0
@@ -0,0 +1,55 @@
+from models import CollaboratorModel, FormModel, UserModel
+
+
+def _search(client, h, **params):
+    r = client.get("/api/users/search", params=params, headers=h)
+    assert r.status_code == 200, r.text
+    return [u["username"] for u in r.json()]
+
+
+def test_search_is_ranked_indexed_and_kept_in_sync(client, db, register_user_and_token, auth_header, capture_queries):
+    h = auth_header(register_user_and_token("trazilac", "trazilac@example.com"))
+    for username, email in (("marko", "m.petrovic@example.com"), ("zmarkovic", "zm@example.com"),
+                            ("ana", "ana.marko@example.com"), ("pet_ar", "p100%@example.com")):
+        register_user_and_token(username, email)
+
+    assert _search(client, h, q="marko") == ["marko", "zmarkovic", "ana"]
+    assert _search(client, h, q="MARK", limit=1) == ["marko"]
+    assert _search(client, h, q="petrovic") == ["marko"]
+    # džokeri iz upita se traže doslovno
+    assert _search(client, h, q="t_ar") == ["pet_ar"]
+    assert _search(client, h, q="0%") == ["pet_ar"]
+    assert _search(client, h, q="t%a") == []
+
+    with capture_queries() as queries:
+        _search(client, h, q="arkov")
+    search_sql, parameters, _ = next(q for q in queries if "MATCH" in q.statement)
+    with db.get_bind().connect() as conn:
+        plan = [r[-1] for r in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + search_sql, parameters)]
+    # FTS5 indeks bira kandidate, users se čita samo po primarnom ključu
+    assert any("VIRTUAL TABLE" in p for p in plan) and "SCAN users" not in plan
+
+    marko = db.query(UserModel).filter(UserModel.username == "marko").one()
+    marko.username = "nikola"
+    db.commit()
+    assert _search(client, h, q="marko") == ["zmarkovic", "ana"]
+    assert _search(client, h, q="nikol") == ["nikola"]
+
+
+def test_search_excludes_owner_and_collaborators(client, db, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("iskljucen_vl", "iskljucen_vl@example.com"))
+    for name in ("iskljucen_a", "iskljucen_b"):
+        register_user_and_token(name, f"{name}@example.com")
+    owner = db.query(UserModel).filter(UserModel.username == "iskljucen_vl").one()
+    b = db.query(UserModel).filter(UserModel.username == "iskljucen_b").one()
+    form = FormModel(name="Isključeni", is_public=False, owner_id=owner.id)
+    db.add(form); db.flush()
+    db.add(CollaboratorModel(form_id=form.id, user_id=b.id, role="viewer"))
+    db.commit()
+
+    assert _search(client, h, q="iskljucen", exclude_form_id=form.id) == ["iskljucen_a"]
+    short = _search(client, h, q="is", exclude_form_id=form.id, limit=50)
+    assert "iskljucen_a" in short and not {"iskljucen_vl", "iskljucen_b"} & set(short)
+    r = client.get("/api/users/search", params={"q": "iskljucen", "exclude_form_id": 10**9}, headers=h)
+    assert r.status_code == 404
+    assert client.get("/api/users/search", params={"q": "i"}, headers=h).status_code == 400
@@ -0,0 +1,58 @@
+import json
+
+
+def _form(client, h):
+    form_id = client.post("/api/forms", json={"name": "Validacija", "description": "", "is_public": True}, headers=h).json()["id"]
+    q_scale = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Ocena", "type": "numeric_choice", "is_required": "true",
+        "options": json.dumps([{"text": "1"}, {"text": "2"}, {"text": "3"}]),
+    }, headers=h).json()["id"]
+    q_fruit = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Voće", "type": "multiple_choice", "is_required": "false", "max_choices": "2",
+        "options": json.dumps([{"text": "Jabuka"}, {"text": "Kruška"}, {"text": "Šljiva"}]),
+    }, headers=h).json()["id"]
+    return form_id, q_scale, q_fruit
+
+
+def _submit(client, form_id, answers):
+    return client.post(f"/api/forms/{form_id}/answers", json={"answers": answers})
+
+
+def test_cached_validator_skips_option_queries(client, db, register_user_and_token, auth_header, capture_queries):
+    h = auth_header(register_user_and_token("validator", "validator@example.com"))
+    form_id, q_scale, q_fruit = _form(client, h)
+    assert _submit(client, form_id, [{"question_id": q_scale, "answer": "2"}]).status_code == 200
+
+    with capture_queries() as queries:
+        r = _submit(client, form_id, [
+            {"question_id": q_scale, "answer": "3.0"},
+            {"question_id": q_fruit, "answer": ["Jabuka", "Šljiva"]},
+        ])
+    assert r.status_code == 200, r.text
+    assert not [q for q in queries if "FROM options" in q.statement or "FROM questions" in q.statement]
+
+    r = _submit(client, form_id, [{"question_id": q_scale, "answer": "7"}])
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Odgovor nije u dozvoljenom opsegu za 'Ocena'."
+    r = _submit(client, form_id, [{"question_id": q_scale, "answer": "1"}, {"question_id": q_fruit, "answer": "Jabuka,Kruška,Šljiva"}])
+    assert r.json()["detail"] == "Dozvoljeno je najviše 2 izbora za 'Voće'."
+
+
+def test_question_changes_invalidate_validator(client, register_user_and_token, auth_header):
+    h = auth_header(register_user_and_token("validator2", "validator2@example.com"))
+    form_id, q_scale, q_fruit = _form(client, h)
+    assert _submit(client, form_id, [{"question_id": q_scale, "answer": "1"}]).status_code == 200
+
+    r = client.put(f"/api/forms/{form_id}/questions/{q_scale}", json={"options": [{"text": "10"}, {"text": "20"}]}, headers=h)
+    assert r.status_code == 200, r.text
+    assert _submit(client, form_id, [{"question_id": q_scale, "answer": "1"}]).status_code == 400
+    assert _submit(client, form_id, [{"question_id": q_scale, "answer": "20"}]).status_code == 200
+
+    q_name = client.post(f"/api/forms/{form_id}/questions", data={
+        "text": "Ime", "type": "short_text", "is_required": "true",
+    }, headers=h).json()["id"]
+    r = _submit(client, form_id, [{"question_id": q_scale, "answer": "10"}])
+    assert r.json()["detail"] == "Pitanje 'Ime' je obavezno."
+
+    assert client.delete(f"/api/forms/{form_id}/questions/{q_name}", headers=h).status_code == 204
+    assert _submit(client, form_id, [{"question_id": q_scale, "answer": "10"}]).status_code == 200
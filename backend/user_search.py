@@ -0,0 +1,179 @@
+"""
+Pretraga korisnika po delu korisničkog imena ili email-a (birač saradnika).
+
+Postgres: pg_trgm GIN indeksi nad users.username i users.email, koje ILIKE '%q%' koristi
+direktno. SQLite: FTS5 tabela users_search sa trigram tokenizerom (external content nad
+users, sinhronizovana trigerima). Trigram indeks pomaže tek od 3 znaka; upit od 2 znaka ide
+redom po id-ju i staje posle RANK_CANDIDATES pogodaka.
+
+Objekti nisu deo SQLAlchemy metapodataka: prave se migracijom 0010, a pri create_all
+(testovi, benchmark) preko after_create događaja tabele users.
+"""
+import os
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import case, column, event, exists, func, literal_column, or_, select, table, union
+from sqlalchemy.orm import Session
+
+from models import CollaboratorModel, FormModel, UserModel
+
+FTS_TABLE = "users_search"
+TRGM_INDEXES = {"ix_users_username_trgm": "username", "ix_users_email_trgm": "email"}
+MIN_QUERY_LEN = 2
+TRIGRAM_LEN = 3
+# koliko pogodaka indeksa se rangira; ostali se ne čitaju
+RANK_CANDIDATES = int(os.getenv("USER_SEARCH_CANDIDATES", "200"))
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        username, email, content='users', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON users BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, username, email) VALUES (new.id, new.username, new.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON users BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, username, email) VALUES ('delete', old.id, old.username, old.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF username, email ON users BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, username, email) VALUES ('delete', old.id, old.username, old.email);
+        INSERT INTO {FTS_TABLE}(rowid, username, email) VALUES (new.id, new.username, new.email);
+    END""",
+    # postojeći korisnici
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+_SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def ddl(dialect: str, concurrently: bool = False) -> List[str]:
+    """Naredbe koje prave indeks pretrage za dati dijalekt (CONCURRENTLY samo van transakcije)."""
+    if dialect == "postgresql":
+        how = "CONCURRENTLY " if concurrently else ""
+        return ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+            f"CREATE INDEX {how}IF NOT EXISTS {name} ON users USING gin ({col} gin_trgm_ops)"
+            for name, col in TRGM_INDEXES.items()
+        ]
+    if dialect == "sqlite":
+        return list(_SQLITE_DDL)
+    return []
+
+
+def drop_ddl(dialect: str) -> List[str]:
+    if dialect == "postgresql":
+        return [f"DROP INDEX IF EXISTS {name}" for name in TRGM_INDEXES]
+    if dialect == "sqlite":
+        return list(_SQLITE_DROP)
+    return []
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Za alembic autogenerate/compare_metadata: objekti pretrage nisu u metapodacima modela."""
+    if type_ == "table":
+        return not (name or "").startswith(FTS_TABLE)
+    if type_ == "index":
+        return name not in TRGM_INDEXES
+    return True
+
+
+@event.listens_for(UserModel.__table__, "after_create")
+def _install(target, connection, **kw):
+    for statement in ddl(connection.dialect.name):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(UserModel.__table__, "before_drop")
+def _uninstall(target, connection, **kw):
+    for statement in drop_ddl(connection.dialect.name):
+        connection.exec_driver_sql(statement)
+
+
+def _like_pattern(q: str, prefix_only: bool = False) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if prefix_only else f"%{escaped}%"
+
+
+def _not_excluded(user_id, owner_id: Optional[int], exclude_form_id: Optional[int]) -> list:
+    if exclude_form_id is None:
+        return []
+    return [user_id != owner_id, ~exists().where(
+        CollaboratorModel.form_id == exclude_form_id, CollaboratorModel.user_id == user_id
+    )]
+
+
+def _contains(db: Session, q: str, owner_id: Optional[int], exclude_form_id: Optional[int]):
+    """id-jevi korisnika čije ime ili email sadrži q, najviše RANK_CANDIDATES, redom kojim ih daje indeks."""
+    u = UserModel
+    if db.get_bind().dialect.name == "sqlite" and len(q) >= TRIGRAM_LEN:
+        fts = table(FTS_TABLE, column("rowid"))
+        phrase = '"' + q.replace('"', '""') + '"'
+        stmt = select(fts.c.rowid).where(
+            literal_column(FTS_TABLE).op("MATCH")(phrase), *_not_excluded(fts.c.rowid, owner_id, exclude_form_id)
+        )
+    else:
+        # Postgres: ILIKE preko pg_trgm GIN indeksa; SQLite sa 2 znaka: prolaz koji staje na limitu
+        pattern = _like_pattern(q)
+        stmt = select(u.id).where(
+            or_(u.username.ilike(pattern, escape="\\"), u.email.ilike(pattern, escape="\\")),
+            *_not_excluded(u.id, owner_id, exclude_form_id),
+        )
+    return stmt.limit(RANK_CANDIDATES).subquery()
+
+
+def search(db: Session, q: str, limit: int = 10, exclude_form_id: Optional[int] = None) -> List[dict]:
+    """
+    Korisnici čije ime ili email sadrži q, najbolji prvi: tačno ime, ime koje počinje sa q,
+    ime koje sadrži q, pa pogodak samo u email-u (unutar grupe kraće ime, pa similarity na
+    Postgres-u). Rangira se ograničen skup kandidata:
+    tačno ime i početak imena iz jedinstvenog indeksa nad username, plus prvih
+    RANK_CANDIDATES pogodaka indeksa pretrage, pa i čest upit ne čita sve pogotke. Sa
+    exclude_form_id se izostavljaju vlasnik i saradnici forme (NOT EXISTS nad jedinstvenim
+    indeksom (form_id, user_id)).
+    """
+    q = (q or "").strip()
+    if len(q) < MIN_QUERY_LEN:
+        raise HTTPException(status_code=400, detail="Parametar q mora imati najmanje 2 karaktera.")
+
+    owner_id = None
+    if exclude_form_id is not None:
+        owner_id = db.query(FormModel.owner_id).filter(FormModel.id == exclude_form_id).scalar()
+        if owner_id is None:
+            raise HTTPException(status_code=404, detail="Forma ne postoji.")
+
+    u = UserModel
+    excluded = _not_excluded(u.id, owner_id, exclude_form_id)
+    prefix = (
+        select(u.id)
+        .where(u.username >= q, u.username < q + "\U0010ffff", *excluded)
+        .order_by(u.username)
+        .limit(RANK_CANDIDATES)
+        .subquery()
+    )
+    contains = _contains(db, q, owner_id, exclude_form_id)
+    candidates = union(select(prefix.c.id), select(contains.c[0]))
+
+    order = [
+        case(
+            (func.lower(u.username) == q.lower(), 0),
+            (u.username.ilike(_like_pattern(q, prefix_only=True), escape="\\"), 1),
+            (u.username.ilike(_like_pattern(q), escape="\\"), 2),
+            else_=3,
+        ),
+        func.length(u.username),
+    ]
+    if db.get_bind().dialect.name == "postgresql":
+        order.append(func.greatest(func.similarity(u.username, q), func.similarity(u.email, q)).desc())
+
+    rows = (
+        db.query(u.id, u.username, u.email)
+        .filter(u.id.in_(candidates))
+        .order_by(*order, u.id)
+        .limit(limit)
+        .all()
+    )
+    return [{"id": r.id, "username": r.username, "email": r.email} for r in rows]
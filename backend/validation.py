@@ -0,0 +1,211 @@
+"""
+Prevedeni validatori za predaju odgovora. Pitanja i opcije forme se jednom pretvore u skupove
+i rečnike (id opcija, tekst -> id, broj -> id, obavezna pitanja), keširaju se po formi uz
+forms.schema_version i koriste bez upita nad opcijama dok se pitanja ne promene.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from answer_types import TYPE_ALIASES, AnswerRow, option_numbers, typed_fields
+from cache_utils import LRUCache
+from models import FormModel, OptionModel, QuestionModel
+
+validator_cache = LRUCache("form_validators", maxsize=int(os.getenv("VALIDATOR_CACHE_SIZE", "512")))
+
+
+def _parse_id_like(x) -> Optional[int]:
+    try:
+        return int(str(x).strip())
+    except Exception:
+        return None
+
+
+def _stringy(x) -> str:
+    return "" if x is None else str(x)
+
+
+@dataclass
+class CompiledQuestion:
+    id: int
+    text: str
+    type: str
+    kind: str
+    is_required: bool
+    max_choices: Optional[int]
+    option_ids: FrozenSet[int] = frozenset()
+    id_by_text: Dict[str, int] = field(default_factory=dict)
+    id_by_number: Dict[float, int] = field(default_factory=dict)
+    number_by_id: Dict[int, float] = field(default_factory=dict)
+
+    def _require_options(self):
+        if not self.option_ids:
+            raise HTTPException(status_code=400, detail=f"Pitanje '{self.text}' nema opcije.")
+
+    def _option_id(self, raw) -> Optional[int]:
+        """Prihvata option id ili option text."""
+        oid = _parse_id_like(raw)
+        if oid is not None and oid in self.option_ids:
+            return oid
+        return self.id_by_text.get(str(raw))
+
+    def _single(self, raw) -> str:
+        self._require_options()
+        oid = self._option_id(raw)
+        if oid is None:
+            raise HTTPException(status_code=400, detail=f"Nevažeća opcija za pitanje '{self.text}'.")
+        return str(oid)
+
+    def _multi(self, raw) -> str:
+        """Prihvata listu ID-jeva ili tekstova; vraća CSV string sa ID-jevima."""
+        self._require_options()
+        if isinstance(raw, str):
+            cand = [p.strip() for p in raw.split(",") if p.strip()]
+        elif isinstance(raw, list):
+            cand = raw
+        else:
+            raise HTTPException(status_code=400, detail=f"Multiple choice za '{self.text}' očekuje listu ili CSV string.")
+
+        ids: List[int] = []
+        for it in cand:
+            oid = self._option_id(it)
+            if oid is None:
+                raise HTTPException(status_code=400, detail=f"Nevažeća opcija '{str(it)}' za '{self.text}'.")
+            ids.append(oid)
+
+        if self.max_choices is not None and len(ids) > int(self.max_choices):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Dozvoljeno je najviše {self.max_choices} izbora za '{self.text}'."
+            )
+        return ",".join(str(i) for i in ids)
+
+    def _numeric_choice(self, raw) -> str:
+        """Prihvata ID opcije ili numeričku vrednost koja postoji među opcijama (po tekstu)."""
+        self._require_options()
+        oid = _parse_id_like(raw)
+        if oid is not None and oid in self.option_ids:
+            return str(oid)
+        try:
+            f = float(str(raw).strip())
+        except Exception:
+            raise HTTPException(status_code=400, detail=f"Odgovor za '{self.text}' mora biti broj.")
+        oid = self.id_by_number.get(f)
+        if oid is None:
+            raise HTTPException(status_code=400, detail=f"Odgovor nije u dozvoljenom opsegu za '{self.text}'.")
+        return str(oid)
+
+    def stored_value(self, raw) -> str:
+        """Proverava odgovor i vraća string koji se čuva u answers.value."""
+        if self.kind == "single_choice":
+            return self._single(raw)
+        if self.kind == "multiple_choice":
+            return self._multi(raw)
+        if self.kind == "numeric_choice":
+            return self._numeric_choice(raw)
+        if self.kind == "date":
+            try:
+                return date.fromisoformat(str(raw)).isoformat()
+            except Exception:
+                raise HTTPException(status_code=400, detail="Neispravan datum (očekivan ISO format YYYY-MM-DD).")
+        if self.kind == "datetime":
+            try:
+                return datetime.fromisoformat(str(raw).replace("Z", "+00:00")).replace(microsecond=0).isoformat()
+            except Exception:
+                raise HTTPException(status_code=400, detail="Neispravan datum/vreme (ISO 8601).")
+        return _stringy(raw)
+
+    def row(self, raw) -> AnswerRow:
+        """Proveren odgovor sa tipiziranim kolonama (option_id, value_num, izbori)."""
+        value = self.stored_value(raw)
+        option_id, value_num, selections = typed_fields(self.type, value, self.option_ids, self.number_by_id)
+        return AnswerRow(self.id, self.type, value, option_id, value_num, selections)
+
+
+@dataclass
+class CompiledForm:
+    form_id: int
+    schema_version: int
+    questions: List[CompiledQuestion]
+    by_id: Dict[int, CompiledQuestion]
+
+    def validate(self, answers: Iterable) -> List[AnswerRow]:
+        """
+        Proverava obavezna pitanja i svaki odgovor (AnswerItem);
+        vraća AnswerRow redove (question_id, tip pitanja, vrednost za čuvanje, tipizirane kolone).
+        Greške su iste kao ranije u submit_answers, istim redosledom.
+        """
+        answers = list(answers)
+        by_qid = {a.question_id: a for a in answers}
+        for q in self.questions:
+            if not q.is_required:
+                continue
+            a = by_qid.get(q.id)
+            if a is None or a.answer is None or (isinstance(a.answer, str) and a.answer.strip() == ""):
+                raise HTTPException(status_code=400, detail=f"Pitanje '{q.text}' je obavezno.")
+
+        out = []
+        for item in answers:
+            q = self.by_id.get(item.question_id)
+            if not q:
+                raise HTTPException(status_code=400, detail=f"Nevažeće pitanje ID: {item.question_id}")
+            out.append(q.row(item.answer))
+        return out
+
+
+def compile_form(db: Session, form_id: int, schema_version: int) -> CompiledForm:
+    qrows = (
+        db.query(QuestionModel)
+        .filter(QuestionModel.form_id == form_id)
+        .order_by(QuestionModel.order)
+        .all()
+    )
+    opts_by_qid: Dict[int, list] = {}
+    if qrows:
+        orows = (
+            db.query(OptionModel.id, OptionModel.question_id, OptionModel.text)
+            .filter(OptionModel.question_id.in_([q.id for q in qrows]))
+            .order_by(OptionModel.id)
+            .all()
+        )
+        for o in orows:
+            opts_by_qid.setdefault(o.question_id, []).append(o)
+
+    questions = []
+    for q in qrows:
+        options = opts_by_qid.get(q.id, [])
+        id_by_text: Dict[str, int] = {}
+        id_by_number: Dict[float, int] = {}
+        for o in options:
+            # prva opcija sa datim tekstom/brojem ima prednost, kao ranije pri linearnoj pretrazi
+            id_by_text.setdefault(o.text, o.id)
+            try:
+                id_by_number.setdefault(float(o.text), o.id)
+            except (TypeError, ValueError):
+                pass
+        questions.append(CompiledQuestion(
+            id=q.id,
+            text=q.text,
+            type=q.type,
+            kind=TYPE_ALIASES.get(q.type, q.type),
+            is_required=bool(q.is_required),
+            max_choices=q.max_choices,
+            option_ids=frozenset(o.id for o in options),
+            id_by_text=id_by_text,
+            id_by_number=id_by_number,
+            number_by_id=option_numbers(options),
+        ))
+    return CompiledForm(form_id, schema_version, questions, {q.id: q for q in questions})
+
+
+def form_validator(db: Session, form: FormModel) -> CompiledForm:
+    version = form.schema_version or 0
+    compiled = validator_cache.get(form.id, version=version)
+    if compiled is None:
+        compiled = compile_form(db, form.id, version)
+        validator_cache.set(form.id, compiled, version=version)
+    return compiled
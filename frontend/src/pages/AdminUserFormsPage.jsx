@@ -1,7 +1,7 @@
 // src/pages/AdminUserFormsPage.jsx
 import React, { useEffect, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
-import api from "../services/api";
+import api, { getAllPages } from "../services/api";
 import { FaEdit, FaEye, FaList } from "react-icons/fa";
 
 export default function AdminUserFormsPage() {
@@ -29,13 +29,13 @@ export default function AdminUserFormsPage() {
         // ime korisnika (ako postoji GET /users/{id}, može i to)
         let users = [];
         try {
-          const resUsers = await api.get("/users");
+          const resUsers = await getAllPages("/users");
           users = Array.isArray(resUsers.data) ? resUsers.data : [];
         } catch {}
         setOwner(users.find((u) => String(u.id) === String(userId)) || null);
 
         // sve forme korisnika, uključujući kolaboracije
-        const res = await api.get(`/users/${userId}/forms`, {
+        const res = await getAllPages(`/users/${userId}/forms`, {
           params: { include_collab: true },
         });
         setForms(Array.isArray(res.data) ? res.data : []);
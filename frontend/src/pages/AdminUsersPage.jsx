@@ -1,7 +1,7 @@
 // src/pages/AdminUsersPage.jsx
 import React, { useEffect, useMemo, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import api from "../services/api";
+import api, { getAllPages } from "../services/api";
 
 export default function AdminUsersPage() {
   const nav = useNavigate();
@@ -33,7 +33,7 @@ export default function AdminUsersPage() {
         }
         setIsSuper(true);
 
-        const res = await api.get("/users"); // [{id, username, email, is_superadmin}]
+        const res = await getAllPages("/users"); // [{id, username, email, is_superadmin}]
         setUsers(Array.isArray(res.data) ? res.data : []);
       } catch (e) {
         setErr("Greška pri učitavanju korisnika.");
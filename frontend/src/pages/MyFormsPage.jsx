@@ -1,7 +1,7 @@
 // src/pages/MyFormsPage.jsx
 import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import api from "../services/api";
+import api, { getAllPages } from "../services/api";
 import "../styles/form.css";
 import { FaEdit, FaEye, FaList } from "react-icons/fa";
 import ShareLinkButton from '../components/ShareLinkButton';
@@ -36,7 +36,7 @@ const MyFormsPage = () => {
       setErr("");
       try {
         // 1) tvoje forme (owner)
-        const ownedRes = await api.get("/forms/owned", { headers });
+        const ownedRes = await getAllPages("/forms/owned", { headers });
         const ownedArr = Array.isArray(ownedRes.data) ? ownedRes.data : [];
         // obeleži lokalno
         const ownedWithFlags = ownedArr.slice(0, 9).map((f) => ({
@@ -49,7 +49,7 @@ const MyFormsPage = () => {
         // 2) forme gde si owner ili kolaborator
         let mineArr = [];
         try {
-          const mineRes = await api.get("/forms/mine", { headers });
+          const mineRes = await getAllPages("/forms/mine", { headers });
           mineArr = Array.isArray(mineRes.data) ? mineRes.data : [];
         } catch (e) {
           console.warn("Ne mogu /forms/mine:", e?.response?.status || e);
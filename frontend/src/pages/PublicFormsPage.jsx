@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import api from "../services/api";
+import { getAllPages } from "../services/api";
 import "../styles/form.css";
 
 const PublicFormsPage = () => {
@@ -12,8 +12,7 @@ const PublicFormsPage = () => {
   const navigate = useNavigate();
 
   useEffect(() => {
-    api
-      .get("/forms/public") // ako backend vec filtrira
+    getAllPages("/forms/public") // ako backend vec filtrira
       .then((res) => {
         if (Array.isArray(res.data)) {
           setForms(res.data);
@@ -1,7 +1,7 @@
 // src/pages/ViewResultsPage.jsx
 import React, { useEffect, useMemo, useState } from "react";
 import { useParams, useLocation } from "react-router-dom";
-import api from "../services/api";
+import api, { getPage } from "../services/api";
 
 function ViewResultsPage() {
   const { id } = useParams();
@@ -16,6 +16,9 @@ function ViewResultsPage() {
   const [results, setResults] = useState([]);
   const [exporting, setExporting] = useState(false);
   const [loading, setLoading] = useState(true);
+  // odgovori se učitavaju stranu po stranu; null = nema više strana
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // NEW: filter state
   const [selectedQuestion, setSelectedQuestion] = useState(""); // "" = sva pitanja
@@ -25,8 +28,9 @@ function ViewResultsPage() {
     const fetchResults = async () => {
       setLoading(true);
       try {
-        const res = await api.get(`/forms/${id}/answers`, withParams());
-        setResults(res.data || []);
+        const page = await getPage(`/forms/${id}/answers`, withParams());
+        setResults(page.data);
+        setNextCursor(page.nextCursor);
       } catch (err) {
         console.error('Greška pri dohvaćanju rezultata:', err);
         alert('Greška pri dohvaćanju rezultata.');
@@ -37,6 +41,21 @@ function ViewResultsPage() {
     fetchResults();
   }, [id, asUser]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await getPage(`/forms/${id}/answers`, withParams(), nextCursor);
+      setResults((prev) => [...prev, ...page.data]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Greška pri dohvaćanju rezultata:', err);
+      alert('Greška pri dohvaćanju rezultata.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleExport = async () => {
     setExporting(true);
     try {
@@ -153,7 +172,7 @@ function ViewResultsPage() {
           className="muted"
           style={{ marginBottom: 12, fontSize: 14 }}
         >
-          Prikazano: <strong>{filteredResults.length}</strong> od <strong>{results.length}</strong> zapisa
+          Prikazano: <strong>{filteredResults.length}</strong> od <strong>{results.length}</strong> učitanih zapisa
           {selectedQuestion && <> • Pitanje: <em>{selectedQuestion}</em></>}
           {selectedUser && <> • Korisnik: <em>{selectedUser}</em></>}
         </div>
@@ -187,6 +206,12 @@ function ViewResultsPage() {
           ))
         )
       ))}
+
+      {!loading && nextCursor && (
+        <button className="form-button" onClick={loadMore} disabled={loadingMore} type="button">
+          {loadingMore ? "Učitavanje…" : "Učitaj još"}
+        </button>
+      )}
     </div>
   );
 }
@@ -20,5 +20,28 @@ instance.interceptors.request.use((config) => {
   return config;
 });
 
+// Liste su podeljene na strane (keyset); kursor sledeće strane stiže u zaglavlju X-Next-Cursor.
+// Vraća { data: [...], nextCursor } za jednu stranu (nextCursor je null na poslednjoj).
+export async function getPage(url, config = {}, cursor = null) {
+  const params = { ...(config.params || {}), ...(cursor ? { cursor } : {}) };
+  const res = await instance.get(url, { ...config, params });
+  return {
+    data: Array.isArray(res.data) ? res.data : [],
+    nextCursor: res.headers["x-next-cursor"] || null,
+  };
+}
+
+// Vraća { data: [...] } sa redovima svih strana, kao običan api.get.
+// Samo za male, ograničene liste (korisnici, forme); odgovore učitavati stranu po stranu (getPage).
+export async function getAllPages(url, config = {}) {
+  const data = [];
+  let cursor = null;
+  do {
+    const page = await getPage(url, config, cursor);
+    data.push(...page.data);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return { data };
+}
 
 export default instance;